@@ -18,11 +18,13 @@
 """
 
 from base64 import standard_b64encode
+from datetime import datetime
 from os.path import join
 from time import time
 import re
 
 from PyFile import PyFile
+from LogReader import TIME_FORMAT
 from utils import freeSpace, compare_time
 from common.packagetools import parseNames
 from network.RequestFactory import getURL
@@ -151,7 +153,7 @@ class Api(Iface):
         if section == "core":
             self.core.config[category][option] = value
 
-            if option in ("limit_speed", "max_speed"): #not so nice to update the limit
+            if option in ("limit_speed", "max_speed", "plugin_speed"): #not so nice to update the limit
                 self.core.requestFactory.updateBucket()
 
         elif section == "plugin":
@@ -197,6 +199,7 @@ class Api(Iface):
     def unpauseServer(self):
         """Unpause server: New Downloads will be started."""
         self.core.threadManager.pause = False
+        self.core.scheduler.wakeup()
 
     @permission(PERMS.STATUS)
     def togglePause(self):
@@ -205,6 +208,7 @@ class Api(Iface):
         :return: new pause state
         """
         self.core.threadManager.pause ^= True
+        self.core.scheduler.wakeup()
         return self.core.threadManager.pause
 
     @permission(PERMS.STATUS)
@@ -237,6 +241,17 @@ class Api(Iface):
         """Available free space at download directory in bytes"""
         return freeSpace(self.core.config["general"]["download_folder"])
 
+    @permission(PERMS.STATUS)
+    def getServerStats(self):
+        """Internal counters of the core, e.g. database queue depth and latency.
+
+        :return: dict of sections with their counters
+        """
+        threads = self.core.threadManager.getThreadStats()
+        return {"database": self.core.db.getStats(), "cache": self.core.files.getCacheStats(),
+                "info_cache": self.core.threadManager.getInfoCacheStats(),
+                "plugins": threads.pop("plugins"), "threads": threads}
+
     @permission(PERMS.ALL)
     def getServerVersion(self):
         """pyLoad Core version """
@@ -245,10 +260,12 @@ class Api(Iface):
     def kill(self):
         """Clean way to quit pyLoad"""
         self.core.do_kill = True
+        self.core.scheduler.wakeup()
 
     def restart(self):
         """Restart pyload core"""
         self.core.do_restart = True
+        self.core.scheduler.wakeup()
 
     @permission(PERMS.LOGS)
     def getLog(self, offset=0):
@@ -257,17 +274,41 @@ class Api(Iface):
         :param offset: line offset
         :return: List of log entries
         """
-        filename = join(self.core.config['log']['log_folder'], 'log.txt')
         try:
-            fh = open(filename, "r")
-            lines = fh.readlines()
-            fh.close()
-            if offset >= len(lines):
-                return []
-            return lines[offset:]
+            return self.core.logReader.getLines(offset)
         except:
             return ['No log available']
 
+    @permission(PERMS.LOGS)
+    def getLogCount(self):
+        """Number of lines in the log file"""
+        return self.core.logReader.count()
+
+    @permission(PERMS.LOGS)
+    def queryLog(self, offset=0, limit=None, level=None, start=None, end=None, plugin=None, fid=None):
+        """Log entries matching all given filters, without loading the whole log.
+
+        :param offset: line offset to start at
+        :param limit: max number of entries
+        :param level: minimum level, e.g. "WARNING"
+        :param start: datetime or "%d.%m.%Y %H:%M:%S" string of first entry
+        :param end: datetime or string of last entry
+        :param plugin: plugin name that logged the message
+        :param fid: file id, matches messages containing the file name
+        :return: list of `LogEntry`
+        """
+        if isinstance(start, basestring): start = datetime.strptime(start, TIME_FORMAT)
+        if isinstance(end, basestring): end = datetime.strptime(end, TIME_FORMAT)
+
+        text = None
+        if fid is not None:
+            pyfile = self.core.files.getFile(fid)
+            if not pyfile: return []
+            text = pyfile.name
+
+        return [LogEntry(x["line"], x["date"], x["level"], x["message"]) for x in
+                self.core.logReader.query(offset, limit, level, start, end, plugin, text)]
+
     @permission(PERMS.STATUS)
     def isTimeDownload(self):
         """Checks if pyload will start new downloads according to time in config.
@@ -842,7 +883,22 @@ class Api(Iface):
         :param uuid:
         :return: list of `Events`
         """
-        events = self.core.pullManager.getEvents(uuid)
+        return self._convertEvents(self.core.pullManager.getEvents(uuid))
+
+    @permission(PERMS.STATUS)
+    def waitEvents(self, uuid, seq=None, timeout=0):
+        """Events after seq, waits up to timeout seconds for new ones.
+        Pass the returned seq with the next call to get only newer events.
+
+        :param uuid: client id
+        :param seq: last seq seen, None for all events not fetched yet
+        :param timeout: seconds to wait
+        :return: `EventBatch`
+        """
+        seq, events = self.core.pullManager.waitEvents(uuid, seq, timeout)
+        return EventBatch(seq, self._convertEvents(events))
+
+    def _convertEvents(self, events):
         newEvents = []
 
         def convDest(d):
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+"""
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 3 of the License,
+    or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+    See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+    @author: RaNaN
+"""
+
+from datetime import datetime
+from logging import getLevelName
+from os import stat
+from threading import Lock
+
+from module.utils import lock
+
+TIME_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+
+def parseLine(line):
+    """ splits a log line into (time, level, message), time is None for continued lines e.g. tracebacks """
+    line = line.decode("utf8", "ignore").rstrip("\r\n")
+    parts = line.split(" ", 3)
+    if len(parts) == 4 and len(parts[0]) == 10 and parts[0][2] == parts[0][5] == ".":
+        return parts[0] + " " + parts[1], parts[2], parts[3].lstrip()
+    return None, None, line
+
+
+_lastTime = (None, None)
+
+
+def parseTime(stamp):
+    """ datetime of a log time, consecutive lines mostly have the same """
+    global _lastTime
+    if _lastTime[0] != stamp:
+        try:
+            _lastTime = stamp, datetime.strptime(stamp, TIME_FORMAT)
+        except ValueError:
+            return None
+    return _lastTime[1]
+
+
+class LogReader():
+    """ reads the log file with help of a sparse index of line offsets, so it never has to be loaded completely.
+    New lines are indexed on every access, a rotated or truncated file is indexed again. """
+
+    STEP = 1000 # lines between two indexed offsets
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.ino = None
+        self.offsets = [0] # byte offset of line i * STEP
+        self.lines = 0 # number of complete lines indexed
+        self.end = 0 # byte offset after the last indexed line
+
+    def update(self):
+        """ indexes lines written since the last call, needs the lock """
+        try:
+            st = stat(self.filename)
+        except OSError:
+            self.reset()
+            return
+
+        if st.st_ino != self.ino or st.st_size < self.end:
+            self.reset() #rotated
+            self.ino = st.st_ino
+
+        if st.st_size == self.end: return
+
+        f = open(self.filename, "rb")
+        f.seek(self.end)
+        pos = self.end
+        for line in f:
+            if not line.endswith("\n"): break #still written
+            pos += len(line)
+            self.lines += 1
+            if not self.lines % self.STEP:
+                self.offsets.append(pos)
+        f.close()
+
+        self.end = pos
+
+    def iterLines(self, offset):
+        """ yields (line number, line) from offset to the indexed end, needs the lock """
+        if offset >= self.lines: return
+
+        index = offset / self.STEP
+        f = open(self.filename, "rb")
+        try:
+            f.seek(self.offsets[index])
+            for i in xrange(index * self.STEP, self.lines):
+                line = f.readline()
+                if i >= offset:
+                    yield i, line
+        finally:
+            f.close()
+
+    @lock
+    def count(self):
+        self.update()
+        return self.lines
+
+    @lock
+    def getLines(self, offset=0, limit=None):
+        """ raw lines starting at line offset """
+        self.update()
+        lines = []
+        for i, line in self.iterLines(max(0, offset)):
+            if limit is not None and len(lines) >= limit: break
+            lines.append(line)
+        return lines
+
+    def findTime(self, start):
+        """ line number of an indexed offset before the first line logged at start, needs the lock """
+        lo, hi = 0, len(self.offsets) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) / 2
+            t = None
+            for i, line in self.iterLines(mid * self.STEP):
+                t = parseLine(line)[0]
+                if t or i > (mid + 1) * self.STEP: break
+            if t: t = parseTime(t)
+
+            if t and t < start:
+                lo = mid
+            else:
+                hi = mid - 1
+
+        return lo * self.STEP
+
+    def query(self, offset=0, limit=None, level=None, start=None, end=None, plugin=None, text=None):
+        """ log entries matching all given filters as dicts with line, date, level and message
+
+        :param offset: first line to look at
+        :param level: minimum level name, e.g. "WARNING"
+        :param start: datetime of the first entry
+        :param end: datetime of the last entry
+        :param plugin: only messages logged by this plugin
+        :param text: only messages containing this text
+        """
+        self.lock.acquire()
+        try:
+            return self._query(offset, limit, level, start, end, plugin, text)
+        finally:
+            self.lock.release()
+
+    def _query(self, offset, limit, level, start, end, plugin, text):
+        self.update()
+
+        if start:
+            offset = max(offset, self.findTime(start))
+        if level:
+            level = getLevelName(level.upper())
+        if plugin:
+            plugin = u"%s: " % plugin
+
+        result = []
+        match = False
+        for i, line in self.iterLines(max(0, offset)):
+            stamp, name, message = parseLine(line)
+            if stamp is None:
+                #continues the last entry
+                if match and (limit is None or len(result) < limit):
+                    result.append({"line": i + 1, "date": entry["date"], "level": entry["level"], "message": message})
+                continue
+
+            date = parseTime(stamp) if start or end else None
+            if end and date and date > end: break
+            if limit is not None and len(result) >= limit: break
+
+            match = not (start and date and date < start) and not (level and getLevelName(name) < level) and \
+                    not (plugin and not message.startswith(plugin)) and not (text and text not in message)
+            if match:
+                entry = {"line": i + 1, "date": stamp, "level": name, "message": message}
+                result.append(entry)
+
+        return result
@@ -19,7 +19,8 @@
 """
 
 from Queue import Queue
-from threading import Thread
+from threading import Thread, Lock, Condition
+from collections import deque
 from os import listdir, stat
 from os.path import join
 from time import sleep, time, strftime, gmtime
@@ -32,7 +33,7 @@ from types import MethodType
 from pycurl import error
 
 from PyFile import PyFile
-from plugins.Plugin import Abort, Fail, Reconnect, Retry, SkipDownload
+from plugins.Plugin import Abort, Fail, Park, Reconnect, Retry, SkipDownload, chunks
 from common.packagetools import parseNames
 from utils import save_join
 from Api import OnlineStatus
@@ -160,6 +161,13 @@ class DownloadThread(PluginThread):
 
         self.start()
 
+    def setActive(self, job):
+        self.m.occupy(self, job)
+        self._active = job
+
+    #: current job, the manager counts threads per plugin and account when it changes
+    active = property(lambda self: self._active, setActive)
+
     #----------------------------------------------------------------------
     def run(self):
         """run method"""
@@ -223,6 +231,13 @@ class DownloadThread(PluginThread):
                 self.queue.put(pyfile)
                 continue
 
+            except Park:
+                self.m.log.info(_("Download waits without thread: %(name)s, %(time)s") % {"name": pyfile.name,
+                                                                                         "time": pyfile.formatWait()})
+                self.m.park(pyfile)
+                self.active = False
+                continue
+
             except Fail, e:
                 msg = e.args[0]
 
@@ -256,6 +271,12 @@ class DownloadThread(PluginThread):
 
                     pyfile.waitUntil = wait
                     pyfile.setStatus("waiting")
+                    park = self.m.core.config["download"]["park_wait"]
+                    if park and wait - time() >= park:
+                        self.m.park(pyfile)
+                        self.active = False
+                        continue
+
                     while time() < wait:
                         sleep(1)
                         if pyfile.abort:
@@ -316,6 +337,7 @@ class DownloadThread(PluginThread):
                 self.m.core.files.save()
                 pyfile.checkIfProcessed()
                 exc_clear()
+                self.m.core.scheduler.wakeup() #thread may be free for next job
 
             
             #pyfile.plugin.req.clean()
@@ -323,10 +345,13 @@ class DownloadThread(PluginThread):
             self.active = False
             pyfile.finishIfDone()
             self.m.core.files.save()
+            self.m.core.scheduler.wakeup()
 
 
     def put(self, job):
         """assing job to thread"""
+        if job != "quit":
+            self.active = job #thread is busy before it took the job from queue
         self.queue.put(job)
 
 
@@ -473,6 +498,11 @@ class HookThread(PluginThread):
 
 
 class InfoThread(PluginThread):
+    """ fetches online status, plugins are checked in parallel by a pool of workers.
+    The checks of a plugin are limited by the info_limits option (Plugin:checks/sec between/links),
+    plugins without entry fall back to their module attributes INFO_THREADS (parallel batches, default 1)
+    and INFO_INTERVAL (min seconds between two batches) """
+
     def __init__(self, manager, data, pid=-1, rid=-1, add=False):
         """Constructor"""
         PluginThread.__init__(self, manager)
@@ -485,6 +515,13 @@ class InfoThread(PluginThread):
         self.add = add #add packages instead of return result
 
         self.cache = [] #accumulated data
+        self.lock = Lock() # for the callbacks of the workers
+
+        self.jobs = {} # plugin name -> deque of (plugin, urls)
+        self.limits = {} # plugin name -> (threads, interval)
+        self.running = {} # plugin name -> running batches
+        self.last = {} # plugin name -> start of last batch
+        self.jobLock = Condition()
 
         self.start()
 
@@ -510,23 +547,10 @@ class InfoThread(PluginThread):
 
         #directly write to database
         if self.pid > -1:
-            for pluginname, urls in plugins.iteritems():
-                plugin = self.m.core.pluginManager.getPlugin(pluginname, True)
-                if hasattr(plugin, "getInfo"):
-                    self.fetchForPlugin(pluginname, plugin, urls, self.updateDB)
-                    self.m.core.files.save()
+            self.fetchAll(plugins, self.updateDB)
 
         elif self.add:
-            for pluginname, urls in plugins.iteritems():
-                plugin = self.m.core.pluginManager.getPlugin(pluginname, True)
-                if hasattr(plugin, "getInfo"):
-                    self.fetchForPlugin(pluginname, plugin, urls, self.updateCache, True)
-
-                else:
-                    #generate default result
-                    result = [(url, 0, 3, url) for url in urls]
-
-                    self.updateCache(pluginname, result)
+            self.fetchAll(plugins, self.updateCache, True)
 
             packs = parseNames([(name, url) for name, x, y, url in self.cache])
 
@@ -558,20 +582,11 @@ class InfoThread(PluginThread):
 
             self.m.infoResults[self.rid] = {}
 
-            for pluginname, urls in plugins.iteritems():
-                plugin = self.m.core.pluginManager.getPlugin(pluginname, True)
-                if hasattr(plugin, "getInfo"):
-                    self.fetchForPlugin(pluginname, plugin, urls, self.updateResult, True)
-
-                    #force to process cache
-                    if self.cache:
-                        self.updateResult(pluginname, [], True)
-
-                else:
-                    #generate default result
-                    result = [(url, 0, 3, url) for url in urls]
+            self.fetchAll(plugins, self.updateResult, True)
 
-                    self.updateResult(pluginname, result, True)
+            #force to process cache
+            if self.cache:
+                self.updateResult(None, [], True)
 
             self.m.infoResults[self.rid]["ALL_INFO_FETCHED"] = {}
 
@@ -580,17 +595,18 @@ class InfoThread(PluginThread):
 
     def updateDB(self, plugin, result):
         self.m.core.files.updateFileInfo(result, self.pid)
+        self.m.core.files.save()
 
     def updateResult(self, plugin, result, force=False):
         #parse package name and generate result
         #accumulate results
 
-        self.cache.extend(result)
+        self.cache.extend([(plugin, x) for x in result])
 
         if len(self.cache) >= 20 or force:
             #used for package generating
             tmp = [(name, (url, OnlineStatus(name, plugin, "unknown", status, int(size))))
-            for name, size, status, url in self.cache]
+            for plugin, (name, size, status, url) in self.cache]
 
             data = parseNames(tmp)
             result = {}
@@ -606,13 +622,118 @@ class InfoThread(PluginThread):
     def updateCache(self, plugin, result):
         self.cache.extend(result)
 
+    def fetchAll(self, plugins, cb, err=None):
+        """ checks all plugins in parallel, returns when every result was passed to cb """
+        config = self.m.core.config["general"]
+        size = max(1, config["info_batch"])
+        limits = self.parseLimits(config["info_limits"])
+
+        def callback(pluginname, result):
+            self.lock.acquire()
+            try:
+                cb(pluginname, result)
+            finally:
+                self.lock.release()
+
+        batches = 0
+        for pluginname, urls in plugins.iteritems():
+            plugin = self.m.core.pluginManager.getPlugin(pluginname, True)
+            if not hasattr(plugin, "getInfo"):
+                if err: #generate default result
+                    callback(pluginname, [(url, 0, 3, url) for url in urls])
+                continue
+
+            threads, interval, links = limits.get(pluginname, (getattr(plugin, "INFO_THREADS", 1),
+                                                               getattr(plugin, "INFO_INTERVAL", 0), size))
+            self.jobs[pluginname] = deque([(plugin, batch) for batch in chunks(urls, max(1, links))])
+            self.limits[pluginname] = (max(1, threads), interval)
+            self.running[pluginname] = 0
+            self.last[pluginname] = 0
+            batches += len(self.jobs[pluginname])
+
+        workers = [Thread(target=self.work, args=(callback, err)) for i in
+                   range(min(batches, max(1, config["info_threads"])))]
+        for worker in workers:
+            worker.setDaemon(True)
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def parseLimits(self, value):
+        """ parses limits per plugin, format is Plugin:checks/interval/links;...
+        missing values default to one check at a time, no interval and info_batch links """
+        size = max(1, self.m.core.config["general"]["info_batch"])
+        limits = {}
+
+        for entry in value.split(";"):
+            name, sep, limit = entry.partition(":")
+            if not sep: continue
+
+            parts = [x.strip() for x in limit.split("/")]
+            parts += [""] * (3 - len(parts))
+            try:
+                threads = int(parts[0]) if parts[0] else 1
+                interval = float(parts[1]) if parts[1] else 0
+                links = int(parts[2]) if parts[2] else size
+            except ValueError:
+                self.m.log.warning(_("Invalid online check limit for %s: %s") % (name.strip(), limit))
+                continue
+
+            limits[name.strip()] = (threads, interval, links)
+
+        return limits
+
+    def work(self, cb, err):
+        """ worker of fetchAll """
+        while True:
+            job = self.nextJob()
+            if not job: break
+
+            pluginname, plugin, urls = job
+            try:
+                self.fetchForPlugin(pluginname, plugin, urls, cb, err)
+            finally:
+                self.jobLock.acquire()
+                self.running[pluginname] -= 1
+                self.jobLock.notifyAll()
+                self.jobLock.release()
+
+    def nextJob(self):
+        """ next batch of a plugin below its limits, the least recently started plugin comes first.
+        Waits when all plugins are busy, returns None when no batches are left """
+        self.jobLock.acquire()
+        try:
+            while True:
+                names = [name for name in self.jobs if self.jobs[name]]
+                if not names: return None
+
+                wait = None
+                for name in sorted(names, key=self.last.get):
+                    threads, interval = self.limits[name]
+                    if self.running[name] >= threads: continue
+
+                    delay = self.last[name] + interval - time()
+                    if delay <= 0:
+                        self.running[name] += 1
+                        self.last[name] = time()
+                        plugin, urls = self.jobs[name].popleft()
+                        return name, plugin, urls
+
+                    wait = delay if wait is None else min(wait, delay)
+
+                # woken up by finished batches
+                self.jobLock.wait(wait)
+        finally:
+            self.jobLock.release()
+
     def fetchForPlugin(self, pluginname, plugin, urls, cb, err=None):
         try:
+            cached = self.m.getCachedInfo(urls)
             result = [] #result loaded from cache
             process = [] #urls to process
             for url in urls:
-                if url in self.m.infoCache:
-                    result.append(self.m.infoCache[url])
+                if url in cached:
+                    result.append(cached[url])
                 else:
                     process.append(url)
 
@@ -626,9 +747,7 @@ class InfoThread(PluginThread):
                     #result = [ .. (name, size, status, url) .. ]
                     if not type(result) == list: result = [result]
 
-                    for res in result:
-                        self.m.infoCache[res[3]] = res
-
+                    self.m.cacheInfo(result)
                     cb(pluginname, result)
 
             self.m.log.debug("Finished Info Fetching for %s" % pluginname)
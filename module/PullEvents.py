@@ -17,57 +17,194 @@
     @author: mkaay
 """
 
+
+from collections import deque
+from threading import Condition
 from time import time
-from module.utils import uniqify
 
 class PullManager():
+    """ keeps a bounded event buffer for every client. Events are numbered, so clients can resume after
+    the last seq they have seen and wait for new events instead of polling """
+
+    TIMEOUT = 30 # seconds until an inactive client is removed
+    BUFFER = 500 # max buffered events per client
+
     def __init__(self, core):
         self.core = core
-        self.clients = []
-    
+        self.clients = {}
+        self.seq = 0
+        self.lock = Condition()
+        self.nextClean = time() + self.TIMEOUT
+
     def newClient(self, uuid):
-        self.clients.append(Client(uuid))
-    
+        """ needs the lock """
+        self.clean()
+        client = Client(uuid, self.BUFFER)
+        client.acked = self.seq
+        self.clients[uuid] = client
+        return client
+
     def clean(self):
-        for n, client in enumerate(self.clients):
-            if client.lastActive + 30 < time():
-                del self.clients[n]
-    
+        """ needs the lock """
+        limit = time() - self.TIMEOUT
+        for uuid, client in self.clients.items():
+            if not client.waiting and client.lastActive < limit:
+                del self.clients[uuid]
+        self.nextClean = time() + self.TIMEOUT
+
     def getEvents(self, uuid):
-        events = []
-        validUuid = False
-        for client in self.clients:
-            if client.uuid == uuid:
+        """ returns all new events of a client and removes them """
+        self.lock.acquire()
+        try:
+            client = self.clients.get(uuid)
+            if not client:
+                self.newClient(uuid)
+                return [ReloadAllEvent("queue").toList(), ReloadAllEvent("collector").toList()]
+
+            client.lastActive = time()
+            events = client.getEvents(client.acked)
+            client.ack(self.seq)
+            return events
+        finally:
+            self.lock.release()
+
+    def waitEvents(self, uuid, seq=None, timeout=0):
+        """ returns the events after seq and waits up to timeout seconds when there are none.
+        Events are kept until the client asks for a higher seq, so a lost response can be requested again.
+
+        :param uuid: client id
+        :param seq: last seq the client has seen, None for the events it has not got yet
+        :param timeout: seconds to wait for events
+        :return: (seq, list of events), seq has to be passed with the next call
+        """
+        self.lock.acquire()
+        try:
+            client = self.clients.get(uuid)
+            if not client or (seq is not None and not client.acked <= seq <= self.seq):
+                # unknown client or events after seq are not buffered anymore
+                if not client: client = self.newClient(uuid)
+                client.reset(self.seq)
+                return self.seq, [ReloadAllEvent("queue").toList(), ReloadAllEvent("collector").toList()]
+
+            confirm = seq is None
+            if confirm:
+                seq = client.acked
+            else:
+                client.ack(seq)
+
+            client.waiting += 1
+            try:
+                end = time() + timeout
+                while not client.hasEvents(seq) and time() < end:
+                    self.lock.wait(end - time())
+            finally:
+                client.waiting -= 1
                 client.lastActive = time()
-                validUuid = True
-                while client.newEvents():
-                    events.append(client.popEvent().toList())
-                break
-        if not validUuid:
-            self.newClient(uuid)
-            events = [ReloadAllEvent("queue").toList(), ReloadAllEvent("collector").toList()]
-        return uniqify(events, repr)
-    
+
+            events = client.getEvents(seq)
+            if confirm:
+                client.ack(self.seq)
+            return self.seq, events
+        finally:
+            self.lock.release()
+
     def addEvent(self, event):
-        for client in self.clients:
-            client.addEvent(event)
+        self.lock.acquire()
+        try:
+            self.seq += 1
+            for client in self.clients.itervalues():
+                client.addEvent(self.seq, event)
+
+            if time() > self.nextClean:
+                self.clean()
+            self.lock.notifyAll()
+        finally:
+            self.lock.release()
 
 class Client():
-    def __init__(self, uuid):
+    """ ring buffer of [seq, event, key] entries, updates for the same element are coalesced """
+
+    def __init__(self, uuid, size):
         self.uuid = uuid
+        self.size = size
         self.lastActive = time()
-        self.events = []
-    
-    def newEvents(self):
-        return len(self.events) > 0
-    
-    def popEvent(self):
-        if not len(self.events):
-            return None
-        return self.events.pop(0)
-    
-    def addEvent(self, event):
-        self.events.append(event)
+        self.waiting = 0
+
+        self.events = deque()
+        self.updates = {} # (destination, type, id) -> entry of the pending update
+        self.acked = 0 # all events up to this seq were received
+        self.overflow = 0 # events up to this seq were dropped, client has to reload everything
+
+    def reset(self, seq):
+        self.events.clear()
+        self.updates.clear()
+        self.acked = seq
+        self.overflow = 0
+        self.lastActive = time()
+
+    def ack(self, seq):
+        """ removes events up to seq """
+        while self.events and self.events[0][0] <= seq:
+            entry = self.events.popleft()
+            if entry[2] and self.updates.get(entry[2]) is entry:
+                del self.updates[entry[2]]
+
+        self.acked = max(self.acked, seq)
+        if self.overflow <= seq:
+            self.overflow = 0
+
+    def hasEvents(self, seq):
+        if self.overflow > seq:
+            return True
+        for entry in reversed(self.events):
+            if entry[0] <= seq:
+                break
+            if entry[1]:
+                return True
+        return False
+
+    def getEvents(self, seq):
+        """ list of events after seq """
+        events = []
+        if self.overflow > seq:
+            events = [ReloadAllEvent("queue").toList(), ReloadAllEvent("collector").toList(),
+                      AccountUpdateEvent().toList(), ConfigUpdateEvent().toList()]
+
+        for entry in self.events:
+            if entry[0] > seq and entry[1]:
+                events.append(entry[1].toList())
+        return events
+
+    def drop(self, entry):
+        """ removes an event from the buffer, it stays as placeholder until the buffer is compacted """
+        entry[1] = None
+        if entry[2] and self.updates.get(entry[2]) is entry:
+            del self.updates[entry[2]]
+
+    def addEvent(self, seq, event):
+        key = None
+        if isinstance(event, (UpdateEvent, RemoveEvent)):
+            key = (event.destination, event.type, event.id)
+            if key in self.updates:
+                # an older update is superseded, also when it was already sent but not acknowledged
+                self.drop(self.updates[key])
+        elif isinstance(event, ReloadAllEvent):
+            for entry in self.events:
+                if entry[1] and getattr(entry[1], "destination", None) == event.destination:
+                    self.drop(entry)
+
+        if len(self.events) >= self.size:
+            self.events = deque(e for e in self.events if e[1])
+            if len(self.events) >= self.size:
+                self.events.clear()
+                self.updates.clear()
+                self.overflow = seq
+                return
+
+        entry = [seq, event, key]
+        self.events.append(entry)
+        if isinstance(event, UpdateEvent):
+            self.updates[key] = entry
 
 class UpdateEvent():
     def __init__(self, itype, iid, destination):
@@ -52,7 +52,7 @@ class PyFile(object):
     """
     __slots__ = ("m", "id", "url", "name", "size", "_size", "status", "pluginname", "packageid",
                  "error", "order", "lock", "plugin", "waitUntil", "active", "abort", "statusname",
-                 "reconnected", "progress", "maxprogress", "pluginmodule", "pluginclass")
+                 "reconnected", "progress", "maxprogress", "pluginmodule", "pluginclass", "__weakref__")
 
     def __init__(self, manager, id, url, name, size, status, error, pluginname, package, order):
         self.m = manager
@@ -184,6 +184,10 @@ class PyFile(object):
 
     def abortDownload(self):
         """abort pyfile if possible"""
+        if self.m.core.threadManager.removeParked(self):
+            #no thread is processing it, so it has to be aborted here
+            self.m.core.log.info(_("Download aborted: %s") % self.name)
+            self.setStatus("aborted")
         while self.id in self.m.core.threadManager.processingIds():
             self.abort = True
             if self.plugin and self.plugin.req:
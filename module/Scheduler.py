@@ -18,9 +18,10 @@
 """
 
 from time import time
-from heapq import heappop, heappush
+from heapq import heappop, heappush, heapify
+from itertools import count
 from thread import start_new_thread
-from threading import Lock
+from threading import Condition
 
 class AlreadyCalled(Exception):
     pass
@@ -41,20 +42,39 @@ class Deferred():
         for f, cargs, ckwargs in self.call:
             args += tuple(cargs)
             kwargs.update(ckwargs)
-            f(*args ** kwargs)
+            f(*args, **kwargs)
 
 
 class Scheduler():
+    """ heap of timed jobs, the core loop sleeps on it until the next job is due or wakeup is called """
+
+    MAX_WAIT = 2 # seconds the core loop sleeps at most, reconnect and download time are still polled
+
     def __init__(self, core):
         self.core = core
 
-        self.queue = PriorityQueue()
+        self.queue = [] # heap of [time, seq, job], seq keeps jobs with same time in order
+        self.jobs = {} # deferred -> job
+        self.seq = count()
+        self.cancelled = 0 # removed jobs still in the heap
+
+        self.woken = False
+        self.cond = Condition()
 
     def addJob(self, t, call, args=[], kwargs={}, threaded=True):
         d = Deferred()
         t += time()
         j = Job(t, call, args, kwargs, d, threaded)
-        self.queue.put((t, j))
+
+        self.cond.acquire()
+        try:
+            heappush(self.queue, [t, self.seq.next(), j])
+            self.jobs[d] = j
+            if self.queue[0][2] is j:
+                self.cond.notify() # core loop has to wait shorter
+        finally:
+            self.cond.release()
+
         return d
 
 
@@ -63,29 +83,66 @@ class Scheduler():
         :param d: defered object
         :return: if job was deleted
         """
-        index = -1
-
-        for i, j in enumerate(self.queue):
-            if j[1].deferred == d:
-                index = i
+        self.cond.acquire()
+        try:
+            j = self.jobs.pop(d, None)
+            if j is None:
+                return False
+
+            #job stays in the heap until it is popped or too many are cancelled
+            j.cancelled = True
+            self.cancelled += 1
+            if self.cancelled > len(self.queue) / 2:
+                self.queue = [x for x in self.queue if not x[2].cancelled]
+                heapify(self.queue)
+                self.cancelled = 0
 
-        if index >= 0:
-            del self.queue[index]
             return True
+        finally:
+            self.cond.release()
+
+    def wakeup(self):
+        """ lets the core loop run at once, e.g. a thread got free or links were queued """
+        self.cond.acquire()
+        self.woken = True
+        self.cond.notify()
+        self.cond.release()
 
-        return False
+    def wait(self, timeout=None):
+        """ blocks until the next job is due, wakeup was called or timeout passed """
+        if timeout is None:
+            timeout = self.MAX_WAIT
+
+        self.cond.acquire()
+        try:
+            if not self.woken:
+                if self.queue:
+                    timeout = min(timeout, self.queue[0][0] - time())
+                if timeout > 0:
+                    self.cond.wait(timeout)
+            self.woken = False
+        finally:
+            self.cond.release()
 
     def work(self):
-        while True:
-            t, j = self.queue.get()
-            if not j:
-                break
-            else:
-                if t <= time():
-                    j.start()
+        """ starts all due jobs """
+        due = []
+        now = time()
+
+        self.cond.acquire()
+        try:
+            while self.queue and self.queue[0][0] <= now:
+                t, seq, j = heappop(self.queue)
+                if j.cancelled:
+                    self.cancelled -= 1
                 else:
-                    self.queue.put((t, j))
-                    break
+                    del self.jobs[j.deferred]
+                    due.append(j)
+        finally:
+            self.cond.release()
+
+        for j in due:
+            j.start()
 
 
 class Job():
@@ -96,6 +153,7 @@ class Job():
         self.kwargs = kwargs
         self.deferred = deferred
         self.threaded = threaded
+        self.cancelled = False
 
     def run(self):
         ret = self.call(*self.args, **self.kwargs)
@@ -109,33 +167,3 @@ class Job():
             start_new_thread(self.run, ())
         else:
             self.run()
-
-
-class PriorityQueue():
-    """ a non blocking priority queue """
-
-    def __init__(self):
-        self.queue = []
-        self.lock = Lock()
-
-    def __iter__(self):
-        return iter(self.queue)
-
-    def __delitem__(self, key):
-        del self.queue[key]
-
-    def put(self, element):
-        self.lock.acquire()
-        heappush(self.queue, element)
-        self.lock.release()
-
-    def get(self):
-        """ return element or None """
-        self.lock.acquire()
-        try:
-            el = heappop(self.queue)
-            return el
-        except IndexError:
-            return None, None
-        finally:
-            self.lock.release()
\ No newline at end of file
@@ -54,9 +54,18 @@ class ThreadManager:
 
         self.lock = Lock()
 
-        # some operations require to fetch url info from hoster, so we caching them so it wont be done twice
-        # contains a timestamp and will be purged after timeout
-        self.infoCache = {}
+        # download threads per plugin and per account, updated when a thread takes or releases a job
+        self.occupied = {} # thread -> (job, plugin, account, limit)
+        self.pluginCount = {}
+        self.accountCount = {} # (plugin, user) -> threads
+        self.occLock = Lock()
+
+        # downloads waiting without a thread, pyfile id -> (pyfile, scheduler job)
+        self.parked = {}
+
+        # results of online checks are cached in the database, hit and miss counters
+        self.infoHits = 0
+        self.infoMisses = 0
 
         # pool of ids for online check
         self.resultIDs = 0
@@ -116,14 +125,51 @@ class ThreadManager:
     def setInfoResults(self, rid, result):
         self.infoResults[rid].update(result)
 
+    def getCachedInfo(self, urls):
+        """ cached online status of urls, url -> (name, size, status, url) """
+        result = self.core.db.getInfoCache(urls)
+        self.infoHits += len(result)
+        self.infoMisses += len(urls) - len(result)
+        return result
+
+    def cacheInfo(self, data):
+        """ stores online status, list of (name, size, status, url) """
+        self.core.db.setInfoCache(data, self.core.config["general"]["info_cache_size"])
+
+    def getInfoCacheStats(self):
+        return {"hits": self.infoHits, "misses": self.infoMisses, "size": self.core.db.getInfoCacheSize()}
+
     def getActiveFiles(self):
         active = [x.active for x in self.threads if x.active and isinstance(x.active, PyFile)]
+        active.extend([x[0] for x in self.parked.values()])
 
         for t in self.localThreads:
             active.extend(t.getActiveFiles())
 
         return active
 
+    @lock
+    def park(self, pyfile):
+        """ keeps a waiting download with its plugin, the scheduler queues it again when the wait is over """
+        pyfile.plugin.parked = True
+        d = self.core.scheduler.addJob(max(0, pyfile.waitUntil - time()), self.unpark, [pyfile], threaded=False)
+        self.parked[pyfile.id] = pyfile, d
+
+    def unpark(self, pyfile):
+        if self.removeParked(pyfile):
+            pyfile.setStatus("queued")
+
+    @lock
+    def removeParked(self, pyfile):
+        """ returns True if the pyfile was parked """
+        entry = self.parked.get(pyfile.id)
+        if not entry or entry[0] is not pyfile:
+            return False
+
+        del self.parked[pyfile.id]
+        self.core.scheduler.removeJob(entry[1])
+        return True
+
     def processingIds(self):
         """get a id list of all pyfiles processed"""
         return [x.id for x in self.getActiveFiles()]
@@ -151,8 +197,7 @@ class ThreadManager:
             self.assignJob()
             #it may be failed non critical so we try it again
 
-        if (self.infoCache or self.infoResults) and self.timestamp < time():
-            self.infoCache.clear()
+        if self.infoResults and self.timestamp < time():
             self.infoResults.clear()
             self.log.debug("Cleared Result cache")
 
@@ -251,9 +296,56 @@ class ThreadManager:
         self.log.debug("Cleaned up pycurl")
         return True
 
+    def occupy(self, thread, job):
+        """ updates the counters, job is the new active job of a download thread """
+        self.occLock.acquire()
+        try:
+            old = self.occupied.get(thread)
+            if old and old[0] is job: return
+
+            if old:
+                del self.occupied[thread]
+                job_, plugin, account, limit = old
+                self.pluginCount[plugin] -= 1
+                if not self.pluginCount[plugin]: del self.pluginCount[plugin]
+                if account:
+                    self.accountCount[account] -= 1
+                    if not self.accountCount[account]: del self.accountCount[account]
+
+            if isinstance(job, PyFile) and job.hasPlugin():
+                account = (job.pluginname, job.plugin.user) if job.plugin.account else None
+                limit = self.getLimit(job) if account else 0
+                self.occupied[thread] = job, job.pluginname, account, limit
+                self.pluginCount[job.pluginname] = self.pluginCount.get(job.pluginname, 0) + 1
+                if account:
+                    self.accountCount[account] = self.accountCount.get(account, 0) + 1
+        finally:
+            self.occLock.release()
+
+    def isOccupied(self, job, account, limit):
+        """ True when the plugin of job can not start another download, needs occLock """
+        if not job.hasPlugin(): return False
+        return not job.plugin.multiDL or (0 < limit <= self.accountCount.get(account, 0))
+
+    def getOccupied(self):
+        """ plugins which can not start another download """
+        self.occLock.acquire()
+        try:
+            return set([plugin for job, plugin, account, limit in self.occupied.itervalues()
+                        if self.isOccupied(job, account, limit)])
+        finally:
+            self.occLock.release()
+
+    def getThreadStats(self):
+        self.occLock.acquire()
+        try:
+            return {"threads": len(self.threads), "busy": len(self.occupied), "plugins": dict(self.pluginCount)}
+        finally:
+            self.occLock.release()
+
     #----------------------------------------------------------------------
     def assignJob(self):
-        """assing a job to a thread if possible"""
+        """assign jobs to all free threads if possible"""
 
         if self.pause or not self.core.api.isTimeDownload(): return
 
@@ -261,17 +353,12 @@ class ThreadManager:
         #    if not self.cleanPyCurl(): return
 
         free = [x for x in self.threads if not x.active]
+        occ = self.getOccupied()
 
-        inuse = set([(x.active.pluginname,self.getLimit(x)) for x in self.threads if x.active and x.active.hasPlugin() and x.active.plugin.account])
-        inuse = map(lambda x : (x[0], x[1], len([y for y in self.threads if y.active and y.active.pluginname == x[0]])) ,inuse)
-        onlimit = [x[0] for x in inuse if x[1] > 0 and x[2] >= x[1]]
+        while True:
+            job = self.core.files.getJob(occ)
+            if not job: return
 
-        occ = [x.active.pluginname for x in self.threads if x.active and x.active.hasPlugin() and not x.active.plugin.multiDL] + onlimit
-        
-        occ.sort()
-        occ = tuple(set(occ))
-        job = self.core.files.getJob(occ)
-        if job:
             try:
                 job.initPlugin()
             except Exception, e:
@@ -280,37 +367,44 @@ class ThreadManager:
                 job.setStatus("failed")
                 job.error = str(e)
                 job.release()
-                return
+                continue
 
-            if job.plugin.__type__ == "hoster":
-                spaceLeft = freeSpace(self.core.config["general"]["download_folder"]) / 1024 / 1024
-                if spaceLeft < self.core.config["general"]["min_free_space"]:
-                    self.log.warning(_("Not enough space left on device"))
-                    self.pause = True
+            if job.plugin.__type__ != "hoster":
+                thread = PluginThread.DecrypterThread(self, job)
+                return
 
-                if free and not self.pause:
-                    thread = free[0]
-                    #self.downloaded += 1
+            spaceLeft = freeSpace(self.core.config["general"]["download_folder"]) / 1024 / 1024
+            if spaceLeft < self.core.config["general"]["min_free_space"]:
+                self.log.warning(_("Not enough space left on device"))
+                self.pause = True
 
-                    thread.put(job)
-                else:
-                    #put job back
-                    if occ not in self.core.files.jobCache:
-                        self.core.files.jobCache[occ] = []
-                    self.core.files.jobCache[occ].append(job.id)
+            if not free or self.pause:
+                #put job back
+                self.core.files.putJob(job)
 
-                    #check for decrypt jobs
-                    job = self.core.files.getDecryptJob()
-                    if job:
-                        job.initPlugin()
-                        thread = PluginThread.DecrypterThread(self, job)
+                #check for decrypt jobs
+                job = self.core.files.getDecryptJob()
+                if job:
+                    job.initPlugin()
+                    thread = PluginThread.DecrypterThread(self, job)
+                return
 
+            thread = free.pop(0)
+            #self.downloaded += 1
+            thread.put(job)
 
+            # free downloads decide in setup if they allow more than one download
+            if not job.plugin.account:
+                occ.add(job.pluginname)
             else:
-                thread = PluginThread.DecrypterThread(self, job)
-
-    def getLimit(self, thread):
-        limit = thread.active.plugin.account.getAccountData(thread.active.plugin.user)["options"].get("limitDL",["0"])[0]
+                self.occLock.acquire()
+                job, plugin, account, limit = self.occupied.get(thread, (job, job.pluginname, None, 0))
+                if self.isOccupied(job, account, limit):
+                    occ.add(plugin)
+                self.occLock.release()
+
+    def getLimit(self, pyfile):
+        limit = pyfile.plugin.account.getAccountData(pyfile.plugin.user)["options"].get("limitDL",["0"])[0]
         return int(limit)
 
     def cleanup(self):
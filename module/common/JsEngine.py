@@ -17,10 +17,18 @@
     @author: RaNaN
 """
 
+from hashlib import sha1
 from imp import find_module
+from os import devnull, kill, name as os_name, read
 from os.path import join, exists
+from select import select
+from signal import SIGTERM
+from threading import Lock
+from time import time
 from urllib import quote
 
+from json_layer import json_dumps, json_loads
+
 
 ENGINE = ""
 
@@ -29,6 +37,37 @@ JS = False
 PYV8 = False
 RHINO = False
 
+#long running js shells are used instead of one process per script, needs select() on pipes
+WORKER = os_name != "nt"
+POOL_SIZE = 2 # idle workers kept per engine
+CACHE_SIZE = 64 # results of recent scripts
+TIMEOUT = 30 # seconds a script may run
+START_TIMEOUT = 60 # a jvm needs some time to start
+
+#reads one json request per line and prints the result, run(script) evaluates it with a fresh global object
+WORKER_LOOP = r"""
+var line, req, res;
+while ((line = readline())) {
+    req = JSON.parse(line);
+    res = {id: req.id};
+    try {
+        res.result = run(req.script);
+    } catch (e) {
+        res.error = String(e);
+    }
+    print(JSON.stringify(res).replace(/[\u007f-\uffff]/g, function (c) {
+        return "\\u" + ("000" + c.charCodeAt(0).toString(16)).slice(-4);
+    }));
+}"""
+
+WORKER_JS = "function run(s) { return String(evalcx(s)); }" + WORKER_LOOP
+
+WORKER_RHINO = """var Context = Packages.org.mozilla.javascript.Context;
+function run(s) {
+    var cx = Context.getCurrentContext();
+    return String(Context.toString(cx.evaluateString(cx.initStandardObjects(), s, "eval", 1, null)));
+}""" + WORKER_LOOP
+
 
 if not ENGINE:
     try:
@@ -78,11 +117,92 @@ if not ENGINE or DEBUG:
     except:
         pass
 
+
+class JsWorker():
+    """ js shell that keeps running and evaluates the scripts sent to it,
+    every script gets a new global object like it would in a new process """
+
+    def __init__(self, cmd, source):
+        self.p = subprocess.Popen(cmd + ["-e", source], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                  stderr=open(devnull, "wb"), close_fds=True)
+        self.buffer = ""
+        self.id = 0
+
+        #integrity check, fails when the shell lacks readline, JSON or a way to create new globals
+        try:
+            if self.eval("23+19", START_TIMEOUT) != "42":
+                raise Exception("Unexpected result")
+        except:
+            self.close()
+            raise
+
+    def alive(self):
+        return self.p.poll() is None
+
+    def eval(self, script, timeout=TIMEOUT):
+        """ returns the result as unicode, raises IOError when the worker died """
+        self.id += 1
+        if type(script) != unicode:
+            script = script.decode("utf8", "replace")
+
+        try:
+            self.p.stdin.write(json_dumps({"id": self.id, "script": script}) + "\n")
+            self.p.stdin.flush()
+        except (IOError, OSError):
+            self.close()
+            raise IOError("JS worker died")
+
+        deadline = time() + timeout
+        while True:
+            try:
+                res = json_loads(self.readline(deadline))
+            except ValueError:
+                continue #something the script printed
+            if type(res) == dict and res.get("id") == self.id:
+                break
+
+        if "error" in res:
+            raise Exception(res["error"])
+        return res["result"]
+
+    def readline(self, deadline):
+        while "\n" not in self.buffer:
+            left = deadline - time()
+            if left <= 0 or not select([self.p.stdout], [], [], left)[0]:
+                self.close()
+                raise Exception("JS evaluation timed out")
+
+            data = read(self.p.stdout.fileno(), 65536)
+            if not data:
+                self.close()
+                raise IOError("JS worker died")
+            self.buffer += data
+
+        line, self.buffer = self.buffer.split("\n", 1)
+        return line
+
+    def close(self):
+        if self.alive():
+            if os_name == "nt":
+                import ctypes
+                ctypes.windll.kernel32.TerminateProcess(int(self.p._handle), -1)
+            else:
+                kill(self.p.pid, SIGTERM)
+        self.p.wait()
+        self.p.stdin.close()
+        self.p.stdout.close()
+
+
 class JsEngine():
     def __init__(self):
         self.engine = ENGINE
         self.init = False
 
+        self.lock = Lock()
+        self.workers = {} # engine -> idle workers, None if the engine can't run one
+        self.cache = {} # (engine, sha1 of script) -> result
+        self.used = [] # cache keys, least recently used first
+
     def __nonzero__(self):
         return False if not ENGINE else True
 
@@ -138,13 +258,101 @@ class JsEngine():
         return rt.eval(script)
 
     def eval_js(self, script):
+        return self.eval_worker("js", ["js"], WORKER_JS, script, self.spawn_js)
+
+    def eval_rhino(self, script):
+        return self.eval_worker("rhino", ["java", "-cp", path, "org.mozilla.javascript.tools.shell.Main"],
+                                WORKER_RHINO, script, self.spawn_rhino)
+
+    def eval_worker(self, engine, cmd, source, script, spawn):
+        """ evaluates script with an idle worker of the engine, results are cached by script """
+        if type(script) == unicode:
+            key = engine, sha1(script.encode("utf8")).hexdigest()
+        else:
+            key = engine, sha1(script).hexdigest()
+
+        self.lock.acquire()
+        try:
+            if key in self.cache:
+                self.used.remove(key)
+                self.used.append(key) #most recently used
+                return self.cache[key]
+        finally:
+            self.lock.release()
+
+        for i in range(2): #a crashed worker is restarted once
+            worker = self.get_worker(engine, cmd, source)
+            if not worker:
+                result = spawn(script)
+                break
+
+            try:
+                result = worker.eval(script).encode("utf8")
+                break
+            except IOError:
+                if i: raise
+            finally:
+                self.put_worker(engine, worker)
+
+        self.lock.acquire()
+        try:
+            if key not in self.cache:
+                self.used.append(key)
+            self.cache[key] = result
+            if len(self.used) > CACHE_SIZE:
+                del self.cache[self.used.pop(0)]
+        finally:
+            self.lock.release()
+
+        return result
+
+    def get_worker(self, engine, cmd, source):
+        """ idle worker or a new one, None if the engine can't run workers """
+        self.lock.acquire()
+        try:
+            if not WORKER or self.workers.get(engine, []) is None:
+                return None
+            if self.workers.get(engine):
+                return self.workers[engine].pop()
+        finally:
+            self.lock.release()
+
+        try:
+            worker = JsWorker(cmd, source)
+        except Exception:
+            worker = None
+
+        self.lock.acquire()
+        try:
+            if worker:
+                self.workers.setdefault(engine, [])
+            else:
+                self.workers[engine] = None
+        finally:
+            self.lock.release()
+
+        return worker
+
+    def put_worker(self, engine, worker):
+        self.lock.acquire()
+        try:
+            idle = self.workers.get(engine)
+            if worker.alive() and idle is not None and len(idle) < POOL_SIZE:
+                idle.append(worker)
+                return
+        finally:
+            self.lock.release()
+
+        worker.close()
+
+    def spawn_js(self, script):
         script = "print(eval(unescape('%s')))" % quote(script)
         p = subprocess.Popen(["js", "-e", script], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=-1)
         out, err = p.communicate()
         res = out.strip()
         return res
 
-    def eval_rhino(self, script):
+    def spawn_rhino(self, script):
         script = "print(eval(unescape('%s')))" % quote(script)
         p = subprocess.Popen(["java", "-cp", path, "org.mozilla.javascript.tools.shell.Main", "-e", script],
             stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=-1)
@@ -155,8 +363,30 @@ class JsEngine():
     def error(self):
         return _("No js engine detected, please install either Spidermonkey, ossp-js, pyv8 or rhino")
 
+
+def benchmark(n=20):
+    """ prints the average time per script of a new process and of a worker """
+    from timeit import default_timer
+
+    js = JsEngine()
+    for engine, enabled in (("js", JS), ("rhino", RHINO)):
+        if not enabled: continue
+        spawn = getattr(js, "spawn_" + engine)
+        worker = getattr(js, "eval_" + engine)
+        worker("0") #start the worker
+
+        for name, f in (("process", spawn), ("worker", worker)):
+            start = default_timer()
+            for i in range(n):
+                #different scripts, so they don't come from the cache
+                f("var f = function(x) { return x * 2; }; f(%d)" % i)
+            print "%s %s: %.1f ms per script" % (engine, name, (default_timer() - start) * 1000 / n)
+
+
 if __name__ == "__main__":
     js = JsEngine()
 
     test = u'"ü"+"ä"'
-    js.eval(test)
\ No newline at end of file
+    js.eval(test)
+
+    benchmark()
\ No newline at end of file
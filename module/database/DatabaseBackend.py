@@ -21,8 +21,9 @@ from threading import Event
 from os import remove
 from os.path import exists
 from shutil import move
+from time import time
 
-from Queue import Queue
+from Queue import Queue, Empty
 from traceback import print_exc
 
 from module.utils import chmod
@@ -76,6 +77,10 @@ class DatabaseJob():
         self.result = None
         self.exception = False
 
+        self.queued = time()
+        self.started = 0
+        self.finished = 0
+
 #        import inspect
 #        self.frame = inspect.currentframe()
 
@@ -92,6 +97,7 @@ class DatabaseJob():
         return "DataBase Job %s:%s\n%sResult: %s" % (self.f.__name__, self.args[1:], output, self.result)
 
     def processJob(self):
+        self.started = time()
         try:
             self.result = self.f(*self.args, **self.kwargs)
         except Exception, e:
@@ -103,6 +109,7 @@ class DatabaseJob():
 
             self.exception = e
         finally:
+            self.finished = time()
             self.done.set()
     
     def wait(self):
@@ -110,6 +117,8 @@ class DatabaseJob():
 
 class DatabaseBackend(Thread):
     subs = []
+    BATCH_SIZE = 100 # max jobs executed per wake up
+
     def __init__(self, core):
         Thread.__init__(self)
         self.setDaemon(True)
@@ -118,6 +127,14 @@ class DatabaseBackend(Thread):
         self.jobs = Queue()
         
         self.setuplock = Event()
+
+        self.dirty = False # uncommitted changes
+        self.changes = 0 # total changes of the connection at last check
+        self.lastCommit = time()
+        self.commitInterval = 1 # seconds changes are collected before commit
+
+        self.stats = {"jobs": 0, "batches": 0, "commits": 0, "max_depth": 0,
+                      "wait_time": 0.0, "max_wait": 0.0, "run_time": 0.0, "max_run": 0.0}
         
         style.setDB(self)
     
@@ -132,6 +149,15 @@ class DatabaseBackend(Thread):
         self.conn = sqlite3.connect("files.db")
         chmod("files.db", 0600)
 
+        # readers do not block the writer, and fsync is only needed on checkpoints
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        try:
+            self.commitInterval = self.core.config["general"]["db_commit_interval"]
+        except Exception:
+            pass
+
         self.c = self.conn.cursor() #compatibility
         
         if convert is not None:
@@ -145,18 +171,82 @@ class DatabaseBackend(Thread):
         self.setuplock.set()
         
         while True:
-            j = self.jobs.get()
-            if j == "quit":
-                self.c.close()
-                self.conn.close()
-                break
-            j.processJob()
+            try:
+                j = self.jobs.get(True, self.getCommitTimeout())
+            except Empty:
+                self._commit()
+                continue
+
+            # all jobs waiting are executed in the same transaction
+            batch = [j]
+            depth = self.jobs.qsize() + 1
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except Empty:
+                    break
+
+            self.stats["batches"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+
+            for j in batch:
+                if j == "quit":
+                    self.c.close()
+                    self.conn.close()
+                    return
+                j.processJob()
+                self.addStats(j)
+
+            if self.conn.total_changes != self.changes:
+                self.changes = self.conn.total_changes
+                self.dirty = True
+
+            if self.dirty and time() - self.lastCommit >= self.commitInterval:
+                self._commit()
 
     @style.queue
     def shutdown(self):
-        self.conn.commit()
+        self._commit()
         self.jobs.put("quit")
 
+    def getCommitTimeout(self):
+        """ time until pending changes have to be committed, None if there are none """
+        if not self.dirty: return None
+        return max(0, self.lastCommit + self.commitInterval - time())
+
+    def _commit(self):
+        self.conn.commit()
+        self.changes = self.conn.total_changes
+        self.dirty = False
+        self.lastCommit = time()
+        self.stats["commits"] += 1
+
+    def addStats(self, job):
+        wait = job.started - job.queued
+        run = job.finished - job.started
+
+        self.stats["jobs"] += 1
+        self.stats["wait_time"] += wait
+        self.stats["run_time"] += run
+        self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+        self.stats["max_run"] = max(self.stats["max_run"], run)
+
+        if wait > 1:
+            try:
+                self.core.log.debug("Database job %s waited %.2fs, %d jobs pending" % (
+                    job.f.__name__, wait, self.jobs.qsize()))
+            except:
+                pass
+
+    def getStats(self):
+        """ queue depth and job latency, times in seconds """
+        stats = self.stats.copy()
+        stats["depth"] = self.jobs.qsize()
+        if stats["jobs"]:
+            stats["avg_wait"] = stats["wait_time"] / stats["jobs"]
+            stats["avg_run"] = stats["run_time"] / stats["jobs"]
+        return stats
+
     def _checkVersion(self):
         """ check db version and delete it if needed"""
         if not exists("files.version"):
@@ -215,6 +305,10 @@ class DatabaseBackend(Thread):
         self.c.execute('CREATE TABLE IF NOT EXISTS "packages" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "name" TEXT NOT NULL, "folder" TEXT, "password" TEXT DEFAULT "", "site" TEXT DEFAULT "", "queue" INTEGER DEFAULT 0 NOT NULL, "packageorder" INTEGER DEFAULT 0 NOT NULL)')
         self.c.execute('CREATE TABLE IF NOT EXISTS "links" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "url" TEXT NOT NULL, "name" TEXT, "size" INTEGER DEFAULT 0 NOT NULL, "status" INTEGER DEFAULT 3 NOT NULL, "plugin" TEXT DEFAULT "BasePlugin" NOT NULL, "error" TEXT DEFAULT "", "linkorder" INTEGER DEFAULT 0 NOT NULL, "package" INTEGER DEFAULT 0 NOT NULL, FOREIGN KEY(package) REFERENCES packages(id))')
         self.c.execute('CREATE INDEX IF NOT EXISTS "pIdIndex" ON links(package)')
+        self.c.execute('CREATE INDEX IF NOT EXISTS "statusIndex" ON links(status, package, linkorder)')
+        self.c.execute('CREATE INDEX IF NOT EXISTS "queueIndex" ON packages(queue, packageorder)')
+        self.c.execute('CREATE TABLE IF NOT EXISTS "info_cache" ("url" TEXT PRIMARY KEY, "name" TEXT, "size" INTEGER DEFAULT 0 NOT NULL, "status" INTEGER DEFAULT 3 NOT NULL, "expires" INTEGER NOT NULL, "used" INTEGER NOT NULL)')
+        self.c.execute('CREATE INDEX IF NOT EXISTS "infoUsedIndex" ON info_cache(used)')
         self.c.execute('CREATE TABLE IF NOT EXISTS "storage" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "identifier" TEXT NOT NULL, "key" TEXT NOT NULL, "value" TEXT DEFAULT "")')
         self.c.execute('CREATE TABLE IF NOT EXISTS "users" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "name" TEXT NOT NULL, "email" TEXT DEFAULT "" NOT NULL, "password" TEXT NOT NULL, "role" INTEGER DEFAULT 0 NOT NULL, "permission" INTEGER DEFAULT 0 NOT NULL, "template" TEXT DEFAULT "default" NOT NULL)')
 
@@ -225,6 +319,31 @@ class DatabaseBackend(Thread):
         FROM packages p JOIN links l ON p.id = l.package AND l.status in (0,4,13) GROUP BY p.id) s ON s.id = p.id \
         GROUP BY p.id')
 
+        self.c.execute('SELECT 1 FROM sqlite_master WHERE type="table" AND name="package_stats"')
+        newStats = not self.c.fetchone()
+
+        # pstats maintained by triggers, so it has not to be computed from all links every time
+        self.c.execute('CREATE TABLE IF NOT EXISTS "package_stats" ("package" INTEGER PRIMARY KEY, "linkstotal" INTEGER DEFAULT 0 NOT NULL, "sizetotal" INTEGER DEFAULT 0 NOT NULL, "linksdone" INTEGER DEFAULT 0 NOT NULL, "sizedone" INTEGER DEFAULT 0 NOT NULL)')
+        self.c.execute('CREATE TRIGGER IF NOT EXISTS "statsInsert" AFTER INSERT ON links BEGIN \
+        INSERT OR IGNORE INTO package_stats(package) VALUES (NEW.package); \
+        UPDATE package_stats SET linkstotal=linkstotal+1, sizetotal=sizetotal+NEW.size, linksdone=linksdone+(NEW.status IN (0,4,13)), \
+        sizedone=sizedone+(CASE WHEN NEW.status IN (0,4,13) THEN NEW.size ELSE 0 END) WHERE package=NEW.package; END')
+        self.c.execute('CREATE TRIGGER IF NOT EXISTS "statsDelete" AFTER DELETE ON links BEGIN \
+        UPDATE package_stats SET linkstotal=linkstotal-1, sizetotal=sizetotal-OLD.size, linksdone=linksdone-(OLD.status IN (0,4,13)), \
+        sizedone=sizedone-(CASE WHEN OLD.status IN (0,4,13) THEN OLD.size ELSE 0 END) WHERE package=OLD.package; END')
+        self.c.execute('CREATE TRIGGER IF NOT EXISTS "statsUpdate" AFTER UPDATE OF size, status, package ON links \
+        WHEN OLD.size != NEW.size OR OLD.status != NEW.status OR OLD.package != NEW.package BEGIN \
+        UPDATE package_stats SET linkstotal=linkstotal-1, sizetotal=sizetotal-OLD.size, linksdone=linksdone-(OLD.status IN (0,4,13)), \
+        sizedone=sizedone-(CASE WHEN OLD.status IN (0,4,13) THEN OLD.size ELSE 0 END) WHERE package=OLD.package; \
+        INSERT OR IGNORE INTO package_stats(package) VALUES (NEW.package); \
+        UPDATE package_stats SET linkstotal=linkstotal+1, sizetotal=sizetotal+NEW.size, linksdone=linksdone+(NEW.status IN (0,4,13)), \
+        sizedone=sizedone+(CASE WHEN NEW.status IN (0,4,13) THEN NEW.size ELSE 0 END) WHERE package=NEW.package; END')
+        self.c.execute('CREATE TRIGGER IF NOT EXISTS "statsPackageDelete" AFTER DELETE ON packages BEGIN \
+        DELETE FROM package_stats WHERE package=OLD.id; END')
+
+        if newStats:
+            self._rebuildPackageStats()
+
         #try to lower ids
         self.c.execute('SELECT max(id) FROM LINKS')
         fid = self.c.fetchone()[0]
@@ -246,6 +365,13 @@ class DatabaseBackend(Thread):
         self.c.execute('VACUUM')
 
 
+    def _rebuildPackageStats(self):
+        """ computes package_stats from all links """
+        self.c.execute('DELETE FROM package_stats')
+        self.c.execute('INSERT INTO package_stats(package, linkstotal, sizetotal, linksdone, sizedone) \
+        SELECT package, COUNT(*), SUM(size), SUM(status IN (0,4,13)), SUM(CASE WHEN status IN (0,4,13) THEN size ELSE 0 END) \
+        FROM links GROUP BY package')
+
     def _migrateUser(self):
         if exists("pyload.db"):
             try:
@@ -270,15 +396,17 @@ class DatabaseBackend(Thread):
     
     @style.async
     def commit(self):
-        self.conn.commit()
+        """ group commit, changes are written after the commit interval """
+        self.dirty = True
 
     @style.queue
     def syncSave(self):
-        self.conn.commit()
+        self._commit()
     
     @style.async
     def rollback(self):
         self.conn.rollback()
+        self.dirty = False
     
     def async(self, f, *args, **kwargs):
         args = (self, ) + args
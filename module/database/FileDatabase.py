@@ -18,8 +18,10 @@
 """
 
 
-from threading import RLock
+from threading import RLock, Lock
 from time import time
+from weakref import WeakValueDictionary
+from heapq import heappush, heappop, heapify
 
 from module.utils import formatSize, lock
 from module.PullEvents import InsertEvent, ReloadAllEvent, RemoveEvent, UpdateEvent
@@ -32,6 +34,255 @@ try:
 except:
     import sqlite3
 
+#plugins which are processed in collector
+PRE_PLUGINS = ("DLC", "LinkList", "SerienjunkiesOrg", "CCF", "RSDF")
+
+#links with these status can be downloaded
+READY_STATUS = (2, 3, 14)
+
+#links with these status are in use and must stay cached
+ACTIVE_STATUS = (5, 7, 10, 11, 12, 13)
+
+
+class LRUCache(dict):
+    """ dict that removes least recently used entries, when it grows over maxSize.
+    Entries are only removed if evict(value) returns True. Evicted values that are still referenced
+    somewhere are returned by get, so there is never a second instance of them. """
+
+    def __init__(self, maxSize, evict):
+        dict.__init__(self)
+        self.maxSize = maxSize # 0 for no limit
+        self.evict = evict
+        self.limit = maxSize # size to start the next purge
+        self.lock = RLock()
+
+        self.used = {} # key -> tick of last access
+        self.tick = 0
+        self.evicted = 0
+        self.refs = WeakValueDictionary() # evicted values
+
+    @lock
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        self.tick += 1
+        self.used[key] = self.tick
+        return value
+
+    @lock
+    def get(self, key, default=None):
+        """ value or default, without the race of checking for the key first """
+        value = dict.get(self, key)
+        if value is None:
+            value = self.refs.pop(key, None)
+            if value is None:
+                return default
+            dict.__setitem__(self, key, value)
+
+        self.tick += 1
+        self.used[key] = self.tick
+        return value
+
+    @lock
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.refs.pop(key, None)
+        self.tick += 1
+        self.used[key] = self.tick
+
+        if self.maxSize and len(self) > self.limit:
+            self.purge(key)
+
+    @lock
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.used.pop(key, None)
+        self.refs.pop(key, None)
+
+    @lock
+    def pop(self, key, *default):
+        self.used.pop(key, None)
+        self.refs.pop(key, None)
+        return dict.pop(self, key, *default)
+
+    @lock
+    def purge(self, keep=None):
+        """ removes least recently used entries until 90% of maxSize are reached """
+        size = self.maxSize * 9 / 10
+        for key in sorted(self.used, key=self.used.get):
+            if len(self) <= size: break
+            value = dict.get(self, key)
+            if key == keep or value is None: continue
+            if self.evict(value):
+                dict.pop(self, key, None)
+                self.used.pop(key, None)
+                self.refs[key] = value
+                self.evicted += 1
+
+        # too many entries in use, wait until it grows further before trying again
+        self.limit = max(self.maxSize, len(self) + self.maxSize / 10)
+
+
+class ReadyQueue():
+    """ ids of links ready for download, one heap per plugin in queue order.
+    Removed or changed entries stay in the heaps until they reach the top.
+    Queue and order of the packages are tracked too, so a changed package only updates its own links. """
+
+    def __init__(self):
+        self.heaps = {} # plugin -> heap of (packageorder, linkorder, id)
+        self.entries = {} # id -> current (packageorder, linkorder, plugin, package)
+        self.packages = {} # package id -> [queue, packageorder, set of ready ids]
+        self.valid = False # needs to be loaded from db
+        self.lock = Lock()
+
+    @lock
+    def clear(self):
+        self.heaps = {}
+        self.entries = {}
+        self.packages = {}
+        self.valid = False
+
+    @lock
+    def load(self, jobs):
+        """ fills the queue with (id, plugin, package, queue, packageorder, linkorder) tuples """
+        for id, plugin, package, queue, packageorder, linkorder in jobs:
+            self.entries[id] = (packageorder, linkorder, plugin, package)
+            self.getPackage(package, queue, packageorder)[2].add(id)
+            self.heaps.setdefault(plugin, []).append((packageorder, linkorder, id))
+
+        for heap in self.heaps.itervalues():
+            heapify(heap)
+
+        self.valid = True
+
+    def getPackage(self, package, queue, order):
+        """ needs the lock """
+        pack = self.packages.get(package)
+        if pack is None:
+            pack = self.packages[package] = [queue, order, set()]
+        return pack
+
+    def setEntry(self, id, packageorder, linkorder, plugin, package):
+        """ needs the lock, returns False if the link was already queued like this """
+        entry = (packageorder, linkorder, plugin, package)
+        old = self.entries.get(id)
+        if old == entry: return False
+        if old and old[3] != package:
+            self.packages[old[3]][2].discard(id)
+
+        self.entries[id] = entry
+        heappush(self.heaps.setdefault(plugin, []), (packageorder, linkorder, id))
+        return True
+
+    def setOrder(self, package, order):
+        """ needs the lock, changes the order of a package and its links """
+        pack = self.packages[package]
+        pack[1] = order
+        for id in pack[2]:
+            entry = self.entries[id]
+            if entry[0] != order:
+                self.setEntry(id, order, *entry[1:])
+
+    @lock
+    def add(self, id, plugin, package, queue, packageorder, linkorder):
+        """ queue and packageorder are only used for unknown packages, known ones keep their tracked position """
+        pack = self.getPackage(package, queue, packageorder)
+        pack[2].add(id)
+        return self.setEntry(id, pack[1], linkorder, plugin, package)
+
+    @lock
+    def hasPackage(self, package):
+        return package in self.packages
+
+    @lock
+    def remove(self, id):
+        entry = self.entries.pop(id, None)
+        if entry: self.packages[entry[3]][2].discard(id)
+
+    @lock
+    def setPackage(self, package, queue, order, jobs):
+        """ replaces the links of a package, jobs are (id, plugin, linkorder) tuples """
+        pack = self.getPackage(package, queue, order)
+        for id in pack[2]:
+            del self.entries[id]
+
+        self.packages[package] = [queue, order, set([x[0] for x in jobs])]
+        for id, plugin, linkorder in jobs:
+            self.setEntry(id, order, linkorder, plugin, package)
+
+    @lock
+    def removePackage(self, package):
+        pack = self.packages.pop(package, None)
+        if pack:
+            for id in pack[2]:
+                del self.entries[id]
+
+    @lock
+    def updatePackage(self, package, queue, order):
+        """ returns False if the package is unknown or in another queue, its links have to be loaded then """
+        pack = self.packages.get(package)
+        if pack is None or pack[0] != queue: return False
+        if pack[1] != order:
+            self.setOrder(package, order)
+        return True
+
+    @lock
+    def shift(self, queue, start, end, delta, exclude=None):
+        """ adds delta to the order of packages in queue with order between start and end, end None for no limit """
+        for package, pack in self.packages.iteritems():
+            if package == exclude or pack[0] != queue or pack[1] < start: continue
+            if end is None or pack[1] <= end:
+                self.setOrder(package, pack[1] + delta)
+
+    @lock
+    def reorderLink(self, package, id, old, position):
+        """ moves a link inside its package like the database does """
+        pack = self.packages.get(package)
+        if not pack: return
+
+        for link in pack[2]:
+            entry = self.entries[link]
+            if link == id:
+                order = position
+            elif old > position and position <= entry[1] < old:
+                order = entry[1] + 1
+            elif old < position and old < entry[1] <= position:
+                order = entry[1] - 1
+            else:
+                continue
+
+            self.setEntry(link, entry[0], order, entry[2], package)
+
+    def top(self, plugin):
+        """ first valid item of the plugin heap or None """
+        heap = self.heaps[plugin]
+        while heap:
+            item = heap[0]
+            entry = self.entries.get(item[2])
+            if entry and entry[:3] == (item[0], item[1], plugin):
+                return item
+            heappop(heap)
+
+        del self.heaps[plugin]
+
+    @lock
+    def pop(self, occ):
+        """ removes and returns the first id which plugin is not in occ """
+        best = None
+        for plugin in self.heaps.keys():
+            if plugin in occ and plugin not in PRE_PLUGINS: continue
+            item = self.top(plugin)
+            if item and (best is None or item < best[0]):
+                best = item, plugin
+
+        if best:
+            id = best[0][2]
+            heappop(self.heaps[best[1]])
+            self.packages[self.entries.pop(id)[3]][2].discard(id)
+            return id
+
+    def __len__(self):
+        return len(self.entries)
+
 
 class FileHandler:
     """Handles all request made to obtain information,
@@ -44,11 +295,14 @@ class FileHandler:
         # translations
         self.statusMsg = [_("finished"), _("offline"), _("online"), _("queued"), _("skipped"), _("waiting"), _("temp. offline"), _("starting"), _("failed"), _("aborted"), _("decrypting"), _("custom"), _("downloading"), _("processing"), _("unknown")]
 
-        self.cache = {} #holds instances for files
-        self.packageCache = {}  # same for packages
-        #@TODO: purge the cache
+        size = self.core.config["general"]["cache_size"]
+        self.cache = LRUCache(size, self.evictFile) #holds instances for files
+        self.packageCache = LRUCache(size, self.evictPackage)  # same for packages
+        self.hits = 0
+        self.misses = 0
 
         self.jobCache = {}
+        self.readyQueue = ReadyQueue() # links that can be downloaded, loaded on demand
 
         self.lock = RLock()  #@TODO should be a Lock w/o R
         #self.lock._Verbose__verbose = True
@@ -65,7 +319,9 @@ class FileHandler:
             args[0].filecount = -1
             args[0].queuecount = -1
             args[0].jobCache = {}
-            return func(*args)
+            res = func(*args)
+            args[0].core.scheduler.wakeup() #there may be new jobs
+            return res
         return new
 
     #----------------------------------------------------------------------
@@ -76,13 +332,8 @@ class FileHandler:
     #----------------------------------------------------------------------
     def syncSave(self):
         """saves all data to backend and waits until all data are written"""
-        pyfiles = self.cache.values()
-        for pyfile in pyfiles:
-            pyfile.sync()
-
-        pypacks = self.packageCache.values()
-        for pypack in pypacks:
-            pypack.sync()
+        self.db.updateLinks(self.cache.values())
+        self.db.updatePackages(self.packageCache.values())
 
         self.db.syncSave()
 
@@ -126,6 +377,7 @@ class FileHandler:
         data = self.core.pluginManager.parseUrls(urls)
 
         self.db.addLinks(data, package)
+        self.loadReady(package)
         self.core.threadManager.createInfoThread(data, package)
 
         #@TODO change from reloadAll event to package update event
@@ -150,7 +402,7 @@ class FileHandler:
 
         p = self.getPackage(id)
         if not p:
-            if id in self.packageCache: del self.packageCache[id]
+            self.packageCache.pop(id, None)
             return
 
         oldorder = p.order
@@ -166,11 +418,12 @@ class FileHandler:
                 pyfile.release()
 
         self.db.deletePackage(p)
+        self.readyQueue.removePackage(id)
+        self.readyQueue.shift(queue, oldorder + 1, None, -1)
         self.core.pullManager.addEvent(e)
         self.core.hookManager.dispatchEvent("packageDeleted", id)
 
-        if id in self.packageCache:
-            del self.packageCache[id]
+        self.packageCache.pop(id, None)
 
         packs = self.packageCache.values()
         for pack in packs:
@@ -194,12 +447,12 @@ class FileHandler:
         oldorder = f.order
 
         if id in self.core.threadManager.processingIds():
-            self.cache[id].abortDownload()
+            f.abortDownload()
 
-        if id in self.cache:
-            del self.cache[id]
+        self.cache.pop(id, None)
 
         self.db.deleteLink(f)
+        self.readyQueue.remove(id)
 
         self.core.pullManager.addEvent(e)
 
@@ -216,38 +469,90 @@ class FileHandler:
     #----------------------------------------------------------------------
     def releaseLink(self, id):
         """removes pyfile from cache"""
-        if id in self.cache:
-            del self.cache[id]
+        self.cache.pop(id, None)
 
     #----------------------------------------------------------------------
     def releasePackage(self, id):
         """removes package from cache"""
-        if id in self.packageCache:
-            del self.packageCache[id]
+        self.packageCache.pop(id, None)
 
     #----------------------------------------------------------------------
     def updateLink(self, pyfile):
         """updates link"""
         self.db.updateLink(pyfile)
 
-        e = UpdateEvent("file", pyfile.id, "collector" if not pyfile.package().queue else "queue")
+        pack = pyfile.package()
+        if self.updateReady(pyfile, pack):
+            self.core.scheduler.wakeup()
+
+        e = UpdateEvent("file", pyfile.id, "collector" if not pack.queue else "queue")
         self.core.pullManager.addEvent(e)
 
+    def updateReady(self, pyfile, pack):
+        """ adds or removes link from ready queue according to its status, returns True when it was added """
+        if not self.readyQueue.valid: return False
+
+        if pyfile.status in READY_STATUS and (pack.queue or pyfile.pluginname in PRE_PLUGINS):
+            if not self.readyQueue.hasPackage(pack.id):
+                #order of the cached package may differ from the database
+                self.loadReady(pack.id)
+                return self.readyQueue.hasPackage(pack.id)
+            return self.readyQueue.add(pyfile.id, pyfile.pluginname, pack.id, pack.queue, pack.order, pyfile.order)
+        else:
+            self.readyQueue.remove(pyfile.id)
+            return False
+
+    def loadReady(self, package):
+        """ replaces the links of a package in the ready queue with the ones from the database """
+        if not self.readyQueue.valid: return
+
+        data = self.db.getPackageJobs(package, PRE_PLUGINS)
+        if data:
+            self.readyQueue.setPackage(package, *data)
+        else:
+            self.readyQueue.removePackage(package)
+
     #----------------------------------------------------------------------
     def updatePackage(self, pypack):
         """updates a package"""
         self.db.updatePackage(pypack)
+        # only when queue or order changed
+        if self.readyQueue.valid and not self.readyQueue.updatePackage(pypack.id, pypack.queue, pypack.order):
+            self.loadReady(pypack.id)
 
         e = UpdateEvent("pack", pypack.id, "collector" if not pypack.queue else "queue")
         self.core.pullManager.addEvent(e)
 
+    #----------------------------------------------------------------------
+    def evictFile(self, pyfile):
+        """ writes back idle file so it can be removed from cache, returns False if it is in use """
+        if getattr(pyfile, "plugin", None) or pyfile.status in ACTIVE_STATUS:
+            return False
+
+        self.db.updateLink(pyfile)
+        return True
+
+    def evictPackage(self, pypack):
+        """ same as evictFile for packages """
+        if pypack.setFinished:
+            return False
+
+        self.db.updatePackages([pypack])
+        return True
+
+    def getCacheStats(self):
+        return {"files": len(self.cache), "packages": len(self.packageCache), "hits": self.hits,
+                "misses": self.misses, "evicted": self.cache.evicted + self.packageCache.evicted}
+
     #----------------------------------------------------------------------
     def getPackage(self, id):
         """return package instance"""
-
-        if id in self.packageCache:
-            return self.packageCache[id]
+        pack = self.packageCache.get(id)
+        if pack:
+            self.hits += 1
+            return pack
         else:
+            self.misses += 1
             return self.db.getPackage(id)
 
     #----------------------------------------------------------------------
@@ -277,62 +582,47 @@ class FileHandler:
     #----------------------------------------------------------------------
     def getFileData(self, id):
         """returns dict with file information"""
-        if id in self.cache:
-            return self.cache[id].toDbDict()
+        pyfile = self.cache.get(id)
+        if pyfile:
+            return pyfile.toDbDict()
 
         return self.db.getLinkData(id)
 
     #----------------------------------------------------------------------
     def getFile(self, id):
         """returns pyfile instance"""
-        if id in self.cache:
-            return self.cache[id]
+        pyfile = self.cache.get(id)
+        if pyfile:
+            self.hits += 1
+            return pyfile
         else:
+            self.misses += 1
             return self.db.getFile(id)
 
     #----------------------------------------------------------------------
     @lock
     def getJob(self, occ):
-        """get suitable job"""
-
-        #@TODO clean mess
-        #@TODO improve selection of valid jobs
-
-        if occ in self.jobCache:
-            if self.jobCache[occ]:
-                id = self.jobCache[occ].pop()
-                if id == "empty":
-                    pyfile = None
-                    self.jobCache[occ].append("empty")
-                else:
-                    pyfile = self.getFile(id)
-            else:
-                jobs = self.db.getJob(occ)
-                jobs.reverse()
-                if not jobs:
-                    self.jobCache[occ].append("empty")
-                    pyfile = None
-                else:
-                    self.jobCache[occ].extend(jobs)
-                    pyfile = self.getFile(self.jobCache[occ].pop())
+        """get suitable job, occ are plugins that can not be used"""
 
-        else:
-            self.jobCache = {} #better not caching to much
-            jobs = self.db.getJob(occ)
-            jobs.reverse()
-            self.jobCache[occ] = jobs
-
-            if not jobs:
-                self.jobCache[occ].append("empty")
-                pyfile = None
-            else:
-                pyfile = self.getFile(self.jobCache[occ].pop())
+        if not self.readyQueue.valid:
+            self.readyQueue.clear()
+            self.readyQueue.load(self.db.getJobs(PRE_PLUGINS))
+
+        processing = self.core.threadManager.processingIds()
 
-            #@TODO: maybe the new job has to be approved...
+        while True:
+            id = self.readyQueue.pop(occ)
+            if id is None: return None
+            # links get added again on status change, but may still be in a thread
+            if id in processing: continue
 
+            pyfile = self.getFile(id)
+            if pyfile and pyfile.status in READY_STATUS: return pyfile
 
-        #pyfile = self.getFile(self.jobCache[occ].pop())
-        return pyfile
+    @lock
+    def putJob(self, pyfile):
+        """ puts a job from getJob back, when it could not be started """
+        self.updateReady(pyfile, pyfile.package())
 
     @lock
     def getDecryptJob(self):
@@ -341,7 +631,6 @@ class FileHandler:
             return None
 
         plugins = self.core.pluginManager.crypterPlugins.keys() + self.core.pluginManager.containerPlugins.keys()
-        plugins = str(tuple(plugins))
 
         jobs = self.db.getPluginJob(plugins)
         if jobs:
@@ -401,9 +690,11 @@ class FileHandler:
                 self.restartFile(pyfile.id)
 
         self.db.restartPackage(id)
+        self.loadReady(id)
 
-        if id in self.packageCache:
-            self.packageCache[id].setFinished = False
+        pack = self.packageCache.get(id)
+        if pack:
+            pack.setFinished = False
 
         e = UpdateEvent("pack", id, "collector" if not self.getPackage(id).queue else "queue")
         self.core.pullManager.addEvent(e)
@@ -412,16 +703,21 @@ class FileHandler:
     @change
     def restartFile(self, id):
         """ restart file"""
-        if id in self.cache:
-            self.cache[id].status = 3
-            self.cache[id].name = self.cache[id].url
-            self.cache[id].error = ""
-            self.cache[id].abortDownload()
+        pyfile = self.cache.get(id)
+        if pyfile:
+            pyfile.status = 3
+            pyfile.name = pyfile.url
+            pyfile.error = ""
+            pyfile.abortDownload()
 
 
         self.db.restartFile(id)
 
-        e = UpdateEvent("file", id, "collector" if not self.getFile(id).package().queue else "queue")
+        pyfile = self.getFile(id)
+        pack = pyfile.package()
+        self.updateReady(pyfile, pack)
+
+        e = UpdateEvent("file", id, "collector" if not pack.queue else "queue")
         self.core.pullManager.addEvent(e)
 
     @lock
@@ -431,18 +727,22 @@ class FileHandler:
 
         p = self.db.getPackage(id)
         oldorder = p.order
+        oldqueue = p.queue
 
         e = RemoveEvent("pack", id, "collector" if not p.queue else "queue")
         self.core.pullManager.addEvent(e)
         
         self.db.clearPackageOrder(p)
 
+        self.releasePackage(id) # the cached instance has the old order
         p = self.db.getPackage(id)
 
         p.queue = queue
         self.db.updatePackage(p)
 
         self.db.reorderPackage(p, -1, True)
+        self.readyQueue.shift(oldqueue, oldorder + 1, None, -1, id)
+        self.loadReady(id)
         
         packs = self.packageCache.values()
         for pack in packs:
@@ -465,6 +765,12 @@ class FileHandler:
         e = RemoveEvent("pack", id, "collector" if not p.queue else "queue")
         self.core.pullManager.addEvent(e)
         self.db.reorderPackage(p, position)
+        if p.order > position:
+            self.readyQueue.shift(p.queue, position, p.order - 1, 1, id)
+        elif p.order < position:
+            self.readyQueue.shift(p.queue, p.order + 1, position, -1, id)
+        if not self.readyQueue.updatePackage(id, p.queue, position):
+            self.loadReady(id)
 
         packs = self.packageCache.values()
         for pack in packs:
@@ -494,6 +800,7 @@ class FileHandler:
         self.core.pullManager.addEvent(e)
 
         self.db.reorderLink(f, position)
+        self.readyQueue.reorderLink(f["package"], id, f["order"], position)
 
         pyfiles = self.cache.values()
         for pyfile in pyfiles:
@@ -507,8 +814,9 @@ class FileHandler:
                     pyfile.order -= 1
                     pyfile.notifyChange()
 
-        if id in self.cache:
-            self.cache[id].order = position
+        pyfile = self.cache.get(id)
+        if pyfile:
+            pyfile.order = position
 
         self.db.commit()
 
@@ -518,7 +826,13 @@ class FileHandler:
     @change
     def updateFileInfo(self, data, pid):
         """ updates file info (name, size, status, url)"""
-        ids = self.db.updateLinkInfo(data)
+        for id, status, plugin, package, queue, packageorder, linkorder in self.db.updateLinkInfo(data):
+            if not self.readyQueue.valid: break
+            if status in READY_STATUS and (queue or plugin in PRE_PLUGINS):
+                self.readyQueue.add(id, plugin, package, queue, packageorder, linkorder)
+            else:
+                self.readyQueue.remove(id)
+
         e = UpdateEvent("pack", pid, "collector" if not self.getPackage(pid).queue else "queue")
         self.core.pullManager.addEvent(e)
 
@@ -571,7 +885,10 @@ class FileHandler:
     @change
     def restartFailed(self):
         """ restart all failed links """
-        self.db.restartFailed()
+        for id, plugin, package, queue, packageorder, linkorder in self.db.restartFailed():
+            if not self.readyQueue.valid: break
+            if queue or plugin in PRE_PLUGINS:
+                self.readyQueue.add(id, plugin, package, queue, packageorder, linkorder)
 
 class FileMethods():
     @style.queue
@@ -692,8 +1009,8 @@ class FileMethods():
         }
         """
         self.c.execute('SELECT p.id, p.name, p.folder, p.site, p.password, p.queue, p.packageorder, s.sizetotal, s.sizedone, s.linksdone, s.linkstotal \
-            FROM packages p JOIN pstats s ON p.id = s.id \
-            WHERE p.queue=? ORDER BY p.packageorder', str(q))
+            FROM packages p JOIN package_stats s ON p.id = s.package \
+            WHERE p.queue=? AND s.linkstotal > 0 ORDER BY p.packageorder', str(q))
 
         data = {}
         for r in self.c:
@@ -766,19 +1083,32 @@ class FileMethods():
     def updateLink(self, f):
         self.c.execute('UPDATE links SET url=?,name=?,size=?,status=?,error=?,package=? WHERE id=?', (f.url, f.name, f.size, f.status, f.error, str(f.packageid), str(f.id)))
 
+    @style.async
+    def updateLinks(self, files):
+        """ updates many links in one statement """
+        self.c.executemany('UPDATE links SET url=?,name=?,size=?,status=?,error=?,package=? WHERE id=?',
+                           [(f.url, f.name, f.size, f.status, f.error, str(f.packageid), str(f.id)) for f in files])
+
     @style.queue
     def updatePackage(self, p):
         self.c.execute('UPDATE packages SET name=?,folder=?,site=?,password=?,queue=? WHERE id=?', (p.name, p.folder, p.site, p.password, p.queue, str(p.id)))
+
+    @style.async
+    def updatePackages(self, packs):
+        self.c.executemany('UPDATE packages SET name=?,folder=?,site=?,password=?,queue=? WHERE id=?',
+                           [(p.name, p.folder, p.site, p.password, p.queue, str(p.id)) for p in packs])
         
     @style.queue    
     def updateLinkInfo(self, data):
-        """ data is list of tupels (name, size, status, url) """
+        """ data is list of tupels (name, size, status, url),
+        returns (id, status, plugin, package, queue, packageorder, linkorder) of the links """
         self.c.executemany('UPDATE links SET name=?, size=?, status=? WHERE url=? AND status IN (1,2,3,14)', data)
-        ids = []
-        self.c.execute('SELECT id FROM links WHERE url IN (\'%s\')' % "','".join([x[3] for x in data]))
-        for r in self.c:
-            ids.append(int(r[0]))
-        return ids
+        links = []
+        for i in range(0, len(data), 500): # limit of sql variables
+            urls = [x[3] for x in data[i:i + 500]]
+            self.c.execute('SELECT l.id, l.status, l.plugin, l.package, p.queue, p.packageorder, l.linkorder FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE l.url IN (%s)' % ",".join("?" * len(urls)), urls)
+            links.extend(self.c)
+        return links
         
     @style.queue
     def reorderPackage(self, p, position, noMove=False):
@@ -819,6 +1149,8 @@ class FileMethods():
     @style.queue
     def getPackage(self, id):
         """return package instance from id"""
+        pack = self.manager.packageCache.get(int(id))
+        if pack: return pack #loaded meanwhile or evicted but still in use
         self.c.execute("SELECT name,folder,site,password,queue,packageorder FROM packages WHERE id=?", (str(id), ))
         r = self.c.fetchone()
         if not r: return None
@@ -828,6 +1160,8 @@ class FileMethods():
     @style.queue
     def getFile(self, id):
         """return link instance from id"""
+        pyfile = self.manager.cache.get(int(id))
+        if pyfile: return pyfile #loaded meanwhile or evicted but still in use
         self.c.execute("SELECT url, name, size, status, error, plugin, package, linkorder FROM links WHERE id=?", (str(id), ))
         r = self.c.fetchone()
         if not r: return None
@@ -835,32 +1169,26 @@ class FileMethods():
 
 
     @style.queue
-    def getJob(self, occ):
-        """return pyfile ids, which are suitable for download and dont use a occupied plugin"""
-
-        #@TODO improve this hardcoded method
-        pre = "('DLC', 'LinkList', 'SerienjunkiesOrg', 'CCF', 'RSDF')"  #plugins which are processed in collector
-
-        cmd = "("
-        for i, item in enumerate(occ):
-            if i: cmd += ", "
-            cmd += "'%s'" % item
-        
-        cmd += ")"
+    def getJobs(self, pre):
+        """returns (id, plugin, package, queue, packageorder, linkorder) of all links suitable for download,
+        pre are plugins which are also processed in collector"""
+        self.c.execute("SELECT l.id, l.plugin, l.package, p.queue, p.packageorder, l.linkorder FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE (p.queue=1 OR l.plugin IN (%s)) AND l.status IN (2,3,14)" % ",".join("?" * len(pre)), pre)
+        return self.c.fetchall()
 
-        cmd = "SELECT l.id FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE ((p.queue=1 AND l.plugin NOT IN %s) OR l.plugin IN %s) AND l.status IN (2,3,14) ORDER BY p.packageorder ASC, l.linkorder ASC LIMIT 5" % (cmd, pre)
-            
-        self.c.execute(cmd) # very bad!
-
-        return [x[0] for x in self.c]
+    @style.queue
+    def getPackageJobs(self, package, pre):
+        """returns (queue, packageorder, list of (id, plugin, linkorder)) of the links of a package
+        suitable for download, None if the package does not exist"""
+        self.c.execute("SELECT queue, packageorder FROM packages WHERE id=?", (str(package), ))
+        r = self.c.fetchone()
+        if not r: return None
+        self.c.execute("SELECT id, plugin, linkorder FROM links WHERE package=? AND status IN (2,3,14) AND (? OR plugin IN (%s))" % ",".join("?" * len(pre)), (str(package), r[0]) + tuple(pre))
+        return r[0], r[1], self.c.fetchall()
 
     @style.queue
     def getPluginJob(self, plugins):
         """returns pyfile ids with suited plugins"""
-        cmd = "SELECT l.id FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE l.plugin IN %s AND l.status IN (2,3,14) ORDER BY p.packageorder ASC, l.linkorder ASC LIMIT 5" % plugins
-
-        self.c.execute(cmd) # very bad!
-
+        self.c.execute("SELECT l.id FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE l.plugin IN (%s) AND l.status IN (2,3,14) ORDER BY p.packageorder ASC, l.linkorder ASC LIMIT 5" % ",".join("?" * len(plugins)), plugins)
         return [x[0] for x in self.c]
 
     @style.queue
@@ -877,7 +1205,11 @@ class FileMethods():
 
     @style.queue
     def restartFailed(self):
+        """returns (id, plugin, package, queue, packageorder, linkorder) of the restarted links"""
+        self.c.execute("SELECT l.id, l.plugin, l.package, p.queue, p.packageorder, l.linkorder FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE l.status IN (6, 8, 9)")
+        links = self.c.fetchall()
         self.c.execute("UPDATE links SET status=3,error='' WHERE status IN (6, 8, 9)")
+        return links
 
     @style.queue
     def findDuplicates(self, id, folder, filename):
@@ -885,6 +1217,18 @@ class FileMethods():
         self.c.execute("SELECT l.plugin FROM links as l INNER JOIN packages as p ON l.package=p.id AND p.folder=? WHERE l.id!=? AND l.status=0 AND l.name=?", (folder, id, filename))
         return self.c.fetchone()
 
+    @style.queue
+    def checkPackageStats(self):
+        """ compares package_stats with values computed from links, returns ids of wrong packages """
+        self.c.execute('SELECT p.id FROM packages p LEFT OUTER JOIN pstats v ON p.id = v.id LEFT OUTER JOIN package_stats s ON p.id = s.package \
+            WHERE IFNULL(v.linkstotal, 0) != IFNULL(s.linkstotal, 0) OR IFNULL(v.sizetotal, 0) != IFNULL(s.sizetotal, 0) \
+            OR IFNULL(v.linksdone, 0) != IFNULL(s.linksdone, 0) OR IFNULL(v.sizedone, 0) != IFNULL(s.sizedone, 0)')
+        return [r[0] for r in self.c]
+
+    @style.queue
+    def rebuildPackageStats(self):
+        self._rebuildPackageStats()
+
     @style.queue
     def purgeLinks(self):
         self.c.execute("DELETE FROM links;")
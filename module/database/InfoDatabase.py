@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 3 of the License,
+    or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+    See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+    @author: RaNaN
+"""
+
+from time import time
+
+from module.database import style
+from module.database import DatabaseBackend
+
+# seconds an online check result is valid, by status
+INFO_TTL = {1: 24 * 3600, # offline
+            2: 3600, # online
+            6: 10 * 60} # temp. offline
+DEFAULT_TTL = 5 * 60
+
+class InfoMethods():
+    @style.queue
+    def getInfoCache(db, urls):
+        """ valid results of online checks, url -> (name, size, status, url) """
+        now = int(time())
+        result = {}
+        for i in range(0, len(urls), 500): # limit of sql variables
+            chunk = list(urls[i:i + 500])
+            db.c.execute('SELECT name, size, status, url FROM info_cache WHERE expires > ? AND url IN (%s)' % ",".join("?" * len(chunk)), [now] + chunk)
+            for r in db.c:
+                result[r[3]] = tuple(r)
+
+        if result:
+            db.c.executemany('UPDATE info_cache SET used=? WHERE url=?', [(now, url) for url in result])
+        return result
+
+    @style.async
+    def setInfoCache(db, data, maxSize):
+        """ stores results of online checks as tuples (name, size, status, url), removes the least recently used
+        entries when there are more than maxSize """
+        now = int(time())
+        db.c.executemany('INSERT OR REPLACE INTO info_cache(url, name, size, status, expires, used) VALUES(?,?,?,?,?,?)',
+                         [(url, name, size, status, now + INFO_TTL.get(status, DEFAULT_TTL), now) for
+                          name, size, status, url in data])
+
+        db.c.execute('SELECT count(*) FROM info_cache')
+        if db.c.fetchone()[0] > maxSize:
+            db.c.execute('DELETE FROM info_cache WHERE expires <= ?', (now, ))
+            db.c.execute('SELECT count(*) FROM info_cache')
+            count = db.c.fetchone()[0]
+            if count > maxSize:
+                # 10% headroom, so this is not done for every result
+                db.c.execute('DELETE FROM info_cache WHERE url IN (SELECT url FROM info_cache ORDER BY used LIMIT ?)',
+                             (count - int(maxSize * 0.9), ))
+
+    @style.queue
+    def getInfoCacheSize(db):
+        db.c.execute('SELECT count(*) FROM info_cache')
+        return db.c.fetchone()[0]
+
+DatabaseBackend.registerSub(InfoMethods)
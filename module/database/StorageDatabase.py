@@ -22,6 +22,18 @@ from module.database import DatabaseBackend
 class StorageMethods():
     @style.queue
     def setStorage(db, identifier, key, value):
+        db._setStorage(identifier, key, value)
+
+    @style.async
+    def saveStorage(db, identifier, key, value):
+        """ sets or with value None deletes the value, without waiting for the database """
+        if value is None:
+            db.c.execute("DELETE FROM storage WHERE identifier=? AND key=?", (identifier, key))
+        else:
+            db._setStorage(identifier, key, value)
+
+    @style.inner
+    def _setStorage(db, identifier, key, value):
         db.c.execute("SELECT id FROM storage WHERE identifier=? AND key=?", (identifier, key))
         if db.c.fetchone() is not None:
             db.c.execute("UPDATE storage SET value=? WHERE identifier=? AND key=?", (value, identifier, key))
@@ -3,4 +3,5 @@ from DatabaseBackend import style
 
 from FileDatabase import FileHandler
 from UserDatabase import UserMethods
-from StorageDatabase import StorageMethods
\ No newline at end of file
+from StorageDatabase import StorageMethods
+from InfoDatabase import InfoMethods
\ No newline at end of file
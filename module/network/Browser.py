@@ -8,16 +8,19 @@ from HTTPDownload import HTTPDownload
 
 
 class Browser(object):
-    __slots__ = ("log", "options", "bucket", "cj", "_size", "http", "dl")
+    __slots__ = ("log", "options", "bucket", "reactor", "pool", "cj", "_size", "http", "dl", "checksums")
 
-    def __init__(self, bucket=None, options={}):
+    def __init__(self, bucket=None, options={}, reactor=None, pool=None):
         self.log = getLogger("log")
 
         self.options = options #holds pycurl options
         self.bucket = bucket
+        self.reactor = reactor
+        self.pool = pool
 
         self.cj = None # needs to be setted later
         self._size = 0
+        self.checksums = {} # computed while the last file was downloaded
 
         self.renewHTTPRequest()
         self.dl = None
@@ -25,7 +28,7 @@ class Browser(object):
 
     def renewHTTPRequest(self):
         if hasattr(self, "http"): self.http.close()
-        self.http = HTTPRequest(self.cj, self.options)
+        self.http = HTTPRequest(self.cj, self.options, self.reactor, self.pool)
 
     def setLastURL(self, val):
         self.http.lastURL = val
@@ -65,6 +68,14 @@ class Browser(object):
         if not self.size: return 0
         return (self.arrived * 100) / self.size
 
+    def setSpeedLimit(self, rate):
+        """ limits the downloads of this browser, in addition to plugin and global limits
+
+        :param rate: kb/s, -1 for no limit
+        """
+        if self.bucket is not None:
+            self.bucket.setRate(rate * 1024)
+
     def clearCookies(self):
         if self.cj:
             self.cj.clear()
@@ -80,13 +91,16 @@ class Browser(object):
             self.dl.abort = True
 
     def httpDownload(self, url, filename, get={}, post={}, ref=True, cookies=True, chunks=1, resume=False,
-                     progressNotify=None, disposition=False):
-        """ this can also download ftp """
+                     progressNotify=None, disposition=False, checksums=()):
+        """ this can also download ftp, checksums are algorithms that will be computed while downloading """
         self._size = 0
+        self.checksums = {}
         self.dl = HTTPDownload(url, filename, get, post, self.lastEffectiveURL if ref else None,
-            self.cj if cookies else None, self.bucket, self.options, progressNotify, disposition)
+            self.cj if cookies else None, self.bucket, self.options, progressNotify, disposition, self.reactor, self.pool,
+            checksums)
         name = self.dl.download(chunks, resume)
         self._size = self.dl.size
+        self.checksums = self.dl.checksums
 
         self.dl = None
 
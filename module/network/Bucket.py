@@ -21,14 +21,27 @@ from time import time
 from threading import Lock
 
 class Bucket:
-    def __init__(self):
+    """ token bucket, buckets with a parent also take the tokens of their parent,
+    so a download can be limited on its own, by its plugin and by the global limit """
+
+    def __init__(self, parent=None):
         self.rate = 0
         self.tokens = 0
         self.timestamp = time()
         self.lock = Lock()
+        self.parent = parent
 
     def __nonzero__(self):
-        return False if self.rate < 10240 else True
+        """ False if neither this bucket nor a parent limits the rate, consumed() has nothing to do then """
+        bucket = self
+        while bucket is not None:
+            if bucket.isLimited(): return True
+            bucket = bucket.parent
+        return False
+
+    def isLimited(self):
+        """ min. 10kb, may become unresponsive otherwise """
+        return self.rate >= 10240
 
     def setRate(self, rate):
         self.lock.acquire()
@@ -36,21 +49,19 @@ class Bucket:
         self.lock.release()
 
     def consumed(self, amount):
-        """ return time the process have to sleep, after consumed specified amount """
-        if self.rate < 10240: return 0 #min. 10kb, may become unresponsive otherwise
+        """ return time the transfer has to be paused, after consumed specified amount """
+        wait = self.parent.consumed(amount) if self.parent is not None else 0
+        if not self.isLimited(): return wait
         self.lock.acquire()
 
         self.calc_tokens()
         self.tokens -= amount
 
         if self.tokens < 0:
-            time = -self.tokens/float(self.rate)
-        else:
-            time = 0
-        
+            wait = max(wait, -self.tokens/float(self.rate))
 
         self.lock.release()
-        return time
+        return wait
 
     def calc_tokens(self):
         if self.tokens < self.rate:
@@ -58,4 +69,3 @@ class Bucket:
             delta = self.rate * (now - self.timestamp)
             self.tokens = min(self.rate, self.tokens + delta)
             self.timestamp = now
-
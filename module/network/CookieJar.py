@@ -17,34 +17,160 @@
     @author: mkaay, RaNaN
 """
 
+from threading import Lock
 from time import time
 
+from module.common.json_layer import json_dumps, json_loads
+
+
+def cookieKey(line):
+    """ (domain, path, name) of a netscape cookie line, the HttpOnly mark is no part of the domain """
+    fields = line.split("\t")
+    domain = fields[0]
+    if domain.startswith("#HttpOnly_"):
+        domain = domain[10:]
+    return domain, fields[2], fields[5]
+
+
+def isExpired(line, now):
+    """ session cookies (expiry 0) are kept """
+    try:
+        exp = int(float(line.split("\t")[4]))
+    except (IndexError, ValueError):
+        return False
+    return 0 < exp < now
+
+
 class CookieJar():
-    def __init__(self, pluginname, account=None):
-        self.cookies = {}
+    """ cookies of a plugin or an account, keyed by (domain, path, name).
+    Jars with a database keep the session of an account in the storage table: loaded on first use
+    and written back by `save`, when something changed. """
+
+    def __init__(self, pluginname, account=None, db=None):
+        self.cookies = {} # (domain, path, name) -> cookie line
         self.plugin = pluginname
         self.account = account
 
+        self.lock = Lock()
+        self.db = db
+        self.loaded = db is None
+        self.dirty = False
+        #: time of the login the cookies belong to, 0 if unknown
+        self.loginTime = 0
+
+    def load(self):
+        """ loads the saved session, needs the lock """
+        if self.loaded: return
+        self.loaded = True
+
+        data = self.db.getStorage("cookies:%s" % self.plugin, self.account)
+        if not data: return
+
+        try:
+            data = json_loads(data)
+            self.loginTime = data["login"]
+            for line in data["cookies"]:
+                line = str(line)
+                self.cookies.setdefault(cookieKey(line), line) #not overwrite cookies set meanwhile
+        except Exception:
+            pass #saved by another version, login again
+
+    def save(self):
+        """ writes the session to the database if it was changed, without waiting for it """
+        self.lock.acquire()
+        try:
+            if not self.dirty: return
+            self.dirty = False
+
+            now = time()
+            cookies = [x for x in self.cookies.itervalues() if not isExpired(x, now)]
+            if cookies or self.loginTime:
+                value = json_dumps({"login": self.loginTime, "cookies": cookies})
+            else:
+                value = None
+        finally:
+            self.lock.release()
+
+        self.db.saveStorage("cookies:%s" % self.plugin, self.account, value)
+
+    def changed(self):
+        """ needs the lock """
+        if self.db is not None:
+            self.dirty = True
+
     def addCookies(self, clist):
-        for c in clist:
-            name = c.split("\t")[5]
-            self.cookies[name] = c
+        now = time()
+        self.lock.acquire()
+        try:
+            self.load()
+            for c in clist:
+                key = cookieKey(c)
+                if isExpired(c, now):
+                    if self.cookies.pop(key, None) is not None:
+                        self.changed()
+                elif self.cookies.get(key) != c:
+                    self.cookies[key] = c
+                    self.changed()
+        finally:
+            self.lock.release()
 
     def getCookies(self):
-        return self.cookies.values()
+        now = time()
+        self.lock.acquire()
+        try:
+            self.load()
+            return [x for x in self.cookies.itervalues() if not isExpired(x, now)]
+        finally:
+            self.lock.release()
 
-    def parseCookie(self, name):
-        if name in self.cookies:
-            return self.cookies[name].split("\t")[6]
+    def parseCookie(self, name, domain=None):
+        """ value of the cookie, the one of domain or its closest parent domain if given """
+        found = None
+        for line in self.getCookies():
+            d, path, n = cookieKey(line)
+            if n != name: continue
+
+            if domain is not None:
+                d = d.lstrip(".")
+                if domain != d and not domain.endswith("." + d): continue
+                if found and len(cookieKey(found)[0].lstrip(".")) >= len(d): continue
+            found = line
+
+        if found:
+            return found.split("\t")[6]
         else:
             return None
 
-    def getCookie(self, name):
-        return self.parseCookie(name)
+    def getCookie(self, name, domain=None):
+        return self.parseCookie(name, domain)
+
+    def setCookie(self, domain, name, value, path="/", exp=None):
+        if exp is None:
+            exp = int(time()) + 3600 * 24 * 180
+        self.addCookies([".%s	TRUE	%s	FALSE	%s	%s	%s" % (domain, path, exp, name, value)])
+
+    def setLoginTime(self, t):
+        self.lock.acquire()
+        self.loginTime = t
+        self.changed()
+        self.lock.release()
+
+    def hasSession(self, timeout):
+        """ True if the saved login is younger than timeout (sec) and some of its cookies are left """
+        return time() < self.getLoginTime() + timeout and bool(self.getCookies())
 
-    def setCookie(self, domain, name, value, path="/", exp=time()+3600*24*180):
-        s = ".%s	TRUE	%s	FALSE	%s	%s	%s" % (domain, path, exp, name, value)
-        self.cookies[name] = s
+    def getLoginTime(self):
+        self.lock.acquire()
+        try:
+            self.load()
+            return self.loginTime
+        finally:
+            self.lock.release()
 
     def clear(self):
+        self.lock.acquire()
+        self.loaded = True #saved cookies are deleted too
         self.cookies = {}
+        self.loginTime = 0
+        self.changed()
+        self.lock.release()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 3 of the License,
+    or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+    See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+    @author: RaNaN
+"""
+
+from threading import Lock
+from time import time
+from urlparse import urlparse
+
+import pycurl
+
+
+class CurlPool():
+    """ keeps closed curl handles, so their open connections can be used again by the next request.
+    All handles share dns cache and ssl sessions. """
+
+    def __init__(self, maxSize=16, timeout=60):
+        self.maxSize = maxSize # max idle handles
+        self.timeout = timeout # seconds until an idle handle is closed
+
+        self.share = pycurl.CurlShare()
+        self.share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS)
+        self.share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION)
+        if hasattr(pycurl, "LOCK_DATA_CONNECT"): #libcurl >= 7.57
+            self.share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_CONNECT)
+
+        self.idle = {} # key -> list of [time, host, curl]
+        self.size = 0
+        self.lock = Lock()
+
+        self.created = 0
+        self.reused = 0
+
+    def getKey(self, options):
+        """ connections can only be used again with same interface and proxy """
+        proxy = options.get("proxies") or {}
+        return (options.get("interface"), options.get("ipv6"), proxy.get("type"), proxy.get("address"),
+                proxy.get("port"), proxy.get("username"))
+
+    def get(self, options, url=None):
+        """ returns a fresh curl handle, preferring one that was last connected to the host of url """
+        key = self.getKey(options)
+        host = urlparse(url).netloc if url else None
+
+        self.lock.acquire()
+        try:
+            self.evict()
+            handles = self.idle.get(key)
+            if handles:
+                for i in range(len(handles) - 1, -1, -1):
+                    if handles[i][1] == host: break
+                # when no handle matches the host the most recent one is taken
+                entry = handles.pop(i)
+                if not handles: del self.idle[key]
+                self.size -= 1
+                self.reused += 1
+                return entry[2]
+
+            self.created += 1
+        finally:
+            self.lock.release()
+
+        c = pycurl.Curl()
+        c.setopt(pycurl.SHARE, self.share)
+        return c
+
+    def put(self, c, options):
+        """ takes back a handle, it must not be used by a transfer anymore """
+        try:
+            host = urlparse(c.getinfo(pycurl.EFFECTIVE_URL) or "").netloc
+            c.setopt(pycurl.COOKIELIST, "ALL") #cookies are not cleared by reset
+            c.reset() #keeps the share
+        except pycurl.error:
+            c.close()
+            return
+
+        key = self.getKey(options)
+
+        self.lock.acquire()
+        try:
+            self.idle.setdefault(key, []).append([time(), host, c])
+            self.size += 1
+            self.evict()
+        finally:
+            self.lock.release()
+
+    def evict(self):
+        """ closes timed out handles and the oldest ones when the pool is full, needs the lock """
+        limit = time() - self.timeout
+        for key, handles in self.idle.items():
+            while handles and handles[0][0] < limit:
+                handles.pop(0)[2].close()
+                self.size -= 1
+            if not handles: del self.idle[key]
+
+        while self.size > self.maxSize:
+            key = min(self.idle, key=lambda k: self.idle[k][0][0])
+            self.idle[key].pop(0)[2].close()
+            self.size -= 1
+            if not self.idle[key]: del self.idle[key]
+
+    def getStats(self):
+        return {"idle": self.size, "created": self.created, "reused": self.reused}
+
+    def clear(self):
+        """ closes all idle handles """
+        self.lock.acquire()
+        for handles in self.idle.itervalues():
+            for entry in handles:
+                entry[2].close()
+        self.idle = {}
+        self.size = 0
+        self.lock.release()
@@ -18,7 +18,6 @@
 """
 from os import remove, stat, fsync
 from os.path import exists
-from time import sleep
 from re import search
 from module.utils import fs_encode
 import codecs
@@ -35,6 +34,7 @@ class ChunkInfo():
         self.name = unicode(name)
         self.size = 0
         self.resume = False
+        self.inplace = False #all chunks are written into one preallocated file
         self.chunks = []
 
     def __repr__(self):
@@ -47,8 +47,8 @@ class ChunkInfo():
     def setSize(self, size):
         self.size = int(size)
 
-    def addChunk(self, name, range):
-        self.chunks.append((name, range))
+    def addChunk(self, name, range, arrived=0):
+        self.chunks.append([name, range, arrived])
 
     def clear(self):
         self.chunks = []
@@ -60,7 +60,10 @@ class ChunkInfo():
         current = 0
         for i in range(chunks):
             end = self.size - 1 if (i == chunks - 1) else current + chunk_size
-            self.addChunk("%s.chunk%s" % (self.name, i), (current, end))
+            if self.inplace:
+                self.addChunk("%s.chunk0" % self.name, (current, end))
+            else:
+                self.addChunk("%s.chunk%s" % (self.name, i), (current, end))
             current += chunk_size + 1
 
 
@@ -69,10 +72,14 @@ class ChunkInfo():
         fh = codecs.open(fs_name, "w", "utf_8")
         fh.write("name:%s\n" % self.name)
         fh.write("size:%s\n" % self.size)
+        if self.inplace:
+            fh.write("mode:inplace\n")
         for i, c in enumerate(self.chunks):
             fh.write("#%d:\n" % i)
             fh.write("\tname:%s\n" % c[0])
             fh.write("\trange:%i-%i\n" % c[1])
+            if self.inplace:
+                fh.write("\tarrived:%i\n" % c[2])
         fh.close()
 
     @staticmethod
@@ -92,19 +99,31 @@ class ChunkInfo():
         ci = ChunkInfo(name)
         ci.loaded = True
         ci.setSize(size)
-        while True:
-            if not fh.readline(): #skip line
-                break
-            name = fh.readline()[1:-1]
-            range = fh.readline()[1:-1]
-            if name.startswith("name:") and range.startswith("range:"):
-                name = name[5:]
-                range = range[6:].split("-")
-            else:
-                raise WrongFormat()
 
-            ci.addChunk(name, (long(range[0]), long(range[1])))
+        chunk = None
+        for line in fh:
+            line = line.rstrip("\r\n")
+            if line == "mode:inplace":
+                ci.inplace = True
+            elif line.startswith("#"):
+                chunk = ["", None, 0]
+                ci.chunks.append(chunk)
+            elif chunk and line.startswith("\tname:"):
+                chunk[0] = line[6:]
+            elif chunk and line.startswith("\trange:"):
+                range = line[7:].split("-")
+                chunk[1] = (long(range[0]), long(range[1]))
+            elif chunk and line.startswith("\tarrived:"):
+                chunk[2] = long(line[9:])
+            elif line:
+                fh.close()
+                raise WrongFormat()
         fh.close()
+
+        for c in ci.chunks:
+            if not c[0] or c[1] is None:
+                raise WrongFormat()
+
         return ci
 
     def remove(self):
@@ -120,6 +139,15 @@ class ChunkInfo():
     def getChunkRange(self, index):
         return self.chunks[index][1]
 
+    def setChunkRange(self, index, range):
+        self.chunks[index][1] = range
+
+    def getChunkArrived(self, index):
+        return self.chunks[index][2]
+
+    def setChunkArrived(self, index, arrived):
+        self.chunks[index][2] = arrived
+
 
 class HTTPChunk(HTTPRequest):
     def __init__(self, id, parent, range=None, resume=False):
@@ -133,7 +161,7 @@ class HTTPChunk(HTTPRequest):
         self.arrived = 0
         self.lastURL = self.p.referer
 
-        self.c = pycurl.Curl()
+        self.c = self.p.pool.get(self.p.options, self.p.url) if self.p.pool else pycurl.Curl()
 
         self.header = ""
         self.headerParsed = False #indicates if the header has been processed
@@ -147,9 +175,6 @@ class HTTPChunk(HTTPRequest):
 
         self.rep = None
 
-        self.sleep = 0.000
-        self.lastSize = 0
-
     def __repr__(self):
         return "<HTTPChunk id=%d, size=%d, arrived=%d>" % (self.id, self.size, self.arrived)
 
@@ -164,20 +189,30 @@ class HTTPChunk(HTTPRequest):
         self.c.setopt(pycurl.WRITEFUNCTION, self.writeBody)
         self.c.setopt(pycurl.HEADERFUNCTION, self.writeHeader)
 
+        if self.p.bucket is not None and self.p.bucket.parent is not None and self.p.bucket.isLimited():
+            # limit of this download, no connection has to exceed it, curl can enforce that by itself
+            self.c.setopt(pycurl.MAX_RECV_SPEED_LARGE, self.p.bucket.rate)
+
         # request all bytes, since some servers in russia seems to have a defect arihmetic unit
 
         fs_name = fs_encode(self.p.info.getChunkName(self.id))
         if self.resume:
-            self.fp = open(fs_name, "ab")
-            self.arrived = self.fp.tell()
-            if not self.arrived:
-                self.arrived = stat(fs_name).st_size
+            if self.p.info.inplace:
+                # the target file is preallocated, progress is only known from the info file
+                self.fp = open(fs_name, "r+b")
+                self.arrived = self.p.info.getChunkArrived(self.id)
+                self.fp.seek(self.offset())
+            else:
+                self.fp = open(fs_name, "ab")
+                self.arrived = self.fp.tell()
+                if not self.arrived:
+                    self.arrived = stat(fs_name).st_size
 
             if self.range:
                 #do nothing if chunk already finished
                 if self.arrived + self.range[0] >= self.range[1]: return None
 
-                if self.id == len(self.p.info.chunks) - 1: #as last chunk dont set end range, so we get everything
+                if self.range[1] >= self.p.size - 1: #as last chunk dont set end range, so we get everything
                     range = "%i-" % (self.arrived + self.range[0])
                 else:
                     range = "%i-%i" % (self.arrived + self.range[0], min(self.range[1] + 1, self.p.size - 1))
@@ -190,7 +225,7 @@ class HTTPChunk(HTTPRequest):
 
         else:
             if self.range:
-                if self.id == len(self.p.info.chunks) - 1: # see above
+                if self.range[1] >= self.p.size - 1: # see above
                     range = "%i-" % self.range[0]
                 else:
                     range = "%i-%i" % (self.range[0], min(self.range[1] + 1, self.p.size - 1))
@@ -198,7 +233,12 @@ class HTTPChunk(HTTPRequest):
                 self.log.debug("Chunked with range %s" % range)
                 self.c.setopt(pycurl.RANGE, range)
 
-            self.fp = open(fs_name, "wb")
+            if self.p.info.inplace and self.id:
+                # shares the file created by the initial chunk
+                self.fp = open(fs_name, "r+b")
+                self.fp.seek(self.offset())
+            else:
+                self.fp = open(fs_name, "wb")
 
         return self.c
 
@@ -216,34 +256,38 @@ class HTTPChunk(HTTPRequest):
 
         self.headerParsed = True
 
+    def offset(self):
+        """ position in the target file where the next received byte belongs """
+        return (self.range[0] if self.range else 0) + self.arrived
+
     def writeBody(self, buf):
         #ignore BOM, it confuses unrar
+        #not possible when writing in place, it would shift the data of all other chunks
         if not self.BOMChecked:
-            if [ord(b) for b in buf[:3]] == [239, 187, 191]:
+            if not self.p.info.inplace and [ord(b) for b in buf[:3]] == [239, 187, 191]:
                 buf = buf[3:]
             self.BOMChecked = True
 
+        if self.range:
+            #data behind the range is loaded by the following chunk, in place it would overwrite it
+            buf = buf[:max(0, self.size + 1 - self.arrived)]
+
         size = len(buf)
+        offset = self.offset()
 
         self.arrived += size
 
         self.fp.write(buf)
 
-        if self.p.bucket:
-            sleep(self.p.bucket.consumed(size))
-        else:
-            # Avoid small buffers, increasing sleep time slowly if buffer size gets smaller
-            # otherwise reduce sleep time percentual (values are based on tests)
-            # So in general cpu time is saved without reducing bandwith too much
+        if self.p.hash:
+            #after writing, the hash may read the data back from the file
+            self.p.hash.update(self.id, offset, buf)
 
-            if size < self.lastSize:
-                self.sleep += 0.002
-            else:
-                self.sleep *= 0.7
-
-            self.lastSize = size
-
-            sleep(self.sleep)
+        if self.p.bucket:
+            wait = self.p.bucket.consumed(size)
+            if wait:
+                # the connection stays open, but curl stops reading until the tokens are refilled
+                self.p.pauseChunk(self, wait)
 
         if self.range and self.arrived > self.size:
             return 0 #close if we have enough data
@@ -266,6 +310,7 @@ class HTTPChunk(HTTPRequest):
                 self.p.size = int(line.split(":")[1])
 
         self.headerParsed = True
+        self.p.wakeup() #chunks can be created now
 
     def stop(self):
         """The download will not proceed after next call of writeBody"""
@@ -289,5 +334,9 @@ class HTTPChunk(HTTPRequest):
     def close(self):
         """ closes everything, unusable after this """
         if self.fp: self.fp.close()
-        self.c.close()
-        if hasattr(self, "p"): del self.p
\ No newline at end of file
+        if hasattr(self, "p"):
+            if self.p.pool:
+                self.p.pool.put(self.c, self.p.options)
+            else:
+                self.c.close()
+            del self.p
\ No newline at end of file
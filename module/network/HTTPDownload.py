@@ -17,8 +17,8 @@
     @author: RaNaN
 """
 
-from os import remove, fsync
-from os.path import dirname
+from os import remove, fsync, fstat
+from os.path import dirname, getsize
 from time import sleep, time
 from shutil import move
 from logging import getLogger
@@ -27,15 +27,17 @@ import pycurl
 
 from HTTPChunk import ChunkInfo, HTTPChunk
 from HTTPRequest import BadHeader
+from Reactor import ReactorMulti
+from StreamHash import StreamHash
 
 from module.plugins.Plugin import Abort
-from module.utils import save_join, fs_encode
+from module.utils import save_join, fs_encode, appendFile
 
 class HTTPDownload():
     """ loads a url http + ftp """
 
     def __init__(self, url, filename, get={}, post={}, referer=None, cj=None, bucket=None,
-                 options={}, progressNotify=None, disposition=False):
+                 options={}, progressNotify=None, disposition=False, reactor=None, pool=None, checksums=()):
         self.url = url
         self.filename = filename  #complete file destination, not only name
         self.get = get
@@ -43,8 +45,12 @@ class HTTPDownload():
         self.referer = referer
         self.cj = cj  #cookiejar if cookies are needed
         self.bucket = bucket
+        self.reactor = reactor #shared network reactor, own multi handle if not set
+        self.pool = pool #curl handles for the chunks
         self.options = options
         self.disposition = disposition
+        self.inplace = options.get("preallocate", False) #write chunks directly into the target file
+        self.algorithms = checksums #checksums to compute while downloading
         # all arguments
 
         self.abort = False
@@ -52,6 +58,10 @@ class HTTPDownload():
         self.nameDisposition = None #will be parsed from content disposition
 
         self.chunks = []
+        self.paused = {} # chunk -> time to continue, only used without reactor
+
+        self.hash = None
+        self.checksums = {} # algorithm -> hex digest of the downloaded file
 
         self.log = getLogger("log")
 
@@ -64,7 +74,10 @@ class HTTPDownload():
             self.info = ChunkInfo(filename)
 
         self.chunkSupport = None
-        self.m = pycurl.CurlMulti()
+        if reactor:
+            self.m = ReactorMulti(reactor)
+        else:
+            self.m = pycurl.CurlMulti()
 
         #needed for speed calculation
         self.lastArrived = []
@@ -87,30 +100,56 @@ class HTTPDownload():
         if not self.size: return 0
         return (self.arrived * 100) / self.size
 
+    def _preallocate(self):
+        """ reserve the complete file, so every chunk can write at its own offset """
+        fp = self.chunks[0].fp
+        fp.flush()
+        if fstat(fp.fileno()).st_size < self.size:
+            pos = fp.tell()
+            fp.truncate(self.size) #sparse where supported
+            fp.seek(pos)
+
+    def _saveProgress(self):
+        """ stores progress of in place chunks, data has to hit the file before the info does """
+        for chunk in self.chunks:
+            chunk.fp.flush()
+            self.info.setChunkArrived(chunk.id, chunk.arrived)
+        self.info.save()
+
+    def _verifyChunks(self):
+        """ checks that in place chunks covered their whole range """
+        for chunk in self.chunks:
+            self.info.setChunkArrived(chunk.id, chunk.arrived)
+
+        for i in range(self.info.getCount()):
+            start, end = self.info.getChunkRange(i)
+            if start + self.info.getChunkArrived(i) <= end: #end is inclusive
+                remove(fs_encode(self.info.getChunkName(0)))
+                self.info.remove() #there are probably invalid chunks
+                raise Exception("Downloaded content was smaller than expected. Try to reduce download connections.")
+
     def _copyChunks(self):
         init = fs_encode(self.info.getChunkName(0)) #initial chunk name
 
-        if self.info.getCount() > 1:
+        if self.info.inplace:
+            #chunks are already at their place, nothing to copy
+            self._verifyChunks()
+        elif self.info.getCount() > 1:
+            # split chunks are appended to the info, so the file order is given by the ranges
+            order = sorted(range(self.info.getCount()), key=lambda x: self.info.getChunkRange(x)[0])
+
             fo = open(init, "rb+") #first chunkfile
-            for i in range(1, self.info.getCount()):
+            for last, i in zip(order, order[1:]):
                 #input file
                 fo.seek(
-                    self.info.getChunkRange(i - 1)[1] + 1) #seek to beginning of chunk, to get rid of overlapping chunks
-                fname = fs_encode("%s.chunk%d" % (self.filename, i))
-                fi = open(fname, "rb")
-                buf = 32 * 1024
-                while True: #copy in chunks, consumes less memory
-                    data = fi.read(buf)
-                    if not data:
-                        break
-                    fo.write(data)
-                fi.close()
+                    self.info.getChunkRange(last)[1] + 1) #seek to beginning of chunk, to get rid of overlapping chunks
+                #chunk is removed after it was appended, so the disk space is needed only once
+                appendFile(fo, fs_encode(self.info.getChunkName(i)), remove=True)
                 if fo.tell() < self.info.getChunkRange(i)[1]:
                     fo.close()
                     remove(init)
                     self.info.remove() #there are probably invalid chunks
                     raise Exception("Downloaded content was smaller than expected. Try to reduce download connections.")
-                remove(fname) #remove chunk
             fo.close()
 
         if self.nameDisposition and self.disposition:
@@ -150,9 +189,12 @@ class HTTPDownload():
     def _download(self, chunks, resume):
         if not resume:
             self.info.clear()
+            self.info.inplace = self.inplace
             self.info.addChunk("%s.chunk0" % self.filename, (0, 0)) #create an initial entry
 
         self.chunks = []
+        #data that was loaded before can't be hashed, hook has to read the file
+        self.hash = StreamHash(self.algorithms if not resume else (), self._openChunk)
 
         init = HTTPChunk(0, self, None, resume) #initial chunk that will load complete file (if needed)
 
@@ -161,6 +203,7 @@ class HTTPDownload():
 
         lastFinishCheck = 0
         lastTimeCheck = 0
+        lastSaveCheck = 0
         chunksDone = set()  # list of curl handles that are finished
         chunksCreated = False
         done = False
@@ -176,6 +219,9 @@ class HTTPDownload():
                     self.info.createChunks(chunks)
                     self.info.save()
 
+                    if self.info.inplace:
+                        self._preallocate()
+
                 chunks = self.info.getCount()
 
                 init.setRange(self.info.getChunkRange(0))
@@ -205,6 +251,7 @@ class HTTPDownload():
             while lastFinishCheck + 0.5 < t:
                 # list of failed curl handles
                 failed = []
+                finished = 0 # chunks that completed during this check
                 ex = None # save only last exception, we can only raise one anyway
 
                 num_q, ok_list, err_list = self.m.info_read()
@@ -218,12 +265,14 @@ class HTTPDownload():
                         ex = e
                     else:
                         chunksDone.add(c)
+                        finished += 1
 
                 for c in err_list:
                     curl, errno, msg = c
                     chunk = self.findChunk(curl)
-                    #test if chunk was finished
-                    if errno != 23 or "0 !=" not in msg:
+                    #test if chunk was finished, it stops the transfer itself when its range is loaded
+                    #newer libcurl versions don't mention the written bytes in the message
+                    if errno != 23 or ("0 !=" not in msg and not (chunk.range and chunk.arrived > chunk.size)):
                         failed.append(chunk)
                         ex = pycurl.error(errno, msg)
                         self.log.debug("Chunk %d failed: %s" % (chunk.id + 1, str(ex)))
@@ -237,6 +286,7 @@ class HTTPDownload():
                         ex = e
                     else:
                         chunksDone.add(curl)
+                        finished += 1
                 if not num_q: # no more infos to get
 
                     # check if init is not finished so we reset download connections
@@ -249,7 +299,9 @@ class HTTPDownload():
                         for chunk in to_clean:
                             self.closeChunk(chunk)
                             self.chunks.remove(chunk)
-                            remove(fs_encode(self.info.getChunkName(chunk.id)))
+                            self.hash.drop(chunk.id)
+                            if not self.info.inplace: #in place chunks share the file with init
+                                remove(fs_encode(self.info.getChunkName(chunk.id)))
 
                         #let first chunk load the rest and update the info file
                         init.resetRange()
@@ -258,6 +310,11 @@ class HTTPDownload():
                         self.info.save()
                     elif failed:
                         raise ex
+                    elif chunksCreated:
+                        # let every idle connection take over half of the slowest remaining range
+                        for i in range(finished):
+                            if not self.splitChunk(chunksDone):
+                                break
 
                     lastFinishCheck = t
 
@@ -283,17 +340,120 @@ class HTTPDownload():
                 lastTimeCheck = t
                 self.updateProgress()
 
+            # in place chunks can only be resumed with recorded progress
+            if self.info.inplace and chunksCreated and lastSaveCheck + 5 < t:
+                self._saveProgress()
+                lastSaveCheck = t
+
             if self.abort:
+                if self.info.inplace and chunksCreated:
+                    self._saveProgress()
                 raise Abort()
 
+            # data chunks wrote ahead of the hashed position is read back here, not in the write callbacks
+            hashing = self.hash and self.hash.catchUp()
+
             #sleep(0.003) #supress busy waiting - limits dl speed to  (1 / x) * buffersize
-            self.m.select(1)
+            timeout = self.resumeChunks()
+            if hashing:
+                pass # more to read, continue right away
+            elif timeout is None:
+                self.m.select(1)
+            else:
+                # sockets of paused chunks stay readable, select would return immediately
+                sleep(min(0.1, timeout))
 
         for chunk in self.chunks:
             chunk.flushFile() #make sure downloads are written to disk
 
         self._copyChunks()
 
+        if self.hash:
+            fs_name = fs_encode(self.filename)
+            self.checksums = self.hash.finish(fs_name, getsize(fs_name))
+
+    def splitChunk(self, chunksDone):
+        """ moves the second half of the remaining range of the slowest running chunk into a new chunk,
+        returns the new chunk or None if there is nothing worth to split """
+
+        slowest = None
+        slowestTime = 0
+        for i, chunk in enumerate(self.chunks):
+            if chunk.c in chunksDone or not chunk.range: continue
+
+            left = chunk.range[1] - chunk.range[0] - chunk.arrived
+            if left < 1024 * 1024: continue #not worth an additional request
+
+            speed = self.speeds[i] if i < len(self.speeds) else 0
+            needed = left / speed if speed else float("inf")
+            if slowest is None or needed > slowestTime:
+                slowest = chunk
+                slowestTime = needed
+
+        if slowest is None:
+            return None
+
+        start = slowest.range[0] + slowest.arrived
+        end = slowest.range[1]
+        middle = start + (end - start) / 2
+
+        slowest.setRange((slowest.range[0], middle))
+        self.info.setChunkRange(slowest.id, slowest.range)
+
+        id = self.info.getCount()
+        if self.info.inplace:
+            self.info.addChunk(self.info.getChunkName(0), (middle + 1, end))
+        else:
+            self.info.addChunk("%s.chunk%d" % (self.filename, id), (middle + 1, end))
+
+        if self.info.inplace:
+            self._saveProgress()
+        else:
+            self.info.save()
+
+        chunk = HTTPChunk(id, self, self.info.getChunkRange(id))
+        self.chunks.append(chunk)
+        self.m.add_handle(chunk.getHandle())
+
+        self.log.debug("Chunk %d split at %d, new chunk %d" % (slowest.id + 1, middle, id + 1))
+        return chunk
+
+    def pauseChunk(self, chunk, seconds):
+        """ stops receiving data for a chunk, used for speed limits """
+        if self.reactor:
+            self.m.pause(chunk.c, seconds)
+        else:
+            chunk.c.pause(pycurl.PAUSE_RECV)
+            self.paused[chunk] = time() + seconds
+
+    def resumeChunks(self):
+        """ continues paused chunks when their time is over, returns seconds until the next one or None """
+        now = time()
+        for chunk, t in self.paused.items():
+            if t <= now:
+                del self.paused[chunk]
+                try:
+                    chunk.c.pause(pycurl.PAUSE_CONT)
+                except pycurl.error:
+                    pass # chunk was stopped with the pending data, next perform will report it
+
+        if self.paused:
+            return max(0, min(self.paused.values()) - now)
+
+    def wakeup(self):
+        """ lets the download loop check its state before the next timeout """
+        if self.reactor:
+            self.m.wakeup()
+
+    def _openChunk(self, id, offset):
+        """ opens the data chunk id wrote so far at offset of the target file, for the stream hash """
+        for chunk in self.chunks:
+            if chunk.id == id and chunk.fp and not chunk.fp.closed:
+                chunk.fp.flush()
+                f = open(fs_encode(self.info.getChunkName(id)), "rb")
+                f.seek(offset if self.info.inplace else offset - self.info.getChunkRange(id)[0])
+                return f
+
     def updateProgress(self):
         if self.progressNotify:
             self.progressNotify(self.percent)
@@ -304,6 +464,7 @@ class HTTPDownload():
             if chunk.c == handle: return chunk
 
     def closeChunk(self, chunk):
+        if chunk in self.paused: del self.paused[chunk]
         try:
             self.m.remove_handle(chunk.c)
         except pycurl.error, e:
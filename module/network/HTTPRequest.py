@@ -45,8 +45,11 @@ class BadHeader(Exception):
 
 
 class HTTPRequest():
-    def __init__(self, cookies=None, options=None):
-        self.c = pycurl.Curl()
+    def __init__(self, cookies=None, options=None, reactor=None, pool=None):
+        self.options = options
+        self.pool = pool #handles are taken from and given back to the pool if set
+        self.c = pool.get(options) if pool else pycurl.Curl()
+        self.reactor = reactor #performs the transfer if set
         self.rep = StringIO()
 
         self.cj = cookies #cookiejar
@@ -193,14 +196,14 @@ class HTTPRequest():
         if just_header:
             self.c.setopt(pycurl.FOLLOWLOCATION, 0)
             self.c.setopt(pycurl.NOBODY, 1)
-            self.c.perform()
+            self.perform()
             rep = self.header
 
             self.c.setopt(pycurl.FOLLOWLOCATION, 1)
             self.c.setopt(pycurl.NOBODY, 0)
 
         else:
-            self.c.perform()
+            self.perform()
             rep = self.getResponse()
 
         self.c.setopt(pycurl.POSTFIELDS, "")
@@ -214,6 +217,13 @@ class HTTPRequest():
 
         return rep
 
+    def perform(self):
+        """ runs the transfer, on the shared reactor when available """
+        if self.reactor:
+            self.reactor.perform(self.c)
+        else:
+            self.c.perform()
+
     def verifyHeader(self):
         """ raise an exceptions on bad headers """
         code = int(self.c.getinfo(pycurl.RESPONSE_CODE))
@@ -296,7 +306,10 @@ class HTTPRequest():
         if hasattr(self, "cj"):
             del self.cj
         if hasattr(self, "c"):
-            self.c.close()
+            if self.pool:
+                self.pool.put(self.c, self.options)
+            else:
+                self.c.close()
             del self.c
 
 if __name__ == "__main__":
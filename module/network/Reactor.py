@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 3 of the License,
+    or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+    See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+    @author: RaNaN
+"""
+
+import socket
+import select
+
+from threading import Thread, Event, Lock, currentThread
+from heapq import heappush, heappop
+from time import time
+from logging import getLogger
+from traceback import print_exc
+
+import pycurl
+
+
+def socketpair():
+    """ connected socket pair, used to wake up the reactor """
+    if hasattr(socket, "socketpair"):
+        return socket.socketpair()
+
+    # windows has no socketpair in python 2
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    a = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    a.connect(server.getsockname())
+    b = server.accept()[0]
+    server.close()
+    return a, b
+
+
+class Future():
+    """ result of a transfer, set by the reactor thread """
+
+    def __init__(self):
+        self.done = Event()
+        self.error = None
+
+    def set(self, curl, error=None):
+        self.error = error
+        self.done.set()
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.done.isSet()
+
+    def result(self):
+        """ waits for the transfer and raises its pycurl error """
+        self.done.wait()
+        if self.error:
+            raise self.error
+
+
+class Reactor(Thread):
+    """ drives one CurlMulti for all transfers, uses the socket and timer callbacks of libcurl,
+    so the thread only wakes up when there is something to do """
+
+    def __init__(self):
+        Thread.__init__(self)
+        self.setDaemon(True)
+
+        self.log = getLogger("log")
+
+        self.m = pycurl.CurlMulti()
+        self.m.setopt(pycurl.M_SOCKETFUNCTION, self.onSocket)
+        self.m.setopt(pycurl.M_TIMERFUNCTION, self.onTimer)
+
+        self.sockets = {} # fd -> CSELECT flags wanted by curl
+        self.deadline = None # next curl timeout
+        self.timers = [] # heap of (time, id, function, args)
+        self.timerID = 0
+
+        self.handles = {} # curl -> callback(curl, error)
+
+        self.jobs = []
+        self.lock = Lock()
+        self.wakeIn, self.wakeOut = socketpair()
+        self.wakeIn.setblocking(0)
+        self.wakeOut.setblocking(0)
+
+        self.running = True
+
+    def onSocket(self, event, fd, *args):
+        if event == pycurl.POLL_REMOVE:
+            if fd in self.sockets: del self.sockets[fd]
+        else:
+            self.sockets[fd] = event
+
+    def onTimer(self, msecs):
+        if msecs < 0:
+            self.deadline = None
+        else:
+            self.deadline = time() + msecs / 1000.0
+
+    def inThread(self):
+        return currentThread() is self
+
+    def call(self, func, *args):
+        """ runs func inside the reactor thread and returns its result, all multi operations have to go here """
+        if self.inThread() or not self.isAlive():
+            return func(*args)
+
+        job = [func, args, Event(), None, None]
+        self.lock.acquire()
+        self.jobs.append(job)
+        self.lock.release()
+        self.wakeup()
+
+        job[2].wait()
+        if job[4]:
+            raise job[4]
+        return job[3]
+
+    def wakeup(self):
+        try:
+            self.wakeOut.send("x")
+        except socket.error: # buffer is full, reactor will wake up anyway
+            pass
+
+    def add(self, curl, callback):
+        """ starts a transfer, callback(curl, error) is called in the reactor thread when it is done """
+        self.call(self._add, curl, callback)
+
+    def _add(self, curl, callback):
+        self.handles[curl] = callback
+        self.m.add_handle(curl)
+        self.m.socket_action(pycurl.SOCKET_TIMEOUT, 0)
+
+    def remove(self, curl):
+        """ stops a transfer, the handle can be closed after this returns """
+        self.call(self._remove, curl)
+
+    def _remove(self, curl):
+        if curl in self.handles:
+            del self.handles[curl]
+            self.m.remove_handle(curl)
+
+    def perform(self, curl):
+        """ blocking transfer like curl.perform(), but driven by the reactor """
+        future = Future()
+        self.add(curl, future.set)
+        future.result()
+
+    def addTimer(self, seconds, func, *args):
+        """ calls func in the reactor thread after given seconds """
+        self.call(self._addTimer, time() + seconds, func, args)
+
+    def _addTimer(self, t, func, args):
+        self.timerID += 1
+        heappush(self.timers, (t, self.timerID, func, args))
+
+    def pause(self, curl, seconds):
+        """ pauses receiving of a running transfer for given seconds """
+        curl.pause(pycurl.PAUSE_RECV)
+        self.addTimer(seconds, self._unpause, curl)
+
+    def _unpause(self, curl):
+        if curl in self.handles:
+            try:
+                curl.pause(pycurl.PAUSE_CONT)
+            except pycurl.error:
+                # write callback stopped the transfer with the pending data,
+                # curl has to process it once more to report it as finished
+                self.m.socket_all()
+            else:
+                # curl only continues the transfer when it gets driven again
+                self.m.socket_action(pycurl.SOCKET_TIMEOUT, 0)
+
+    def stop(self):
+        self.running = False
+        self.wakeup()
+
+    def getTimeout(self):
+        deadlines = [x for x in (self.deadline, self.timers[0][0] if self.timers else None) if x is not None]
+        if not deadlines:
+            return 1
+        return max(0, min(deadlines) - time())
+
+    def wait(self, timeout):
+        """ waits for socket activity, returns list of (fd, flags) """
+        fds = [self.wakeIn.fileno()] + self.sockets.keys()
+
+        if hasattr(select, "poll"):
+            poll = select.poll()
+            for fd in fds:
+                mask = 0
+                want = self.sockets.get(fd, pycurl.POLL_IN)
+                if want in (pycurl.POLL_IN, pycurl.POLL_INOUT): mask |= select.POLLIN | select.POLLPRI
+                if want in (pycurl.POLL_OUT, pycurl.POLL_INOUT): mask |= select.POLLOUT
+                poll.register(fd, mask)
+
+            events = []
+            for fd, mask in poll.poll(timeout * 1000):
+                flags = 0
+                if mask & (select.POLLIN | select.POLLPRI): flags |= pycurl.CSELECT_IN
+                if mask & select.POLLOUT: flags |= pycurl.CSELECT_OUT
+                if mask & (select.POLLERR | select.POLLHUP | select.POLLNVAL): flags |= pycurl.CSELECT_ERR
+                events.append((fd, flags))
+            return events
+
+        rlist = [fd for fd in fds if self.sockets.get(fd, pycurl.POLL_IN) in (pycurl.POLL_IN, pycurl.POLL_INOUT)]
+        wlist = [fd for fd in fds if self.sockets.get(fd) in (pycurl.POLL_OUT, pycurl.POLL_INOUT)]
+        r, w, x = select.select(rlist, wlist, fds, timeout)
+        events = {}
+        for fd in r: events[fd] = events.get(fd, 0) | pycurl.CSELECT_IN
+        for fd in w: events[fd] = events.get(fd, 0) | pycurl.CSELECT_OUT
+        for fd in x: events[fd] = events.get(fd, 0) | pycurl.CSELECT_ERR
+        return events.items()
+
+    def run(self):
+        while self.running:
+            try:
+                self.loop()
+            except Exception, e:
+                self.log.error("Network reactor error: %s" % e)
+                print_exc()
+
+    def loop(self):
+        for fd, flags in self.wait(self.getTimeout()):
+            if fd == self.wakeIn.fileno():
+                try:
+                    while self.wakeIn.recv(4096): pass
+                except socket.error:
+                    pass
+            else:
+                self.m.socket_action(fd, flags)
+
+        self.lock.acquire()
+        jobs, self.jobs = self.jobs, []
+        self.lock.release()
+
+        for job in jobs:
+            try:
+                job[3] = job[0](*job[1])
+            except Exception, e:
+                job[4] = e
+            job[2].set()
+
+        if self.deadline is not None and self.deadline <= time():
+            self.deadline = None
+            self.m.socket_action(pycurl.SOCKET_TIMEOUT, 0)
+
+        now = time()
+        while self.timers and self.timers[0][0] <= now:
+            t, id, func, args = heappop(self.timers)
+            func(*args)
+
+        self.readInfo()
+
+    def readInfo(self):
+        """ dispatches finished transfers to their callbacks """
+        while True:
+            num_q, ok_list, err_list = self.m.info_read()
+            for curl in ok_list:
+                self.finished(curl, None)
+            for curl, errno, msg in err_list:
+                self.finished(curl, pycurl.error(errno, msg))
+            if not num_q:
+                break
+
+    def finished(self, curl, error):
+        callback = self.handles.pop(curl, None)
+        self.m.remove_handle(curl)
+        if callback:
+            try:
+                callback(curl, error)
+            except Exception, e:
+                self.log.error("Network reactor callback error: %s" % e)
+                print_exc()
+
+
+class ReactorMulti():
+    """ group of transfers on the shared reactor, can be used like a pycurl.CurlMulti by HTTPDownload """
+
+    def __init__(self, reactor):
+        self.reactor = reactor
+        self.handles = set()
+        self.ok = []
+        self.err = []
+        self.lock = Lock()
+        self.event = Event()
+
+    def add_handle(self, curl):
+        self.handles.add(curl)
+        self.reactor.add(curl, self.finished)
+
+    def remove_handle(self, curl):
+        self.handles.discard(curl)
+        self.reactor.remove(curl)
+
+    def finished(self, curl, error):
+        self.lock.acquire()
+        if error:
+            self.err.append((curl, error.args[0], error.args[1]))
+        else:
+            self.ok.append(curl)
+        self.lock.release()
+        self.event.set()
+
+    def perform(self):
+        """ transfers are performed by the reactor """
+        return pycurl.E_MULTI_OK, len(self.handles)
+
+    def info_read(self):
+        self.lock.acquire()
+        ok, self.ok = self.ok, []
+        err, self.err = self.err, []
+        self.lock.release()
+        return 0, ok, err
+
+    def select(self, timeout):
+        self.event.wait(timeout)
+        self.event.clear()
+
+    def wakeup(self):
+        self.event.set()
+
+    def pause(self, curl, seconds):
+        self.reactor.pause(curl, seconds)
+
+    def close(self):
+        for curl in list(self.handles):
+            self.remove_handle(curl)
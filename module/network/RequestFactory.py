@@ -23,28 +23,41 @@ from Browser import Browser
 from Bucket import Bucket
 from HTTPRequest import HTTPRequest
 from CookieJar import CookieJar
+from CurlPool import CurlPool
+from Reactor import Reactor
 
 from XDCCRequest import XDCCRequest
 
+#changed account cookies are written to the database together after this time
+COOKIE_SAVE_INTERVAL = 60
+
 class RequestFactory():
     def __init__(self, core):
         self.lock = Lock()
         self.core = core
         self.bucket = Bucket()
+        self.pluginBuckets = {} # limits shared by all downloads of a plugin
         self.updateBucket()
         self.cookiejars = {}
+        self.saveJob = None # scheduled saveCookies
+
+        # drives all transfers, so plugin threads only wait for their results
+        self.reactor = Reactor()
+        self.reactor.start()
+        # idle handles with their keep-alive connections
+        self.pool = CurlPool()
 
     def iface(self):
         return self.core.config["download"]["interface"]
 
     def getRequest(self, pluginName, account=None, type="HTTP"):
-        self.lock.acquire()
-
         if type == "XDCC":
             return XDCCRequest(proxies=self.getProxies())
 
-        req = Browser(self.bucket, self.getOptions())
+        # every download gets its own bucket, so it can be limited below its plugin
+        req = Browser(Bucket(self.getBucket(pluginName)), self.getOptions(), self.reactor, self.pool)
 
+        self.lock.acquire()
         if account:
             cj = self.getCookieJar(pluginName, account)
             req.setCookieJar(cj)
@@ -58,11 +71,11 @@ class RequestFactory():
         """ returns a http request, dont forget to close it ! """
         options = self.getOptions()
         options.update(kwargs) # submit kwargs as additional options
-        return HTTPRequest(CookieJar(None), options)
+        return HTTPRequest(CookieJar(None), options, self.reactor, self.pool)
 
     def getURL(self, *args, **kwargs):
         """ see HTTPRequest for argument list """
-        h = HTTPRequest(None, self.getOptions())
+        h = HTTPRequest(None, self.getOptions(), self.reactor, self.pool)
         try:
             rep = h.load(*args, **kwargs)
         finally:
@@ -70,14 +83,53 @@ class RequestFactory():
             
         return rep
 
+    def getBucket(self, pluginName):
+        """ bucket shared by all downloads of a plugin """
+        self.lock.acquire()
+        try:
+            bucket = self.pluginBuckets.get(pluginName)
+            if bucket is None:
+                bucket = self.pluginBuckets[pluginName] = Bucket(self.bucket)
+                bucket.setRate(self.getPluginLimits().get(pluginName, -1))
+
+            return bucket
+        finally:
+            self.lock.release()
+
+    def getPluginLimits(self):
+        """ parses speed limits per plugin, format is Plugin:kb/s;Plugin:kb/s """
+        limits = {}
+        if not self.core.config["download"]["limit_speed"]:
+            return limits
+
+        for entry in self.core.config["download"]["plugin_speed"].split(";"):
+            name, sep, rate = entry.partition(":")
+            if sep and rate.strip().isdigit():
+                limits[name.strip()] = int(rate) * 1024
+
+        return limits
+
     def getCookieJar(self, pluginName, account=None):
         if (pluginName, account) in self.cookiejars:
             return self.cookiejars[(pluginName, account)]
 
-        cj = CookieJar(pluginName, account)
+        # sessions of accounts are kept over restarts
+        cj = CookieJar(pluginName, account, self.core.db if account else None)
         self.cookiejars[(pluginName, account)] = cj
+
+        if account and not self.saveJob:
+            self.saveJob = self.core.scheduler.addJob(COOKIE_SAVE_INTERVAL, self.saveCookies, threaded=False)
+
         return cj
 
+    def saveCookies(self, reschedule=True):
+        """ writes changed account cookies to the database """
+        for cj in self.cookiejars.values():
+            if cj.dirty: cj.save()
+
+        if reschedule:
+            self.saveJob = self.core.scheduler.addJob(COOKIE_SAVE_INTERVAL, self.saveCookies, threaded=False)
+
     def getProxies(self):
         """ returns a proxy list for the request classes """
         if not self.core.config["proxy"]["proxy"]:
@@ -108,7 +160,8 @@ class RequestFactory():
         """returns options needed for pycurl"""
         return {"interface": self.iface(),
                 "proxies": self.getProxies(),
-                "ipv6": self.core.config["download"]["ipv6"]}
+                "ipv6": self.core.config["download"]["ipv6"],
+                "preallocate": self.core.config["download"]["preallocate"]}
 
     def updateBucket(self):
         """ set values in the bucket according to settings"""
@@ -117,6 +170,12 @@ class RequestFactory():
         else:
             self.bucket.setRate(self.core.config["download"]["max_speed"] * 1024)
 
+        limits = self.getPluginLimits()
+        self.lock.acquire()
+        for name, bucket in self.pluginBuckets.iteritems():
+            bucket.setRate(limits.get(name, -1))
+        self.lock.release()
+
 # needs pyreq in global namespace
 def getURL(*args, **kwargs):
     return pyreq.getURL(*args, **kwargs)
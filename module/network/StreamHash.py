@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    This program is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 3 of the License,
+    or (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+    See the GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+    @author: RaNaN
+"""
+
+import hashlib
+import zlib
+from threading import Lock
+
+HASHLIB = getattr(hashlib, "algorithms", ("md5", "sha1", "sha224", "sha256", "sha384", "sha512"))
+
+
+def _gf2Times(mat, vec):
+    s = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            s ^= mat[i]
+        vec >>= 1
+        i += 1
+    return s
+
+
+def _gf2Square(mat):
+    return [_gf2Times(mat, row) for row in mat]
+
+
+def crc32Combine(crc1, crc2, len2):
+    """ crc32 of two concatenated blocks, given their crcs and the length of the second (zlib's crc32_combine) """
+    crc1 &= 0xffffffff
+    crc2 &= 0xffffffff
+    if len2 <= 0:
+        return crc1
+
+    odd = [0xedb88320] + [1 << n for n in range(31)] # operator for one zero bit
+    even = _gf2Square(odd) # two zero bits
+    odd = _gf2Square(even) # four zero bits
+
+    # apply len2 zero bytes to crc1
+    while True:
+        even = _gf2Square(odd)
+        if len2 & 1:
+            crc1 = _gf2Times(even, crc1)
+        len2 >>= 1
+        if not len2: break
+
+        odd = _gf2Square(even)
+        if len2 & 1:
+            crc1 = _gf2Times(odd, crc1)
+        len2 >>= 1
+        if not len2: break
+
+    return crc1 ^ crc2
+
+
+def adler32Combine(adler1, adler2, len2):
+    """ adler32 of two concatenated blocks (zlib's adler32_combine) """
+    base = 65521
+    rem = len2 % base
+    sum1 = adler1 & 0xffff
+    sum2 = (rem * sum1) % base
+    sum1 += (adler2 & 0xffff) + base - 1
+    sum2 += ((adler1 >> 16) & 0xffff) + ((adler2 >> 16) & 0xffff) + base - rem
+    if sum1 >= base: sum1 -= base
+    if sum1 >= base: sum1 -= base
+    if sum2 >= base << 1: sum2 -= base << 1
+    if sum2 >= base: sum2 -= base
+    return sum1 | (sum2 << 16)
+
+
+#checksums of single ranges can be combined, they don't need the data in order
+COMBINABLE = {"crc32": (0, crc32Combine), "adler32": (1, adler32Combine)} # algorithm -> initial value, combine
+
+
+class StreamHash():
+    """ computes checksums of a download while its chunks are written.
+    crc32 and adler32 are kept per chunk and combined at the end, hashlib algorithms need the data in order:
+    they are fed by the chunk at the current position, data a following chunk wrote ahead of it is read back
+    by catchUp() in the download thread, so the write callbacks never wait for the disk.
+    Only what is still missing at the end is read from the complete file. """
+
+    def __init__(self, algorithms, opener=None):
+        self.combinable = [x for x in algorithms if x in COMBINABLE]
+        self.hashes = dict([(x, getattr(hashlib, x)()) for x in algorithms if x in HASHLIB])
+        self.pos = 0 # bytes of the file that were given to self.hashes
+        self.opener = opener # function(id, offset) returning the file of a chunk positioned at offset, or None
+
+        self.ranges = {} # chunk id -> [start, length, {algorithm: value}]
+        self.lock = Lock() # update() is called by the thread of the transfers
+
+    def __nonzero__(self):
+        return bool(self.combinable or self.hashes)
+
+    def update(self, id, offset, data):
+        """ data of chunk id that was written at offset """
+        if not data: return
+
+        self.lock.acquire()
+        try:
+            entry = self.ranges.get(id)
+            if entry is None:
+                entry = self.ranges[id] = [offset, 0, dict([(x, COMBINABLE[x][0]) for x in self.combinable])]
+            elif entry[0] + entry[1] != offset:
+                entry[2] = None #gap in the chunk, can't be used anymore
+
+            entry[1] += len(data)
+            if entry[2] is not None:
+                for name in self.combinable:
+                    entry[2][name] = getattr(zlib, name)(data, entry[2][name])
+
+            if self.hashes and offset <= self.pos < offset + len(data):
+                self._feed(data[self.pos - offset:])
+        finally:
+            self.lock.release()
+
+    def _feed(self, data):
+        for h in self.hashes.itervalues():
+            h.update(data)
+        self.pos += len(data)
+
+    def _written(self):
+        """ needs the lock, returns (id, end) of the chunk that already wrote the data at the current position """
+        for id, (start, length, checksums) in self.ranges.iteritems():
+            if checksums is not None and start <= self.pos < start + length:
+                return id, start + length
+
+    def catchUp(self, limit=4 * 1024 * 1024):
+        """ reads at most limit bytes that following chunks already wrote at the current position,
+        returns True if there is more to read """
+        while self.hashes and self.opener:
+            self.lock.acquire()
+            pos = self.pos
+            written = self._written()
+            self.lock.release()
+
+            if not written: return False
+            if limit <= 0: return True
+
+            id, end = written
+            f = self.opener(id, pos)
+            if f is None: return False
+            try:
+                while pos < end and limit > 0:
+                    data = f.read(min(128 * 1024, end - pos, limit))
+                    if not data: return False
+
+                    self.lock.acquire()
+                    try:
+                        if self.pos != pos: return False
+                        self._feed(data)
+                    finally:
+                        self.lock.release()
+
+                    pos += len(data)
+                    limit -= len(data)
+            finally:
+                f.close()
+
+        return False
+
+    def drop(self, id):
+        """ forget a chunk whose data was discarded """
+        self.lock.acquire()
+        if id in self.ranges: del self.ranges[id]
+        self.lock.release()
+
+    def finish(self, filename, size):
+        """ returns dict with hex digests of the complete file """
+        result = {}
+
+        ranges = sorted(self.ranges.itervalues())
+        if self.combinable and ranges and not [x for x in ranges if x[2] is None]:
+            values = None
+            pos = 0
+            for start, length, checksums in ranges:
+                if start != pos: break # data is missing, e.g. after resume
+                if values is None:
+                    values = checksums.copy()
+                else:
+                    for name in self.combinable:
+                        values[name] = COMBINABLE[name][1](values[name], checksums[name], length)
+                pos += length
+
+            if pos == size:
+                for name in self.combinable:
+                    result[name] = "%x" % (values[name] & 0xffffffff)
+
+        if self.hashes:
+            if self.pos < size: #data that arrived ahead of the current position
+                f = open(filename, "rb")
+                f.seek(self.pos)
+                while self.pos < size:
+                    data = f.read(min(128 * 1024, size - self.pos))
+                    if not data: break
+                    self._feed(data)
+                f.close()
+
+            if self.pos == size:
+                for name, h in self.hashes.iteritems():
+                    result[name] = h.hexdigest()
+
+        return result
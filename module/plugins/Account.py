@@ -20,7 +20,7 @@
 from random import choice
 from time import time
 from traceback import print_exc
-from threading import RLock
+from threading import BoundedSemaphore, RLock
 
 from Plugin import Base
 from module.utils import compare_time, parseFileSize, lock
@@ -46,6 +46,12 @@ class Account(Base):
     login_timeout = 600
     #: account data will be reloaded after this time
     info_threshold = 600
+    #: accounts whose data may be loaded at the same time,
+    #: only raise it when the plugin doesn't keep data of an account in self
+    info_threads = 1
+    #: saved sessions are used again after a restart, instead of a new login.
+    #: only set it when the login doesn't keep anything but cookies
+    reuse_session = False
 
 
     def __init__(self, manager, accounts):
@@ -55,6 +61,8 @@ class Account(Base):
         self.accounts = {}
         self.infos = {} # cache for account information
         self.lock = RLock()
+        # a single account is loaded while logins are locked, like it always was
+        self.infoLock = self.lock if self.info_threads < 2 else BoundedSemaphore(self.info_threads)
 
         self.timestamps = {}
         self.setAccounts(accounts)
@@ -80,6 +88,8 @@ class Account(Base):
         req = self.getAccountRequest(user)
         try:
             self.login(user, data, req)
+            # the session is saved with the cookies and used again after a restart
+            req.cj.setLoginTime(self.timestamps[user])
         except WrongPassword:
             self.logWarning(
                 _("Could not login with account %(user)s | %(msg)s") % {"user": user
@@ -109,7 +119,12 @@ class Account(Base):
     def setAccounts(self, accounts):
         self.accounts = accounts
         for user, data in self.accounts.iteritems():
-            self._login(user, data)
+            cj = self.getAccountCookies(user)
+            if self.reuse_session and cj.hasSession(self.login_timeout * 60):
+                self.logDebug("Using saved session of %s" % user)
+                self.timestamps[user] = cj.getLoginTime()
+            else:
+                self._login(user, data)
             self.infos[user] = {}
 
     def updateAccounts(self, user, password=None, options={}):
@@ -133,23 +148,38 @@ class Account(Base):
     def removeAccount(self, user):
         if user in self.accounts:
             del self.accounts[user]
+            self.getAccountCookies(user).clear() #saved session too
         if user in self.infos:
             del self.infos[user]
         if user in self.timestamps:
             del self.timestamps[user]
 
-    @lock
-    def getAccountInfo(self, name, force=False):
+    def getAccountInfo(self, name, force=False, cached=False):
         """retrieve account infos for an user, do **not** overwrite this method!\\
-        just use it to retrieve infos in hoster plugins. see `loadAccountInfo`
+        just use it to retrieve infos in hoster plugins. see `loadAccountInfo`.
+        Outdated information is returned at once and reloaded in the background.
 
         :param name: username
         :param force: reloads cached account information
+        :param cached: don't wait for information that was never loaded
         :return: dictionary with information
         """
         data = Account.loadAccountInfo(self, name)
+        info = self.infos.get(name)
+
+        if force or not (info or cached):
+            self.manager.refreshAccount(self, name, True)
+        elif not info or info.get("timestamp", 0) + self.info_threshold * 60 < time():
+            if info: self.logDebug("Reached timeout for account data")
+            self.manager.refreshAccount(self, name)
 
-        if force or name not in self.infos:
+        data.update(self.infos.get(name, {}))
+        return data
+
+    def refreshAccountInfo(self, name):
+        """ loads the account information, use `AccountManager.refreshAccount` instead """
+        self.infoLock.acquire()
+        try:
             self.logDebug("Get Account Info for %s" % name)
             req = self.getAccountRequest(name)
 
@@ -161,18 +191,14 @@ class Account(Base):
                 infos = {"error": str(e)}
 
             if req: req.close()
+        finally:
+            self.infoLock.release()
 
-            self.logDebug("Account Info: %s" % str(infos))
+        self.logDebug("Account Info: %s" % str(infos))
 
-            infos["timestamp"] = time()
+        infos["timestamp"] = time()
+        if name in self.accounts: #may be removed meanwhile
             self.infos[name] = infos
-        elif "timestamp" in self.infos[name] and self.infos[name][
-                                                       "timestamp"] + self.info_threshold * 60 < time():
-            self.logDebug("Reached timeout for account data")
-            self.scheduleRefresh(name)
-
-        data.update(self.infos[name])
-        return data
 
     def isPremium(self, user):
         info = self.getAccountInfo(user)
@@ -200,7 +226,8 @@ class Account(Base):
             }
 
     def getAllAccounts(self, force=False):
-        return [self.getAccountInfo(user, force) for user, data in self.accounts.iteritems()]
+        """ infos of all accounts, missing ones are loaded in the background unless force is set """
+        return [self.getAccountInfo(user, force, True) for user in self.accounts.keys()]
 
     def getAccountRequest(self, user=None):
         if not user:
@@ -278,7 +305,10 @@ class Account(Base):
     def scheduleRefresh(self, user, time=0, force=True):
         """ add task to refresh account info to sheduler """
         self.logDebug("Scheduled Account refresh for %s in %s seconds." % (user, time))
-        self.core.scheduler.addJob(time, self.getAccountInfo, [user, force])
+        if force:
+            self.core.scheduler.addJob(time, self.manager.refreshAccount, [self, user], threaded=False)
+        else:
+            self.core.scheduler.addJob(time, self.getAccountInfo, [user, False, True], threaded=False)
 
     @lock
     def checkLogin(self, user):
@@ -20,13 +20,17 @@
 from os.path import exists
 from shutil import copy
 
-from threading import Lock
+from threading import Event, Lock, Thread
+from traceback import print_exc
 
 from module.PullEvents import AccountUpdateEvent
 from module.utils import chmod, lock
 
 ACC_VERSION = 1
 
+#threads loading account information in the background
+REFRESH_THREADS = 4
+
 class AccountManager():
     """manages all accounts"""
 
@@ -37,6 +41,12 @@ class AccountManager():
         self.core = core
         self.lock = Lock()
 
+        self.refreshLock = Lock()
+        self.refreshing = {} # (plugin name, user) -> Event, set when the account is loaded
+        self.pending = [] # (plugin, user) waiting for a thread
+        self.running = {} # plugin name -> accounts being loaded by threads
+        self.threads = 0
+
         self.initPlugins()
         self.saveAccounts() # save to add categories to conf
 
@@ -162,24 +172,120 @@ class AccountManager():
 
             self.saveAccounts()
 
-    @lock
     def getAccountInfos(self, force=True, refresh=False):
+        """ infos of all accounts, outdated ones are reloaded in the background
+
+        :param force: reload all accounts and wait until they are loaded
+        :param refresh: reload all accounts in the background
+        """
         data = {}
 
-        if refresh:
-            self.core.scheduler.addJob(0, self.core.accountManager.getAccountInfos)
-            force = False
-        
+        if force or refresh:
+            done = []
+            for p in self.accounts.keys():
+                if self.accounts[p]:
+                    p = self.getAccountPlugin(p)
+                    done.extend([self.refreshAccount(p, user) for user in p.accounts.keys()])
+
+            if force:
+                for e in done: e.wait()
+
         for p in self.accounts.keys():
             if self.accounts[p]:
                 p = self.getAccountPlugin(p)
-                data[p.__name__] = p.getAllAccounts(force)
+                data[p.__name__] = p.getAllAccounts()
             else:
                 data[p] = []
         e = AccountUpdateEvent()
         self.core.pullManager.addEvent(e)
         return data
     
+    def refreshAccount(self, plugin, user, wait=False):
+        """ loads the account info in a background thread. An account that is already waiting or
+        being loaded is not loaded twice. Threads are limited in total and by `Account.info_threads`.
+
+        :param wait: block until the account is loaded, it is loaded by the calling thread if possible
+        :return: Event that is set when the account is loaded
+        """
+        key = plugin.__name__, user
+        run = False
+
+        self.refreshLock.acquire()
+        try:
+            done = self.refreshing.get(key)
+            if done is None:
+                done = self.refreshing[key] = Event()
+                if wait:
+                    run = True
+                else:
+                    self.pending.append((plugin, user))
+                    self.startRefreshThread()
+            elif wait:
+                for job in self.pending:
+                    if (job[0].__name__, job[1]) == key:
+                        self.pending.remove(job)
+                        plugin, run = job[0], True
+                        break
+        finally:
+            self.refreshLock.release()
+
+        if run:
+            self.runRefresh(plugin, user)
+        elif wait:
+            done.wait()
+
+        return done
+
+    def startRefreshThread(self):
+        """ needs the refresh lock """
+        if self.threads < REFRESH_THREADS:
+            self.threads += 1
+            t = Thread(target=self.refreshThread)
+            t.setDaemon(True)
+            t.start()
+
+    def runRefresh(self, plugin, user):
+        try:
+            plugin.refreshAccountInfo(user)
+        finally:
+            self.refreshLock.acquire()
+            done = self.refreshing.pop((plugin.__name__, user))
+            self.refreshLock.release()
+            done.set()
+
+    def refreshThread(self):
+        """ loads pending accounts, as long as there are some of plugins below their limit """
+        while True:
+            self.refreshLock.acquire()
+            try:
+                for plugin, user in self.pending:
+                    if self.running.get(plugin.__name__, 0) < plugin.info_threads:
+                        break
+                else:
+                    # decided together with the check, so refreshAccount starts a new thread for new jobs
+                    self.threads -= 1
+                    idle = not self.threads
+                    break
+
+                self.pending.remove((plugin, user))
+                self.running[plugin.__name__] = self.running.get(plugin.__name__, 0) + 1
+            finally:
+                self.refreshLock.release()
+
+            try:
+                self.runRefresh(plugin, user)
+            except Exception, e:
+                self.core.log.warning(_("Could not load account info of %(user)s: %(error)s") % {"user": user, "error": str(e)})
+                if self.core.debug:
+                    print_exc()
+
+            self.refreshLock.acquire()
+            self.running[plugin.__name__] -= 1
+            self.refreshLock.release()
+
+        #fresh data for the clients
+        if idle: self.sendChange()
+
     def sendChange(self):
         e = AccountUpdateEvent()
         self.core.pullManager.addEvent(e)
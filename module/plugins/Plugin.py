@@ -61,6 +61,10 @@ class SkipDownload(Exception):
     """ raised when download should be skipped """
 
 
+class Park(Exception):
+    """ raised when waiting without a thread, the download starts again from beginning afterwards """
+
+
 class Base(object):
     """
     A Base class with log/config/db methods *all* plugin types can use
@@ -160,10 +164,14 @@ class Plugin(Base):
         #: chunk limit
         self.chunkLimit = 1
         self.resumeDownload = False
+        #: speed limit of a single download in kb/s, in addition to the plugin and global limit, 0 for none
+        self.speedLimit = 0
 
         #: time() + wait in seconds
         self.waitUntil = 0
         self.waiting = False
+        #: download gave its thread back during the last wait, cookies are kept
+        self.parked = False
 
         self.ocr = None  #captcha reader instance
         #: account handler instance, see :py:class:`Account`
@@ -194,6 +202,8 @@ class Plugin(Base):
 
         #: location where the last call to download was saved
         self.lastDownload = ""
+        #: checksums of the last download computed while it was loaded, algorithm -> hex digest
+        self.lastChecksums = {}
         #: re match of the last call to `checkDownload`
         self.lastCheck = None
         #: js engine, see `JsEngine`
@@ -227,10 +237,12 @@ class Plugin(Base):
 
         if self.account:
             self.account.checkLogin(self.user)
-        else:
+        elif not self.parked:
             self.req.clearCookies()
 
         self.setup()
+        if not self.account and self.multiDL:
+            self.core.scheduler.wakeup() #more downloads of this plugin can be assigned now
 
         self.pyfile.setStatus("starting")
 
@@ -276,6 +288,12 @@ class Plugin(Base):
         self.waiting = True
         self.pyfile.setStatus("waiting")
 
+        if self.canPark():
+            raise Park
+
+        # only the first wait after parking is parked, the wait may be a countdown that has to be done in one go
+        self.parked = False
+
         while self.pyfile.waitUntil > time():
             self.thread.m.reconnecting.wait(2)
 
@@ -288,6 +306,15 @@ class Plugin(Base):
         self.waiting = False
         self.pyfile.setStatus("starting")
 
+    def canPark(self):
+        """ checks if the thread can be given back to download something else while waiting """
+        park = self.core.config["download"]["park_wait"]
+        if not park or self.parked or self.pyfile.waitUntil - time() < park:
+            return False
+
+        # a reconnect is only done when all downloads are waiting for it
+        return not (self.wantReconnect and self.core.config["reconnect"]["activated"])
+
     def fail(self, reason):
         """ fail and give reason """
         raise Fail(reason)
@@ -312,10 +339,10 @@ class Plugin(Base):
             raise Fail(reason)
 
         self.wantReconnect = False
+        self.retries += 1
         self.setWait(wait_time)
         self.wait()
 
-        self.retries += 1
         raise Retry(reason)
 
     def invalidCaptcha(self):
@@ -497,13 +524,20 @@ class Plugin(Base):
 
         self.core.hookManager.dispatchEvent("downloadStarts", self.pyfile, url, filename)
 
+        self.lastChecksums = {}
+        if self.speedLimit:
+            self.req.setSpeedLimit(self.speedLimit)
+
         try:
             newname = self.req.httpDownload(url, filename, get=get, post=post, ref=ref, cookies=cookies,
                                             chunks=self.getChunkCount(), resume=self.resumeDownload,
-                                            progressNotify=self.pyfile.setProgress, disposition=disposition)
+                                            progressNotify=self.pyfile.setProgress, disposition=disposition,
+                                            checksums=self.getChecksumAlgorithms())
         finally:
             self.pyfile.size = self.req.size
 
+        self.lastChecksums = self.req.checksums
+
         if disposition and newname and newname != name: #triple check, just to be sure
             self.log.info("%(name)s saved as %(newname)s" % {"name": name, "newname": newname})
             self.pyfile.name = newname
@@ -526,6 +560,17 @@ class Plugin(Base):
         self.lastDownload = filename
         return self.lastDownload
 
+    def getChecksumAlgorithms(self):
+        """ algorithms of the hashes given in check_data, the checksum hook verifies them after download """
+        if not self.core.config["general"]["checksum"]: return ()
+
+        data = getattr(self, "check_data", None) or getattr(self, "api_data", None)
+        if not isinstance(data, dict): return ()
+
+        algorithms = [str(x).replace("-", "").lower() for x in data]
+        if "checksum" in data: algorithms.append("md5")
+        return algorithms
+
     def checkDownload(self, rules, api_size=0, max_size=50000, delete=True, read_size=0):
         """ checks the content of the last downloaded file, re match is saved to `lastCheck`
         
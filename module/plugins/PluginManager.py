@@ -19,16 +19,193 @@
 
 import re
 import sys
+import sre_parse
+import sre_constants as sre
 
-from os import listdir, makedirs
+from os import listdir, makedirs, stat
 from os.path import isfile, join, exists, abspath
 from sys import version_info
 from itertools import chain
 from traceback import print_exc
+from time import time
+from cPickle import dump, load, HIGHEST_PROTOCOL
 
 from module.lib.SafeEval import const_eval as literal_eval
 from module.ConfigParser import IGNORE
 
+MAX_PATHS = 1024 # max expanded alternatives of a pattern, before it is tried for every url
+
+CATEGORIES = {
+    sre.CATEGORY_DIGIT: lambda c: c.isdigit(),
+    sre.CATEGORY_NOT_DIGIT: lambda c: not c.isdigit(),
+    sre.CATEGORY_WORD: lambda c: c.isalnum() or c == "_",
+    sre.CATEGORY_NOT_WORD: lambda c: not (c.isalnum() or c == "_"),
+    sre.CATEGORY_SPACE: lambda c: c.isspace(),
+    sre.CATEGORY_NOT_SPACE: lambda c: not c.isspace(),
+}
+
+def mayMatch(tokens, char):
+    """ checks if parsed regex tokens could match given char, True when unsure """
+    code = ord(char)
+    for op, av in tokens:
+        if op == sre.LITERAL:
+            if av == code: return True
+        elif op == sre.NOT_LITERAL:
+            if av != code: return True
+        elif op == sre.ANY:
+            if char != "\n": return True
+        elif op == sre.IN:
+            if inSet(av, char): return True
+        elif op == sre.SUBPATTERN:
+            if mayMatch(av[-1], char): return True
+        elif op == sre.BRANCH:
+            for branch in av[1]:
+                if mayMatch(branch, char): return True
+        elif op in (sre.MAX_REPEAT, sre.MIN_REPEAT):
+            if av[1] and mayMatch(av[2], char): return True
+        elif op not in (sre.AT, sre.ASSERT, sre.ASSERT_NOT):
+            return True
+    return False
+
+def inSet(items, char):
+    """ checks if a character set could contain char """
+    code = ord(char)
+    negate = False
+    found = False
+    for op, av in items:
+        if op == sre.NEGATE:
+            negate = True
+        elif op == sre.LITERAL:
+            found = found or av == code
+        elif op == sre.RANGE:
+            found = found or av[0] <= code <= av[1]
+        elif op == sre.CATEGORY:
+            if av not in CATEGORIES: return True
+            found = found or CATEGORIES[av](char)
+        else:
+            return True
+    return not found if negate else found
+
+def expand(tokens, paths):
+    """ expands parsed regex tokens into all alternatives of the start of an url.
+    A path is a list of literal chars, (slash, colon) tuples for anything else, telling if it could
+    match these chars, and None for the end of the string. """
+    for op, av in tokens:
+        paths, done = [p for p in paths if not complete(p)], [p for p in paths if complete(p)]
+        if not paths:
+            return done
+
+        if op == sre.LITERAL:
+            add = [[unichr(av)]]
+        elif op == sre.ANY:
+            # mostly unescaped dots in host names
+            add = [[u"."], [u"/"], [(False, True)]]
+        elif op == sre.IN and len(av) == 1 and av[0][0] == sre.LITERAL:
+            add = [[unichr(av[0][1])]]
+        elif op in (sre.NOT_LITERAL, sre.IN, sre.GROUPREF):
+            add = [[(mayMatch([(op, av)], "/"), mayMatch([(op, av)], ":"))]]
+        elif op == sre.SUBPATTERN:
+            add = expand(av[-1], [[]])
+        elif op == sre.BRANCH:
+            add = []
+            for branch in av[1]:
+                add.extend(expand(branch, [[]]))
+        elif op in (sre.MAX_REPEAT, sre.MIN_REPEAT):
+            low, high, sub = av
+            if low == high == 1:
+                add = expand(sub, [[]])
+            elif low == 0 and high == 1:
+                add = [[]] + expand(sub, [[]])
+            elif not high:
+                add = [[]]
+            elif low == high <= 8:
+                add = expand(list(sub) * low, [[]])
+            else:
+                add = [[(mayMatch(sub, "/"), mayMatch(sub, ":"))]]
+        elif op == sre.AT:
+            add = [[None]] if av in (sre.AT_END, sre.AT_END_STRING) else [[]]
+        elif op in (sre.ASSERT, sre.ASSERT_NOT):
+            add = [[]]
+        else:
+            raise ValueError("Unsupported regex")
+
+        paths = [p + a for p in paths for a in add] + done
+        if len(paths) > MAX_PATHS:
+            raise ValueError("Too many alternatives")
+
+    return paths
+
+def complete(path):
+    """ path contains the end of the host name, or can not be used anymore """
+    for i, item in enumerate(path):
+        if item is None: return True
+        if type(item) == tuple and item[0]: return True
+        if item == "/" and i and path[i - 1] not in (":", "/"): return True
+    return False
+
+def hostSuffix(path):
+    """ literal end of the host name, every url that matches the path has a host ending with it,
+    see `getHost`. None when the path can not be used for this """
+    for i, item in enumerate(path):
+        if item is None or item == "/": break
+        if type(item) == tuple and item[0]: return None
+    else:
+        return None
+
+    if item is None:
+        host = path[:i]
+    elif i and path[i - 1] == ":" and i + 1 < len(path) and path[i + 1] == "/":
+        for j in range(i + 2, len(path)):
+            item = path[j]
+            if item is None or item == "/": break
+            if type(item) == tuple and item[0]: return None
+        else:
+            return None
+        host = path[i + 2:j]
+    else:
+        # the first slash must not belong to ://
+        if not i or path[i - 1] == ":" or (type(path[i - 1]) == tuple and path[i - 1][1]):
+            return None
+        host = path[:i]
+
+    suffix = []
+    for item in reversed(host):
+        if type(item) == tuple: break
+        suffix.append(item)
+
+    suffix = "".join(reversed(suffix)).lower()
+    # non ascii chars could differ between str and unicode urls
+    if not suffix or max(suffix) > u"\x7f": return None
+    return str(suffix)
+
+def patternHosts(pattern):
+    """ set of host name suffixes of an url pattern, None if its urls can have any host """
+    try:
+        paths = expand(sre_parse.parse(pattern), [[]])
+    except (ValueError, sre.error, OverflowError):
+        return None
+
+    hosts = set()
+    for path in paths:
+        suffix = hostSuffix(path)
+        if not suffix: return None
+        hosts.add(suffix)
+    return hosts
+
+def getHost(url):
+    """ host part of an url, in the same way as `hostSuffix` determines it """
+    i = url.find("/")
+    if i < 0:
+        host = url
+    elif i and url[i - 1:i + 2] == "://":
+        j = url.find("/", i + 2)
+        host = url[i + 2:] if j < 0 else url[i + 2:j]
+    else:
+        host = url[:i]
+
+    if host.endswith("\n"): host = host[:-1] # $ also matches before a trailing newline
+    return host.lower()
+
 class PluginManager:
     ROOT = "module.plugins."
     USERROOT = "userplugins."
@@ -39,6 +216,9 @@ class PluginManager:
     CONFIG = re.compile(r'__config__.*=.*\[([^\]]+)', re.MULTILINE)
     DESC = re.compile(r'__description__.?=.?("|"""|\')([^"\']+)')
 
+    CACHE = "plugins.cache"
+    CACHE_VERSION = 1
+
 
     def __init__(self, core):
         self.core = core
@@ -47,6 +227,8 @@ class PluginManager:
         self.log = core.log
 
         self.plugins = {}
+        self.urlHosts = {} # pattern -> host suffixes
+        self.loadCache()
         self.createIndex()
 
         #register for import hook
@@ -55,6 +237,7 @@ class PluginManager:
 
     def createIndex(self):
         """create information for all plugins available"""
+        a = time()
 
         sys.path.append(abspath(""))
 
@@ -73,7 +256,132 @@ class PluginManager:
         self.plugins["hooks"] = self.hookPlugins = self.parse("hooks")
         self.plugins["internal"] = self.internalPlugins = self.parse("internal")
 
-        self.log.debug("created index of plugins")
+        self.createUrlIndex()
+
+        # plugins that were removed
+        for path in self.cache.keys():
+            if path not in self.cacheUsed:
+                del self.cache[path]
+                self.cacheChanged = True
+        self.saveCache()
+
+        self.log.debug("created index of plugins: %d cached, %d parsed in %.3fs" % (
+            len(self.cacheUsed) - self.cacheParsed, self.cacheParsed, time() - a))
+
+    def loadCache(self):
+        """ loads parsed plugin information, path -> (mtime, size, info) """
+        self.cache = {}
+        self.cacheUsed = set()
+        self.cacheParsed = 0
+        self.cacheChanged = False
+
+        if not exists(self.CACHE): return
+        try:
+            f = open(self.CACHE, "rb")
+            try:
+                data = load(f)
+            finally:
+                f.close()
+            if data["version"] == self.CACHE_VERSION:
+                self.cache = data["plugins"]
+        except Exception, e:
+            self.log.warning(_("Plugin cache could not be loaded: %s") % e)
+
+    def saveCache(self):
+        if not self.cacheChanged: return
+        try:
+            f = open(self.CACHE, "wb")
+            try:
+                dump({"version": self.CACHE_VERSION, "plugins": self.cache}, f, HIGHEST_PROTOCOL)
+            finally:
+                f.close()
+            self.cacheChanged = False
+        except Exception, e:
+            self.log.warning(_("Plugin cache could not be saved: %s") % e)
+
+    def readPlugin(self, path, pattern):
+        """ returns the attributes of a plugin file, from the cache when it was not modified """
+        s = stat(path)
+        self.cacheUsed.add(path)
+
+        if path in self.cache:
+            mtime, size, info = self.cache[path]
+            if mtime == s.st_mtime and size == s.st_size and (not pattern or "pattern" in info):
+                return info
+
+        data = open(path)
+        content = data.read()
+        data.close()
+
+        info = {}
+        version = self.VERSION.findall(content)
+        if version:
+            info["v"] = float(version[0][1])
+        else:
+            info["v"] = 0
+
+        if pattern:
+            pattern = self.PATTERN.findall(content)
+
+            if pattern:
+                info["pattern"] = pattern[0][1]
+            else:
+                info["pattern"] = "^unmachtable$"
+
+            info["hosts"] = patternHosts(info["pattern"])
+
+        config = self.CONFIG.findall(content)
+        if config:
+            info["config"] = literal_eval(config[0].strip().replace("\n", "").replace("\r", ""))
+        else:
+            info["config"] = None
+
+        desc = self.DESC.findall(content)
+        info["desc"] = desc[0][1] if desc else ""
+
+        self.cache[path] = (s.st_mtime, s.st_size, info)
+        self.cacheChanged = True
+        self.cacheParsed += 1
+        return info
+
+    def createUrlIndex(self):
+        """ indexes the url patterns by the host names they can match, so parseUrls only
+        has to try a few of them """
+        self.urlPlugins = self.getUrlPlugins()
+
+        self.urlPatterns = [(name, value["pattern"]) for name, value in self.urlPlugins]
+        self.urlIndex = {} # host suffix -> list of positions in urlPlugins
+        self.urlFallback = [] # patterns without known host
+
+        for i, (name, value) in enumerate(self.urlPlugins):
+            if value["pattern"] not in self.urlHosts:
+                self.urlHosts[value["pattern"]] = patternHosts(value["pattern"])
+            hosts = self.urlHosts[value["pattern"]]
+            if hosts is None:
+                self.urlFallback.append(i)
+            else:
+                for host in hosts:
+                    self.urlIndex.setdefault(host, []).append(i)
+
+        self.log.debug("indexed %d url patterns, %d without host" % (len(self.urlPlugins), len(self.urlFallback)))
+
+    def getUrlPlugins(self):
+        """ (name, dict) of all plugins with url pattern, in the order they are tried """
+        return [(name, value) for name, value in chain(self.crypterPlugins.iteritems(),
+            self.hosterPlugins.iteritems(), self.containerPlugins.iteritems()) if "re" in value]
+
+    def checkUrlIndex(self):
+        """ hooks like MultiHoster change the patterns of plugins, the index has to be created again """
+        if [(name, value["pattern"]) for name, value in self.getUrlPlugins()] != self.urlPatterns:
+            self.createUrlIndex()
+
+    def getUrlCandidates(self, host):
+        """ positions of the plugins that could match urls with this host, in the order they are tried """
+        candidates = set(self.urlFallback)
+        for i in range(len(host)):
+            if host[i:] in self.urlIndex:
+                candidates.update(self.urlIndex[host[i:]])
+        return sorted(candidates)
 
     def parse(self, folder, pattern=False, home={}):
         """
@@ -100,10 +408,6 @@ class PluginManager:
         for f in listdir(pfolder):
             if (isfile(join(pfolder, f)) and f.endswith(".py") or f.endswith("_25.pyc") or f.endswith(
                 "_26.pyc") or f.endswith("_27.pyc")) and not f.startswith("_"):
-                data = open(join(pfolder, f))
-                content = data.read()
-                data.close()
-
                 if f.endswith("_25.pyc") and version_info[0:2] != (2, 5):
                     continue
                 elif f.endswith("_26.pyc") and version_info[0:2] != (2, 6):
@@ -114,11 +418,8 @@ class PluginManager:
                 name = f[:-3]
                 if name[-1] == ".": name = name[:-4]
 
-                version = self.VERSION.findall(content)
-                if version:
-                    version = float(version[0][1])
-                else:
-                    version = 0
+                info = self.readPlugin(join(pfolder, f), pattern)
+                version = info["v"]
 
                 # home contains plugins from pyload root
                 if home and name in home:
@@ -138,17 +439,11 @@ class PluginManager:
                 plugins[name]["name"] = module
 
                 if pattern:
-                    pattern = self.PATTERN.findall(content)
-
-                    if pattern:
-                        pattern = pattern[0][1]
-                    else:
-                        pattern = "^unmachtable$"
-
-                    plugins[name]["pattern"] = pattern
+                    plugins[name]["pattern"] = info["pattern"]
+                    self.urlHosts[info["pattern"]] = info["hosts"]
 
                     try:
-                        plugins[name]["re"] = re.compile(pattern)
+                        plugins[name]["re"] = re.compile(info["pattern"])
                     except:
                         self.log.error(_("%s has a invalid pattern.") % name)
 
@@ -158,11 +453,9 @@ class PluginManager:
                     self.core.config.deleteConfig(name)
                     continue
 
-                config = self.CONFIG.findall(content)
+                config = info["config"]
                 if config:
-                    config = literal_eval(config[0].strip().replace("\n", "").replace("\r", ""))
-                    desc = self.DESC.findall(content)
-                    desc = desc[0][1] if desc else ""
+                    desc = info["desc"]
 
                     if type(config[0]) == tuple:
                         config = [list(x) for x in config]
@@ -183,8 +476,7 @@ class PluginManager:
                         self.log.error("Invalid config in %s: %s" % (name, config))
 
                 elif folder == "hooks": #force config creation
-                    desc = self.DESC.findall(content)
-                    desc = desc[0][1] if desc else ""
+                    desc = info["desc"]
                     config = (["activated", "bool", "Activated", False],)
 
                     try:
@@ -204,6 +496,9 @@ class PluginManager:
 
         last = None
         res = [] # tupels of (url, plugin)
+        candidates = {} # host -> plugin positions
+
+        self.checkUrlIndex()
 
         for url in urls:
             if type(url) not in (str, unicode, buffer): continue
@@ -213,8 +508,12 @@ class PluginManager:
                 res.append((url, last[0]))
                 continue
 
-            for name, value in chain(self.crypterPlugins.iteritems(), self.hosterPlugins.iteritems(),
-                self.containerPlugins.iteritems()):
+            host = getHost(url[:])
+            if host not in candidates:
+                candidates[host] = self.getUrlCandidates(host)
+
+            for i in candidates[host]:
+                name, value = self.urlPlugins[i]
                 if value["re"].match(url):
                     res.append((url, name))
                     last = (name, value)
@@ -353,6 +652,9 @@ class PluginManager:
         self.plugins["captcha"] = self.captchaPlugins = self.parse("captcha")
         self.plugins["accounts"] = self.accountPlugins = self.parse("accounts")
 
+        self.createUrlIndex()
+        self.saveCache()
+
         if "accounts" in as_dict: #accounts needs to be reloaded
             self.core.accountManager.initPlugins()
             self.core.scheduler.addJob(0, self.core.accountManager.getAccountInfos)
@@ -15,6 +15,8 @@ class AlldebridCom(Account):
     __author_name__ = ("Andy, Voigt")
     __author_mail__ = ("spamsales@online.de")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         data = self.getAccountData(user)
         page = req.load("http://www.alldebrid.com/account/")
@@ -31,6 +31,8 @@ class BayfilesCom(Account):
     __author_name__ = ("zoidberg")
     __author_mail__ = ("zoidberg@mujmail.cz")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         for i in range(2):
             response = json_loads(req.load("http://api.bayfiles.com/v1/account/info"))
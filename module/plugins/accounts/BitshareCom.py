@@ -27,6 +27,8 @@ class BitshareCom(Account):
     __description__ = """Bitshare account plugin"""
     __author_name__ = ("Paul King")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         page = req.load("http://bitshare.com/mysettings.html")
 
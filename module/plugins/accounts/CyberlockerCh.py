@@ -13,6 +13,8 @@ class CyberlockerCh(XFSPAccount):
 
     MAIN_PAGE = "http://cyberlocker.ch/"
 
+    reuse_session = True
+
     def login(self, user, data, req):
         html = req.load(self.MAIN_PAGE + 'login.html', decode=True)
 
@@ -33,6 +33,8 @@ class CzshareCom(Account):
 
     CREDIT_LEFT_PATTERN = r'<tr class="active">\s*<td>([0-9 ,]+) (KiB|MiB|GiB)</td>\s*<td>([^<]*)</td>\s*</tr>'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load("http://czshare.com/prehled_kreditu/")
 
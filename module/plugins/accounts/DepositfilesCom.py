@@ -31,6 +31,8 @@ class DepositfilesCom(Account):
     __author_name__ = ("mkaay", "stickell")
     __author_mail__ = ("mkaay@mkaay.de", "l.stickell@yahoo.it")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         src = req.load("http://depositfiles.com/de/gold/")
         validuntil = re.search(r"Sie haben Gold Zugang bis: <b>(.*?)</b></div>", src).group(1)
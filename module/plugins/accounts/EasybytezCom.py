@@ -36,6 +36,8 @@ class EasybytezCom(Account):
     VALID_UNTIL_PATTERN = r'<TR><TD>Premium account expire:</TD><TD><b>([^<]+)</b>'
     TRAFFIC_LEFT_PATTERN = r'<TR><TD>Traffic available today:</TD><TD><b>(?P<S>[^<]+)</b>'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load("http://www.easybytez.com/?op=my_account", decode=True)
 
@@ -17,6 +17,8 @@ class EgoFilesCom(Account):
 
     PREMIUM_ACCOUNT_PATTERN = '<br/>\s*Premium: (?P<P>[^/]*) / Traffic left: (?P<T>[\d.]*) (?P<U>\w*)\s*\\n\s*<br/>'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load("http://egofiles.com")
         if 'You are logged as a Free User' in html:
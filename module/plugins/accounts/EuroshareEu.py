@@ -31,6 +31,8 @@ class EuroshareEu(Account):
     __author_name__ = ("zoidberg")
     __author_mail__ = ("zoidberg@mujmail.cz")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         self.relogin(user)
         html = req.load("http://euroshare.eu/customer-zone/settings/")
@@ -32,6 +32,8 @@ class FastshareCz(Account):
 
     CREDIT_PATTERN = r'(?:Kredit|Credit)\s*</td>\s*<td[^>]*>([\d. \w]+)&nbsp;'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load("http://www.fastshare.cz/user", decode=True)
 
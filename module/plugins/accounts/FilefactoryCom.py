@@ -33,6 +33,8 @@ class FilefactoryCom(Account):
 
     ACCOUNT_INFO_PATTERN = r'<time datetime="([\d-]+)">'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load("http://www.filefactory.com/member/")
 
@@ -37,6 +37,8 @@ class FilejungleCom(Account):
     TRAFFIC_LEFT_PATTERN = r'"/extend_premium\.php">Until (\d+ [A-Za-z]+ \d+)<br'
     LOGIN_FAILED_PATTERN = r'<span htmlfor="loginUser(Name|Password)" generated="true" class="fail_info">'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load(self.URL + "dashboard.php")
         found = re.search(self.TRAFFIC_LEFT_PATTERN, html)
@@ -28,6 +28,8 @@ class FilesMailRu(Account):
     __author_name__ = ("RaNaN")
     __author_mail__ = ("RaNaN@pyload.org")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         return {"validuntil": None, "trafficleft": None}
 
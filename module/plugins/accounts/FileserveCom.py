@@ -31,6 +31,8 @@ class FileserveCom(Account):
     __author_name__ = ("mkaay")
     __author_mail__ = ("mkaay@mkaay.de")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         data = self.getAccountData(user)
 
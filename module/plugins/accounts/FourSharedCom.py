@@ -29,6 +29,8 @@ class FourSharedCom(Account):
     __author_name__ = ("zoidberg")
     __author_mail__ = ("zoidberg@mujmail.cz")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         #fixme
         return {"validuntil": -1, "trafficleft": -1, "premium": False}
@@ -30,6 +30,8 @@ class FreakshareCom(Account):
     __author_name__ = ("RaNaN")
     __author_mail__ = ("RaNaN@pyload.org")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         page = req.load("http://freakshare.com/")
 
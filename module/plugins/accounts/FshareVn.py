@@ -36,6 +36,8 @@ class FshareVn(Account):
     TRAFFIC_LEFT_PATTERN = ur'<dt>Tổng Dung Lượng Tài Khoản</dt>\s*<dd[^>]*>([0-9.]+) ([kKMG])B</dd>'
     DIRECT_DOWNLOAD_PATTERN = ur'<input type="checkbox"\s*([^=>]*)[^>]*/>Kích hoạt download trực tiếp</dt>'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load("http://www.fshare.vn/account_info.php", decode=True)
         found = re.search(self.VALID_UNTIL_PATTERN, html)
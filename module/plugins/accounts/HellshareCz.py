@@ -33,6 +33,8 @@ class HellshareCz(Account):
 
     CREDIT_LEFT_PATTERN = r'<div class="credit-link">\s*<table>\s*<tr>\s*<th>(\d+|\d\d\.\d\d\.)</th>'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         self.relogin(user)
         html = req.load("http://www.hellshare.com/")
@@ -31,6 +31,8 @@ class HotfileCom(Account):
     __author_name__ = ("mkaay", "JoKoT3")
     __author_mail__ = ("mkaay@mkaay.de", "jokot3@gmail.com")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         resp = self.apiCall("getuserinfo", user=user)
         if resp.startswith("."):
@@ -27,6 +27,8 @@ class LetitbitNet(Account):
     __author_name__ = ("stickell")
     __author_mail__ = ("l.stickell@yahoo.it")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         ## DISABLED BECAUSE IT GET 'key exausted' EVEN IF VALID ##
         # api_key = self.accounts[user]['password']
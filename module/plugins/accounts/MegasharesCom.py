@@ -16,6 +16,8 @@ class MegasharesCom(Account):
 
     VALID_UNTIL_PATTERN = r'<p class="premium_info_box">Period Ends: (\w{3} \d{1,2}, \d{4})</p>'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         #self.relogin(user)
         html = req.load("http://d01.megashares.com/myms.php", decode=True)
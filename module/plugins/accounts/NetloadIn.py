@@ -31,6 +31,8 @@ class NetloadIn(Account):
     __author_name__ = ("RaNaN", "CryNickSystems")
     __author_mail__ = ("RaNaN@pyload.org", "webmaster@pcProfil.de")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         page = req.load("http://netload.in/index.php?id=2&lang=de")
         left = r">(\d+) (Tag|Tage), (\d+) Stunden<"
@@ -11,6 +11,8 @@ class PremiumizeMe(Account):
     __author_name__ = ("Florian Franzen")
     __author_mail__ = ("FlorianFranzen@gmail.com")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         # Get user data from premiumize.me
         status = self.getAccountStatus(user, req)
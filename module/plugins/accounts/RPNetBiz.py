@@ -10,6 +10,8 @@ class RPNetBiz(Account):
     __author_name__ = ("Dman")
     __author_mail__ = ("dmanugm@gmail.com")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         # Get account information from rpnet.biz
         response = self.getAccountStatus(user, req)
@@ -28,6 +28,8 @@ class RapidshareCom(Account):
     __author_name__ = ("mkaay")
     __author_mail__ = ("mkaay@mkaay.de")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         data = self.getAccountData(user)
         api_url_base = "http://api.rapidshare.com/cgi-bin/rsapi.cgi"
@@ -9,6 +9,8 @@ class RehostTo(Account):
     __author_name__ = ("RaNaN")
     __author_mail__ = ("RaNaN@pyload.org")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         data = self.getAccountData(user)
         page = req.load("http://rehost.to/api.php?cmd=login&user=%s&pass=%s" % (user, data["password"]))
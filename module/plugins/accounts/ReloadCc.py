@@ -14,6 +14,8 @@ class ReloadCc(Account):
     __author_name__ = ("Reload Team")
     __author_mail__ = ("hello@reload.cc")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
 
         # Get user data from reload.cc
@@ -12,6 +12,8 @@ class RyushareCom(XFSPAccount):
 
     MAIN_PAGE = "http://ryushare.com/"
 
+    reuse_session = True
+
     def login(self, user, data, req):
         req.lastURL = "http://ryushare.com/login.python"
         html = req.load("http://ryushare.com/login.python",
@@ -13,6 +13,7 @@ class ShareRapidCom(Account):
     __author_name__ = ("MikyWoW", "zoidberg")
 
     login_timeout = 60
+    reuse_session = True
 
     def loadAccountInfo(self, user, req):
         src = req.load("http://share-rapid.com/mujucet/", decode=True)
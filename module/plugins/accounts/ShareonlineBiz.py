@@ -28,6 +28,8 @@ class ShareonlineBiz(Account):
     __author_name__ = ("mkaay", "zoidberg")
     __author_mail__ = ("mkaay@mkaay.de", "zoidberg@mujmail.cz")
 
+    reuse_session = True
+
     def getUserAPI(self, user, req):
         return req.load("http://api.share-online.biz/account.php",
                         {"username": user, "password": self.accounts[user]["password"], "act": "userDetails"})
@@ -33,6 +33,8 @@ class StahnuTo(Account):
 
     #login_timeout = 60
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load("http://www.stahnu.to/")
 
@@ -31,6 +31,8 @@ class UploadedTo(Account):
     __author_name__ = ("mkaay")
     __author_mail__ = ("mkaay@mkaay.de")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
 
         req.load("http://uploaded.net/language/en")
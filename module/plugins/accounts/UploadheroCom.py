@@ -16,6 +16,8 @@ class UploadheroCom(Account):
     __author_name__ = ("mcmyst")
     __author_mail__ = ("mcmyst@hotmail.fr")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         premium_pattern = re.compile('Il vous reste <span class="bleu">([0-9]+)</span> jours premium.')
 
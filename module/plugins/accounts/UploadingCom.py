@@ -31,6 +31,8 @@ class UploadingCom(Account):
     __author_name__ = ("mkaay")
     __author_mail__ = ("mkaay@mkaay.de")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         src = req.load("http://uploading.com/")
         premium = True
@@ -36,6 +36,8 @@ class WarserverCz(Account):
 
     DOMAIN = "http://www.warserver.cz"
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         html = req.load("%s/uzivatele/prehled" % self.DOMAIN, decode=True)
 
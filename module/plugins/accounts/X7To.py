@@ -31,6 +31,8 @@ class X7To(Account):
     __author_name__ = ("ernieb")
     __author_mail__ = ("ernieb")
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         page = req.load("http://www.x7.to/my")
 
@@ -32,6 +32,8 @@ class YibaishiwuCom(Account):
 
     ACCOUNT_INFO_PATTERN = r'var USER_PERMISSION = {(.*?)}'
 
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):
         #self.relogin(user)
         html = req.load("http://115.com/", decode=True)
@@ -129,14 +129,10 @@ class LinksaveIn(OCR):
         self.clean(4)
         self.image.save(self.data_dir+"cleaned_pass2.png")
         letters = self.split_captcha_letters()
-        final = ""
         for n, letter in enumerate(letters):
-            self.image = letter
-            self.image.save(ocr.data_dir+"letter%d.png" % n)
-            self.run_tesser(True, True, False, False)
-            final += self.result_captcha
-        
-        return final
+            letter.save(self.data_dir+"letter%d.png" % n)
+
+        return "".join(self.run_tesser_batch(letters, True, True, False, False))
 
 if __name__ == '__main__':
     import urllib
@@ -36,13 +36,7 @@ class ShareonlineBiz(OCR):
 
         letters = self.split_captcha_letters()
         
-        final = ""
-        for letter in letters:
-            self.image = letter
-            self.run_tesser(True, True, False, False)
-            final += self.result_captcha
-
-        return final
+        return "".join(self.run_tesser_batch(letters, True, True, False, False))
 
         #tesseract at 60%
 
@@ -22,6 +22,7 @@ import os
 from os.path import join
 from os.path import abspath
 import logging
+import re
 import subprocess
 #import tempfile
 
@@ -31,10 +32,21 @@ import PngImagePlugin
 import GifImagePlugin
 import JpegImagePlugin
 
+try:
+    import numpy
+except ImportError: #pixels are processed one by one
+    numpy = None
+
+#neighbours (dx, dy) in the order clean() looks at them, the first one outside of the image stops counting
+NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
 
 class OCR(object):
     
     __name__ = "OCR"
+
+    #(major, minor) of the installed tesseract, (0, 0) if unknown
+    tesser_version = None
     
     def __init__(self):
         self.logger = logging.getLogger("log")
@@ -68,20 +80,86 @@ class OCR(object):
         #tmp = tempfile.NamedTemporaryFile(suffix=".tif")
         tmp = open(join("tmp", "tmpTif_%s.tif" % self.__name__), "wb")
         tmp.close()
-        #self.logger.debug("create tmp txt")
-        #tmpTxt = tempfile.NamedTemporaryFile(suffix=".txt")
-        tmpTxt = open(join("tmp", "tmpTxt_%s.txt" % self.__name__), "wb")
-        tmpTxt.close()
         
         self.logger.debug("save tiff")
         self.image.save(tmp.name, 'TIFF')
 
+        self.result_captcha = self.tesser(tmp.name, subset, digits, lowercase, uppercase).replace("\n", "")
+
+        self.logger.debug(self.result_captcha)
+        try:
+            os.remove(tmp.name)
+        except:
+            pass
+
+    def run_tesser_batch(self, images, subset=False, digits=True, lowercase=True, uppercase=True):
+        """ returns the text of every image, recognized by one tesseract run if it can read a list of images """
+        if len(images) > 1 and self.get_tesser_version() >= (3, 4):
+            names = []
+            for i, image in enumerate(images):
+                names.append(join("tmp", "tmpTif_%s_%d.tif" % (self.__name__, i)))
+                image.save(names[-1], 'TIFF')
+
+            tmpList = open(join("tmp", "tmpList_%s.txt" % self.__name__), "wb")
+            tmpList.write("".join(["%s\n" % abspath(x) for x in names]))
+            tmpList.close()
+
+            # pages are separated by form feeds
+            pages = self.tesser(tmpList.name, subset, digits, lowercase, uppercase).split("\f")
+            if pages and not pages[-1].strip():
+                pages.pop()
+
+            for name in names + [tmpList.name]:
+                try:
+                    os.remove(name)
+                except:
+                    pass
+
+            if len(pages) == len(images):
+                results = [x.replace("\n", "") for x in pages]
+                self.logger.debug(results)
+                return results
+
+            self.logger.debug("Tesseract returned %d pages for %d images" % (len(pages), len(images)))
+
+        image = self.image
+        results = []
+        for letter in images:
+            self.image = letter
+            self.run_tesser(subset, digits, lowercase, uppercase)
+            results.append(self.result_captcha)
+        self.image = image
+
+        return results
+
+    def tesser_command(self):
         if os.name == "nt":
-            tessparams = [join(pypath,"tesseract","tesseract.exe")]
+            return [join(pypath,"tesseract","tesseract.exe")]
         else:
-            tessparams = ['tesseract']
-        
-        tessparams.extend( [abspath(tmp.name), abspath(tmpTxt.name).replace(".txt", "")] )
+            return ['tesseract']
+
+    def get_tesser_version(self):
+        if OCR.tesser_version is None:
+            try:
+                p = subprocess.Popen(self.tesser_command() + ["-v"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                m = re.search(r"tesseract\s+v?(\d+)\.(\d+)", "".join(p.communicate()))
+                OCR.tesser_version = (int(m.group(1)), int(m.group(2))) if m else (0, 0)
+            except OSError:
+                OCR.tesser_version = (0, 0)
+
+            self.logger.debug("Tesseract version %d.%d" % OCR.tesser_version)
+
+        return OCR.tesser_version
+
+    def tesser(self, image, subset, digits, lowercase, uppercase):
+        """ runs tesseract for an image file or a list of them, returns the text """
+        #self.logger.debug("create tmp txt")
+        #tmpTxt = tempfile.NamedTemporaryFile(suffix=".txt")
+        tmpTxt = open(join("tmp", "tmpTxt_%s.txt" % self.__name__), "wb")
+        tmpTxt.close()
+
+        tessparams = self.tesser_command()
+        tessparams.extend( [abspath(image), abspath(tmpTxt.name).replace(".txt", "")] )
 
         if subset and (digits or lowercase or uppercase):
             #self.logger.debug("create temp subset config")
@@ -105,18 +183,18 @@ class OCR(object):
 
         try:
             with open(tmpTxt.name, 'r') as f:
-                self.result_captcha = f.read().replace("\n", "")
+                text = f.read()
         except:
-            self.result_captcha = ""
+            text = ""
 
-        self.logger.debug(self.result_captcha)
         try:
-            os.remove(tmp.name)
             os.remove(tmpTxt.name)
             if subset and (digits or lowercase or uppercase):
                 os.remove(tmpSub.name)
         except:
             pass
+
+        return text
         
     def get_captcha(self, name):
         raise NotImplementedError
@@ -127,7 +205,22 @@ class OCR(object):
 
         self.pixels = self.image.load()
 
+    def get_array(self):
+        """ copy of a greyscale image as numpy array, indexed [y, x]. None if the pixels have to be used """
+        if numpy is None or self.image.mode != 'L':
+            return None
+        return numpy.array(self.image)
+
+    def set_array(self, a):
+        self.image = Image.fromarray(a.astype(numpy.uint8), 'L')
+        self.pixels = self.image.load()
+
     def eval_black_white(self, limit):
+        a = self.get_array()
+        if a is not None:
+            self.set_array(numpy.where(a > limit, 255, 0))
+            return
+
         self.pixels = self.image.load()
         w, h = self.image.size
         for x in xrange(w):
@@ -138,6 +231,24 @@ class OCR(object):
                     self.pixels[x, y] = 0
 
     def clean(self, allowed):
+        a = self.get_array()
+        if a is not None:
+            h, w = a.shape
+            dark = numpy.zeros((h + 2, w + 2), bool)
+            dark[1:-1, 1:-1] = a != 255
+            ys, xs = numpy.mgrid[0:h, 0:w]
+
+            count = numpy.zeros((h, w), int)
+            inside = numpy.ones((h, w), bool)
+            for dx, dy in NEIGHBOURS:
+                inside &= (xs + dx >= 0) & (xs + dx < w) & (ys + dy >= 0) & (ys + dy < h)
+                count += inside & dark[1 + dy:h + 1 + dy, 1 + dx:w + 1 + dx]
+
+            # pixels that were 1 before are made white too, like in the second pass below
+            a[(a != 255) & (count < allowed) | (a == 1)] = 255
+            self.set_array(a)
+            return
+
         pixels = self.pixels
 
         w, h = self.image.size
@@ -175,6 +286,32 @@ class OCR(object):
     def derotate_by_average(self):
         """rotate by checking each angle and guess most suitable"""
 
+        a = self.get_array()
+        if a is not None:
+            a[a == 0] = 155
+            self.set_array(a)
+
+            highest = {}
+            for angle in range(-45, 45):
+                # pixels per column, the columns without any are left out of the average
+                count = (numpy.asarray(self.image.rotate(angle)) == 155).sum(0)
+                used = count[count > 0]
+                highest[angle] = int(count.max()) - int(used.sum()) / len(used)
+
+            hkey = 0
+            hvalue = 0
+
+            for key, value in highest.iteritems():
+                if value > hvalue:
+                    hkey = key
+                    hvalue = value
+
+            a = numpy.array(self.image.rotate(hkey))
+            a[a == 0] = 255
+            a[a == 155] = 0
+            self.set_array(a)
+            return
+
         w, h = self.image.size
         pixels = self.pixels
 
@@ -250,6 +387,28 @@ class OCR(object):
         captcha = self.image
         started = False
         letters = []
+
+        a = self.get_array()
+        if a is not None:
+            dark = a != 255
+            for x, black_pixel_in_col in enumerate(dark.any(0)):
+                if black_pixel_in_col and not started:
+                    started = True
+                    firstX = x
+
+                elif not black_pixel_in_col and started:
+                    rows = numpy.flatnonzero(dark[:, firstX:x].any(1))
+                    rect = (firstX, int(rows[0]), x - 1, int(rows[-1]))
+                    new_captcha = captcha.crop(rect)
+
+                    w, h = new_captcha.size
+                    if w > 5 and h > 5:
+                        letters.append(new_captcha)
+
+                    started = False
+
+            return letters
+
         width, height = captcha.size
         bottomY, topY = 0, height
         pixels = captcha.load()
@@ -46,7 +46,7 @@ def computeChecksum(local_file, algorithm):
             for chunk in iter(lambda: f.read(8192), ''):
                 last = hf(chunk, last)
 
-        return "%x" % last
+        return "%x" % (last & 0xffffffff)
 
     else:
         return None
@@ -54,7 +54,7 @@ def computeChecksum(local_file, algorithm):
 
 class Checksum(Hook):
     __name__ = "Checksum"
-    __version__ = "0.10"
+    __version__ = "0.11"
     __description__ = "Verify downloaded file size and checksum (enable in general preferences)"
     __config__ = [("activated", "bool", "Activated", True),
                   ("action", "fail;retry;nothing", "What to do if check fails?", "retry"),
@@ -82,7 +82,9 @@ class Checksum(Hook):
         Compute checksum for the downloaded file and compare it with the hash provided by the hoster.
         pyfile.plugin.check_data should be a dictionary which can contain:
         a) if known, the exact filesize in bytes (e.g. "size": 123456789)
-        b) hexadecimal hash string with algorithm name as key (e.g. "md5": "d76505d0869f9f928a17d42d66326307")    
+        b) hexadecimal hash string with algorithm name as key (e.g. "md5": "d76505d0869f9f928a17d42d66326307")
+        When check_data is set before the download starts, the checksum is computed while downloading
+        and the file doesn't need to be read again.
         """
         if hasattr(pyfile.plugin, "check_data") and (isinstance(pyfile.plugin.check_data, dict)):
             data = pyfile.plugin.check_data.copy()
@@ -119,7 +121,10 @@ class Checksum(Hook):
 
             for key in self.algorithms:
                 if key in data:
-                    checksum = computeChecksum(local_file, key.replace("-", "").lower())
+                    algorithm = key.replace("-", "").lower()
+                    # computed while downloading, if the hash was known before
+                    checksum = getattr(pyfile.plugin, "lastChecksums", {}).get(algorithm) or \
+                               computeChecksum(local_file, algorithm)
                     if checksum:
                         if checksum == data[key].lower():
                             self.logInfo('File integrity of "%s" verified by %s checksum (%s).' % (pyfile.name,
@@ -5,6 +5,7 @@ import sys
 import os
 from os import remove, chmod, makedirs
 from os.path import exists, basename, isfile, isdir, join
+from threading import Lock, Semaphore, Thread
 from traceback import print_exc
 from copy import copy
 
@@ -59,7 +60,7 @@ class ExtractArchive(Hook):
     Provides: unrarFinished (folder, filename)
     """
     __name__ = "ExtractArchive"
-    __version__ = "0.16"
+    __version__ = "0.17"
     __description__ = "Extract different kind of archives"
     __config__ = [("activated", "bool", "Activated", True),
                   ("fullpath", "bool", "Extract full path", True),
@@ -71,12 +72,16 @@ class ExtractArchive(Hook):
                   ("excludefiles", "str", "Exclude files from unpacking (seperated by ;)", ""),
                   ("recursive", "bool", "Extract archives in archvies", True),
                   ("queue", "bool", "Wait for all downloads to be finished", True),
+                  ("threads", "int", "Archives extracted at the same time", 2),
                   ("renice", "int", "CPU Priority", 0)]
     __author_name__ = ("pyload Team", "AndroKev")
     __author_mail__ = ("admin<at>pyload.org", "@pyloadforum")
 
     event_list = ["allDownloadsProcessed"]
 
+    #: passwords tested at the same time
+    password_threads = 4
+
     def setup(self):
         self.plugins = []
         self.passwords = []
@@ -111,6 +116,11 @@ class ExtractArchive(Hook):
         # queue with package ids
         self.queue = []
 
+        self.lock = Lock()
+        self.slots = Semaphore(max(1, self.getConfig("threads")))
+        # package id -> archives that were extracted as soon as their parts were downloaded
+        self.early = {}
+
     @Expose
     def extractPackage(self, id):
         """ Extract package with given id"""
@@ -127,23 +137,69 @@ class ExtractArchive(Hook):
     def allDownloadsProcessed(self, thread):
         local = copy(self.queue)
         del self.queue[:]
-        self.extract(local, thread)
+        self.extract(local, thread=thread)
 
-    def extract(self, ids, thread=None):
-        # reload from txt file
-        self.reloadPasswords()
+    def downloadFinished(self, pyfile):
+        """ archives whose parts are all downloaded are extracted before the rest of the package """
+        if self.getConfig("queue"):
+            return
 
-        # dl folder
+        p = pyfile.package()
         dl = self.config['general']['download_folder']
+        name = save_join(dl, p.folder, pyfile.name)
+
+        done, missing = [], []
+        for x in p.getChildren().itervalues():
+            if x["id"] == pyfile.id or x["status"] in (0, 4): #finished or skipped
+                done.append((save_join(dl, p.folder, x["name"]), x["id"]))
+            else:
+                missing.append(save_join(dl, p.folder, x["name"]))
 
-        extracted = []
+        targets = []
+        self.lock.acquire()
+        try:
+            early = self.early.setdefault(p.id, set())
+            for plugin in self.plugins:
+                for target, fid in plugin.getTargets(done):
+                    if target in early or not plugin.isPart(target, name):
+                        continue
+                    if [x for x in missing if plugin.isPart(target, x)]:
+                        continue
+
+                    early.add(target)
+                    targets.append((target, fid))
+        finally:
+            self.lock.release()
+
+        if targets:
+            self.manager.startThread(self.extract, [p.id], targets)
+
+    def extract(self, ids, targets=None, thread=None):
+        """ extracts the packages, archives are extracted in parallel up to the configured number at once
+
+        :param targets: (file, id) of archives to extract, instead of all archives of the packages
+        """
+        # reload from txt file
+        self.reloadPasswords()
+
+        jobs = [] # threads extracting an archive, they add jobs for archives found in archives
 
-        #iterate packages -> plugins -> targets
         for pid in ids:
             p = self.core.files.getPackage(pid)
-            self.logInfo(_("Check package %s") % p.name)
             if not p:
                 continue
+            self.logInfo(_("Check package %s") % p.name)
+
+            self.lock.acquire()
+            if targets:
+                extracted = set()
+            else:
+                # the ones extracted before are skipped
+                extracted = self.early.pop(pid, set())
+            self.lock.release()
+
+            # dl folder
+            dl = self.config['general']['download_folder']
 
             # determine output folder
             out = save_join(dl, p.folder, "")
@@ -160,52 +216,75 @@ class ExtractArchive(Hook):
                 if not exists(out):
                     makedirs(out)
 
-            files_ids = [(save_join(dl, p.folder, x["name"]), x["id"]) for x in p.getChildren().itervalues()]
-            matched = False
-
-            # check as long there are unseen files
-            while files_ids:
-                new_files_ids = []
-
-                for plugin in self.plugins:
-                    targets = plugin.getTargets(files_ids)
-                    if targets:
-                        self.logDebug("Targets for %s: %s" % (plugin.__name__, targets))
-                        matched = True
-                    for target, fid in targets:
-                        if target in extracted:
-                            self.logDebug(basename(target), "skipped")
-                            continue
-                        extracted.append(target)  # prevent extracting same file twice
-
-                        klass = plugin(self, target, out, self.getConfig("fullpath"), self.getConfig("overwrite"), self.getConfig("excludefiles"),
-                                       self.getConfig("renice"))
-                        klass.init()
-
-                        self.logInfo(basename(target), _("Extract to %s") % out)
-                        new_files = self.startExtracting(klass, fid, p.password.strip().splitlines(), thread)
-                        self.logDebug("Extracted: %s" % new_files)
-                        self.setPermissions(new_files)
-
-                        for file in new_files:
-                            if not exists(file):
-                                self.logDebug("new file %s does not exists" % file)
-                                continue
-                            if self.getConfig("recursive") and isfile(file):
-                                new_files_ids.append((file, fid))  # append as new target
-
-                files_ids = new_files_ids  # also check extracted files
-
-            if not matched:
+            files_ids = targets or [(save_join(dl, p.folder, x["name"]), x["id"]) for x in p.getChildren().itervalues()]
+
+            if not self.startTargets(files_ids, p, out, extracted, jobs, thread):
                 self.logInfo(_("No files found to extract"))
 
+        while jobs:
+            jobs.pop(0).join()
+
+    def startTargets(self, files_ids, p, out, extracted, jobs, thread):
+        """ starts extracting all archives in files_ids, waits for a free slot if needed.
+        Returns True if there were any archives """
+        matched = False
+
+        for plugin in self.plugins:
+            targets = plugin.getTargets(files_ids)
+            if targets:
+                self.logDebug("Targets for %s: %s" % (plugin.__name__, targets))
+                matched = True
+            for target, fid in targets:
+                self.lock.acquire()
+                try:
+                    if target in extracted:
+                        self.logDebug(basename(target), "skipped")
+                        continue
+                    extracted.add(target)  # prevent extracting same file twice
+                finally:
+                    self.lock.release()
+
+                self.slots.acquire()
+                t = Thread(target=self.extractTarget, args=(plugin, target, fid, p, out, extracted, jobs, thread))
+                t.setDaemon(True)
+                jobs.append(t)
+                t.start()
+
+        return matched
+
+    def extractTarget(self, plugin, target, fid, p, out, extracted, jobs, thread):
+        try:
+            klass = plugin(self, target, out, self.getConfig("fullpath"), self.getConfig("overwrite"), self.getConfig("excludefiles"),
+                           self.getConfig("renice"))
+            klass.init()
+
+            self.logInfo(basename(target), _("Extract to %s") % out)
+            new_files = self.startExtracting(klass, fid, p.password.strip().splitlines(), thread)
+            self.logDebug("Extracted: %s" % new_files)
+            self.setPermissions(new_files)
+        finally:
+            self.slots.release()
+
+        new_files_ids = []
+        for file in new_files:
+            if not exists(file):
+                self.logDebug("new file %s does not exists" % file)
+                continue
+            if self.getConfig("recursive") and isfile(file):
+                new_files_ids.append((file, fid))  # append as new target
+
+        # also check extracted files
+        if new_files_ids:
+            self.startTargets(new_files_ids, p, out, extracted, jobs, thread)
+
     def startExtracting(self, plugin, fid, passwords, thread):
         pyfile = self.core.files.getFile(fid)
         if not pyfile:
             return []
 
         pyfile.setCustomStatus(_("extracting"))
-        thread.addActive(pyfile)  # keep this file until everything is done
+        if thread:
+            thread.addActive(pyfile)  # keep this file until everything is done
 
         try:
             progress = lambda x: pyfile.setProgress(x)
@@ -224,14 +303,13 @@ class ExtractArchive(Hook):
                     if pw in pwlist:
                         pwlist.remove(pw)
 
-                for pw in passwords + pwlist:
+                for pw in self.testPasswords(plugin, passwords + pwlist):
                     try:
                         self.logDebug("Try password: %s" % pw)
-                        if plugin.checkPassword(pw):
-                            plugin.extract(progress, pw)
-                            self.addPassword(pw)
-                            success = True
-                            break
+                        plugin.extract(progress, pw)
+                        self.addPassword(pw)
+                        success = True
+                        break
                     except WrongPassword:
                         self.logDebug("Password was wrong")
 
@@ -267,6 +345,27 @@ class ExtractArchive(Hook):
 
         return []
 
+    def testPasswords(self, plugin, passwords):
+        """ yields the passwords that may be right in the given order, they are checked in parallel """
+        n = self.password_threads
+        for i in range(0, len(passwords), n):
+            batch = passwords[i:i + n]
+            results = [True] * len(batch)
+
+            def check(j):
+                try:
+                    results[j] = plugin.checkPassword(batch[j])
+                except Exception, e:
+                    self.logDebug("Password check failed", str(e)) #extracting will tell
+
+            threads = [Thread(target=check, args=(j,)) for j in range(len(batch))]
+            for t in threads: t.start()
+            for t in threads: t.join()
+
+            for pw, result in zip(batch, results):
+                if result:
+                    yield pw
+
     @Expose
     def getPasswords(self):
         """ List of saved passwords """
@@ -290,14 +389,18 @@ class ExtractArchive(Hook):
         """  Adds a password to saved list"""
         pwfile = self.getConfig("passwordfile")
 
-        if pw in self.passwords:
-            self.passwords.remove(pw)
-        self.passwords.insert(0, pw)
-
-        f = open(pwfile, "wb")
-        for pw in self.passwords:
-            f.write(pw + "\n")
-        f.close()
+        self.lock.acquire()
+        try:
+            if pw in self.passwords:
+                self.passwords.remove(pw)
+            self.passwords.insert(0, pw)
+
+            f = open(pwfile, "wb")
+            for pw in self.passwords:
+                f.write(pw + "\n")
+            f.close()
+        finally:
+            self.lock.release()
 
     def setPermissions(self, files):
         for f in files:
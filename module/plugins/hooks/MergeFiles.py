@@ -22,17 +22,15 @@ import re
 import traceback
 
 from os.path import join
-from module.utils import save_join, fs_encode
+from module.utils import save_join, fs_encode, appendFile
 from module.plugins.Hook import Hook
 
-BUFFER_SIZE = 4096
-
-
 class MergeFiles(Hook):
     __name__ = "MergeFiles"
-    __version__ = "0.12"
+    __version__ = "0.13"
     __description__ = "Merges parts splitted with hjsplit"
-    __config__ = [("activated", "bool", "Activated", "False")]
+    __config__ = [("activated", "bool", "Activated", "False"),
+                  ("remove", "bool", "Remove parts after merging", "False")]
     __threaded__ = ["packageFinished"]
     __author_name__ = ("and9000")
     __author_mail__ = ("me@has-no-mail.com")
@@ -59,32 +57,40 @@ class MergeFiles(Hook):
 
         for name, file_list in files.iteritems():
             self.logInfo("Starting merging of %s" % name)
-            final_file = open(join(download_folder, fs_encode(name)), "wb")
+            final_name = join(download_folder, fs_encode(name))
+            final_file = open(final_name, "wb")
+            parts = []
 
             for splitted_file in file_list:
                 self.logDebug("Merging part %s" % splitted_file)
                 pyfile = self.core.files.getFile(fid_dict[splitted_file])
                 pyfile.setStatus("processing")
                 try:
-                    s_file = open(os.path.join(download_folder, splitted_file), "rb")
-                    size_written = 0
-                    s_file_size = int(os.path.getsize(os.path.join(download_folder, splitted_file)))
-                    while True:
-                        f_buffer = s_file.read(BUFFER_SIZE)
-                        if f_buffer:
-                            final_file.write(f_buffer)
-                            size_written += BUFFER_SIZE
-                            pyfile.setProgress((size_written * 100) / s_file_size)
-                        else:
-                            break
-                    s_file.close()
+                    part = join(download_folder, fs_encode(splitted_file))
+                    size = os.path.getsize(part) or 1
+                    appendFile(final_file, part, lambda done: pyfile.setProgress((done * 100) / size))
+                    parts.append(part)
                     self.logDebug("Finished merging part %s" % splitted_file)
                 except Exception, e:
-                    print traceback.print_exc()
+                    self.logError("Merging part %s failed: %s" % (splitted_file, e))
+                    if self.core.debug:
+                        traceback.print_exc()
+                    break
                 finally:
                     pyfile.setProgress(100)
                     pyfile.setStatus("finished")
                     pyfile.release()
 
             final_file.close()
+
+            if len(parts) < len(file_list):
+                #the merged file would be corrupt, all parts are kept to merge them again
+                os.remove(final_name)
+                self.logError("Merging of %s failed, parts were kept" % name)
+                continue
+
+            if self.getConfig("remove"):
+                for part in parts:
+                    os.remove(part)
+
             self.logInfo("Finished merging of %s" % name)
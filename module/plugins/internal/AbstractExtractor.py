@@ -29,6 +29,13 @@ class AbtractExtractor:
         """
         raise NotImplementedError
 
+    @staticmethod
+    def isPart(target, file):
+        """ Check if file is a part of the archive target, e.g. a volume
+        :return: boolean
+        """
+        return file == target
+
 
     def __init__(self, m, file, out, fullpath, overwrite, excludefiles, renice):
         """Initialize extractor for specific file
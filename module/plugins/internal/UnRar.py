@@ -22,20 +22,20 @@ import re
 from os.path import join
 from glob import glob
 from subprocess import Popen, PIPE
-from string import digits
 
 from module.utils import save_join, decode
 from module.plugins.internal.AbstractExtractor import AbtractExtractor, WrongPassword, ArchiveError, CRCError
 
 class UnRar(AbtractExtractor):
     __name__ = "UnRar"
-    __version__ = "0.14"
+    __version__ = "0.15"
 
     # there are some more uncovered rar formats
     re_splitfile = re.compile(r"(.*)\.part(\d+)\.rar$", re.I)
     re_partfiles = re.compile(r".*\.(rar|r[0-9]+)", re.I)
     re_filelist = re.compile(r"(.+)\s+(\d+)\s+(\d+)\s+")
-    re_wrongpwd = re.compile("(Corrupt file or wrong password|password incorrect)", re.I)
+    re_wrongpwd = re.compile("(Corrupt file or wrong password|password incorrect|password is incorrect|incorrect password)", re.I)
+    re_progress = re.compile(r"(\d+)%")
     CMD = "unrar"
 
     @staticmethod
@@ -74,6 +74,16 @@ class UnRar(AbtractExtractor):
 
         return result
 
+    @staticmethod
+    def isPart(target, file):
+        match = UnRar.re_splitfile.match(target)
+        if match:
+            other = UnRar.re_splitfile.match(file)
+            return bool(other) and other.group(1) == match.group(1)
+
+        base = target[:-len(".rar")]
+        return file == target or (file[:len(base)] == base and re.match(r"\.r\d+$", file[len(base):], re.I) is not None)
+
 
     def init(self):
         self.passwordProtected = False
@@ -90,10 +100,12 @@ class UnRar(AbtractExtractor):
             return True
 
         # output only used to check if passworded files are present
-        for name, size, packed in  self.re_filelist.findall(out):
-            if name.startswith("*"):
-                self.passwordProtected = True
-                return True
+        encrypted = [(int(size), name[1:].strip()) for name, size, packed in self.re_filelist.findall(out)
+                     if name.startswith("*")]
+        if encrypted:
+            self.passwordProtected = True
+            self.smallestFile = min(encrypted)[1] #passwords are tested by extracting this one
+            return True
 
         self.listContent()
         if not self.files:
@@ -102,13 +114,19 @@ class UnRar(AbtractExtractor):
         return False
 
     def checkPassword(self, password):
-        #at this point we can only verify header protected files
         if self.headerProtected:
             p = self.call_unrar("l", "-v", self.file, password=password)
             out, err = p.communicate()
             if self.re_wrongpwd.search(err):
                 return False
 
+        elif self.smallestFile:
+            #testing the smallest file is much faster than extracting everything with a wrong password
+            p = self.call_unrar("t", self.file, self.smallestFile, password=password)
+            out, err = p.communicate()
+            if self.re_wrongpwd.search(err) or "CRC failed" in err:
+                return False
+
         return True
 
 
@@ -119,22 +137,20 @@ class UnRar(AbtractExtractor):
         renice(p.pid, self.renice)
 
         progress(0)
-        progressstring = ""
+        buf = ""
+        fd = p.stdout.fileno()
         while True:
-            c = p.stdout.read(1)
+            data = os.read(fd, 4096)
             # quit loop on eof
-            if not c:
+            if not data:
                 break
-            # reading a percentage sign -> set progress and restart
-            if c == '%':
-                progress(int(progressstring))
-                progressstring = ""
-            # not reading a digit -> therefore restart
-            elif c not in digits:
-                progressstring = ""
-            # add digit to progressstring
-            else:
-                progressstring = progressstring + c
+            buf += data
+            # only the latest percentage is interesting
+            values = self.re_progress.findall(buf)
+            if values:
+                progress(int(values[-1]))
+            # keep digits that may belong to the next percentage
+            buf = re.search(r"\d*$", buf).group()
         progress(100)
 
         # retrieve stderr
@@ -214,3 +230,10 @@ def renice(pid, value):
             Popen(["renice", str(value), str(pid)], stdout=PIPE, stderr=PIPE, bufsize=-1)
         except:
             print "Renice failed"
+
+        # lower io priority too, so downloads are not slowed down by extracting
+        if value > 0:
+            try:
+                Popen(["ionice", "-c2", "-n7", "-p", str(pid)], stdout=PIPE, stderr=PIPE, bufsize=-1)
+            except:
+                pass
@@ -36,6 +36,8 @@ class XFSPAccount(Account):
     VALID_UNTIL_PATTERN = r'>Premium.[Aa]ccount expire:</TD><TD><b>([^<]+)</b>'
     TRAFFIC_LEFT_PATTERN = r'>Traffic available today:</TD><TD><b>([^<]+)</b>'
         
+    reuse_session = True
+
     def loadAccountInfo(self, user, req):      
         html = req.load(self.MAIN_PAGE + "?op=my_account", decode = True)
         
@@ -109,6 +109,13 @@ class DownloadInfo(BaseObject):
 		self.packageName = packageName
 		self.plugin = plugin
 
+class EventBatch(BaseObject):
+	__slots__ = ['seq', 'events']
+
+	def __init__(self, seq=None, events=None):
+		self.seq = seq
+		self.events = events
+
 class EventInfo(BaseObject):
 	__slots__ = ['eventname', 'id', 'type', 'destination']
 
@@ -154,6 +161,15 @@ class InteractionTask(BaseObject):
 		self.description = description
 		self.plugin = plugin
 
+class LogEntry(BaseObject):
+	__slots__ = ['line', 'date', 'level', 'message']
+
+	def __init__(self, line=None, date=None, level=None, message=None):
+		self.line = line
+		self.date = date
+		self.level = level
+		self.message = message
+
 class OnlineCheck(BaseObject):
 	__slots__ = ['rid', 'data']
 
@@ -294,6 +310,8 @@ class Iface:
 		pass
 	def getLog(self, offset):
 		pass
+	def getLogCount(self):
+		pass
 	def getPackageData(self, pid):
 		pass
 	def getPackageInfo(self, pid):
@@ -306,6 +324,8 @@ class Iface:
 		pass
 	def getQueueData(self):
 		pass
+	def getServerStats(self):
+		pass
 	def getServerVersion(self):
 		pass
 	def getServices(self):
@@ -342,6 +362,8 @@ class Iface:
 		pass
 	def pushToQueue(self, pid):
 		pass
+	def queryLog(self, offset, limit, level, start, end, plugin, fid):
+		pass
 	def recheckPackage(self, pid):
 		pass
 	def removeAccount(self, plugin, account):
@@ -380,4 +402,6 @@ class Iface:
 		pass
 	def uploadContainer(self, filename, data):
 		pass
+	def waitEvents(self, uuid, seq, timeout):
+		pass
 
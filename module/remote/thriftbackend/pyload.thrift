@@ -163,6 +163,18 @@ struct EventInfo {
   4: optional Destination destination
 }
 
+struct EventBatch {
+  1: i32 seq,
+  2: list<EventInfo> events
+}
+
+struct LogEntry {
+  1: i32 line,
+  2: string date,
+  3: string level,
+  4: string message
+}
+
 struct UserData {
   1: string name,
   2: string email,
@@ -237,9 +249,12 @@ service Pyload {
   ServerStatus statusServer(),
   i64 freeSpace(),
   string getServerVersion(),
+  map<string, map<string, double>> getServerStats(),
   void kill(),
   void restart(),
   list<string> getLog(1: i32 offset),
+  i32 getLogCount(),
+  list<LogEntry> queryLog(1: i32 offset, 2: i32 limit, 3: string level, 4: string start, 5: string end, 6: PluginName plugin, 7: FileID fid),
   bool isTimeDownload(),
   bool isTimeReconnect(),
   bool toggleReconnect(),
@@ -296,7 +311,8 @@ service Pyload {
   void restartFailed(),
 
   //events
-  list<EventInfo> getEvents(1: string uuid)
+  list<EventInfo> getEvents(1: string uuid),
+  EventBatch waitEvents(1: string uuid, 2: i32 seq, 3: i32 timeout)
   
   //accounts
   list<AccountInfo> getAccounts(1: bool refresh),
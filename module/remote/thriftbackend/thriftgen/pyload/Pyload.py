@@ -56,6 +56,9 @@ class Iface(object):
   def getServerVersion(self, ):
     pass
 
+  def getServerStats(self, ):
+    pass
+
   def kill(self, ):
     pass
 
@@ -69,6 +72,22 @@ class Iface(object):
     """
     pass
 
+  def getLogCount(self, ):
+    pass
+
+  def queryLog(self, offset, limit, level, start, end, plugin, fid):
+    """
+    Parameters:
+     - offset
+     - limit
+     - level
+     - start
+     - end
+     - plugin
+     - fid
+    """
+    pass
+
   def isTimeDownload(self, ):
     pass
 
@@ -326,6 +345,15 @@ class Iface(object):
     """
     pass
 
+  def waitEvents(self, uuid, seq, timeout):
+    """
+    Parameters:
+     - uuid
+     - seq
+     - timeout
+    """
+    pass
+
   def getAccounts(self, refresh):
     """
     Parameters:
@@ -698,6 +726,31 @@ class Client(Iface):
       return result.success
     raise TApplicationException(TApplicationException.MISSING_RESULT, "getServerVersion failed: unknown result");
 
+  def getServerStats(self, ):
+    self.send_getServerStats()
+    return self.recv_getServerStats()
+
+  def send_getServerStats(self, ):
+    self._oprot.writeMessageBegin('getServerStats', TMessageType.CALL, self._seqid)
+    args = getServerStats_args()
+    args.write(self._oprot)
+    self._oprot.writeMessageEnd()
+    self._oprot.trans.flush()
+
+  def recv_getServerStats(self, ):
+    (fname, mtype, rseqid) = self._iprot.readMessageBegin()
+    if mtype == TMessageType.EXCEPTION:
+      x = TApplicationException()
+      x.read(self._iprot)
+      self._iprot.readMessageEnd()
+      raise x
+    result = getServerStats_result()
+    result.read(self._iprot)
+    self._iprot.readMessageEnd()
+    if result.success is not None:
+      return result.success
+    raise TApplicationException(TApplicationException.MISSING_RESULT, "getServerStats failed: unknown result");
+
   def kill(self, ):
     self.send_kill()
     self.recv_kill()
@@ -774,6 +827,73 @@ class Client(Iface):
       return result.success
     raise TApplicationException(TApplicationException.MISSING_RESULT, "getLog failed: unknown result");
 
+  def getLogCount(self, ):
+    self.send_getLogCount()
+    return self.recv_getLogCount()
+
+  def send_getLogCount(self, ):
+    self._oprot.writeMessageBegin('getLogCount', TMessageType.CALL, self._seqid)
+    args = getLogCount_args()
+    args.write(self._oprot)
+    self._oprot.writeMessageEnd()
+    self._oprot.trans.flush()
+
+  def recv_getLogCount(self, ):
+    (fname, mtype, rseqid) = self._iprot.readMessageBegin()
+    if mtype == TMessageType.EXCEPTION:
+      x = TApplicationException()
+      x.read(self._iprot)
+      self._iprot.readMessageEnd()
+      raise x
+    result = getLogCount_result()
+    result.read(self._iprot)
+    self._iprot.readMessageEnd()
+    if result.success is not None:
+      return result.success
+    raise TApplicationException(TApplicationException.MISSING_RESULT, "getLogCount failed: unknown result");
+
+  def queryLog(self, offset, limit, level, start, end, plugin, fid):
+    """
+    Parameters:
+     - offset
+     - limit
+     - level
+     - start
+     - end
+     - plugin
+     - fid
+    """
+    self.send_queryLog(offset, limit, level, start, end, plugin, fid)
+    return self.recv_queryLog()
+
+  def send_queryLog(self, offset, limit, level, start, end, plugin, fid):
+    self._oprot.writeMessageBegin('queryLog', TMessageType.CALL, self._seqid)
+    args = queryLog_args()
+    args.offset = offset
+    args.limit = limit
+    args.level = level
+    args.start = start
+    args.end = end
+    args.plugin = plugin
+    args.fid = fid
+    args.write(self._oprot)
+    self._oprot.writeMessageEnd()
+    self._oprot.trans.flush()
+
+  def recv_queryLog(self, ):
+    (fname, mtype, rseqid) = self._iprot.readMessageBegin()
+    if mtype == TMessageType.EXCEPTION:
+      x = TApplicationException()
+      x.read(self._iprot)
+      self._iprot.readMessageEnd()
+      raise x
+    result = queryLog_result()
+    result.read(self._iprot)
+    self._iprot.readMessageEnd()
+    if result.success is not None:
+      return result.success
+    raise TApplicationException(TApplicationException.MISSING_RESULT, "queryLog failed: unknown result");
+
   def isTimeDownload(self, ):
     self.send_isTimeDownload()
     return self.recv_isTimeDownload()
@@ -1949,6 +2069,40 @@ class Client(Iface):
       return result.success
     raise TApplicationException(TApplicationException.MISSING_RESULT, "getEvents failed: unknown result");
 
+  def waitEvents(self, uuid, seq, timeout):
+    """
+    Parameters:
+     - uuid
+     - seq
+     - timeout
+    """
+    self.send_waitEvents(uuid, seq, timeout)
+    return self.recv_waitEvents()
+
+  def send_waitEvents(self, uuid, seq, timeout):
+    self._oprot.writeMessageBegin('waitEvents', TMessageType.CALL, self._seqid)
+    args = waitEvents_args()
+    args.uuid = uuid
+    args.seq = seq
+    args.timeout = timeout
+    args.write(self._oprot)
+    self._oprot.writeMessageEnd()
+    self._oprot.trans.flush()
+
+  def recv_waitEvents(self, ):
+    (fname, mtype, rseqid) = self._iprot.readMessageBegin()
+    if mtype == TMessageType.EXCEPTION:
+      x = TApplicationException()
+      x.read(self._iprot)
+      self._iprot.readMessageEnd()
+      raise x
+    result = waitEvents_result()
+    result.read(self._iprot)
+    self._iprot.readMessageEnd()
+    if result.success is not None:
+      return result.success
+    raise TApplicationException(TApplicationException.MISSING_RESULT, "waitEvents failed: unknown result");
+
   def getAccounts(self, refresh):
     """
     Parameters:
@@ -2433,9 +2587,12 @@ class Processor(Iface, TProcessor):
     self._processMap["statusServer"] = Processor.process_statusServer
     self._processMap["freeSpace"] = Processor.process_freeSpace
     self._processMap["getServerVersion"] = Processor.process_getServerVersion
+    self._processMap["getServerStats"] = Processor.process_getServerStats
     self._processMap["kill"] = Processor.process_kill
     self._processMap["restart"] = Processor.process_restart
     self._processMap["getLog"] = Processor.process_getLog
+    self._processMap["getLogCount"] = Processor.process_getLogCount
+    self._processMap["queryLog"] = Processor.process_queryLog
     self._processMap["isTimeDownload"] = Processor.process_isTimeDownload
     self._processMap["isTimeReconnect"] = Processor.process_isTimeReconnect
     self._processMap["toggleReconnect"] = Processor.process_toggleReconnect
@@ -2477,6 +2634,7 @@ class Processor(Iface, TProcessor):
     self._processMap["deleteFinished"] = Processor.process_deleteFinished
     self._processMap["restartFailed"] = Processor.process_restartFailed
     self._processMap["getEvents"] = Processor.process_getEvents
+    self._processMap["waitEvents"] = Processor.process_waitEvents
     self._processMap["getAccounts"] = Processor.process_getAccounts
     self._processMap["getAccountTypes"] = Processor.process_getAccountTypes
     self._processMap["updateAccount"] = Processor.process_updateAccount
@@ -2619,6 +2777,17 @@ class Processor(Iface, TProcessor):
     oprot.writeMessageEnd()
     oprot.trans.flush()
 
+  def process_getServerStats(self, seqid, iprot, oprot):
+    args = getServerStats_args()
+    args.read(iprot)
+    iprot.readMessageEnd()
+    result = getServerStats_result()
+    result.success = self._handler.getServerStats()
+    oprot.writeMessageBegin("getServerStats", TMessageType.REPLY, seqid)
+    result.write(oprot)
+    oprot.writeMessageEnd()
+    oprot.trans.flush()
+
   def process_kill(self, seqid, iprot, oprot):
     args = kill_args()
     args.read(iprot)
@@ -2652,6 +2821,28 @@ class Processor(Iface, TProcessor):
     oprot.writeMessageEnd()
     oprot.trans.flush()
 
+  def process_getLogCount(self, seqid, iprot, oprot):
+    args = getLogCount_args()
+    args.read(iprot)
+    iprot.readMessageEnd()
+    result = getLogCount_result()
+    result.success = self._handler.getLogCount()
+    oprot.writeMessageBegin("getLogCount", TMessageType.REPLY, seqid)
+    result.write(oprot)
+    oprot.writeMessageEnd()
+    oprot.trans.flush()
+
+  def process_queryLog(self, seqid, iprot, oprot):
+    args = queryLog_args()
+    args.read(iprot)
+    iprot.readMessageEnd()
+    result = queryLog_result()
+    result.success = self._handler.queryLog(args.offset, args.limit, args.level, args.start, args.end, args.plugin, args.fid)
+    oprot.writeMessageBegin("queryLog", TMessageType.REPLY, seqid)
+    result.write(oprot)
+    oprot.writeMessageEnd()
+    oprot.trans.flush()
+
   def process_isTimeDownload(self, seqid, iprot, oprot):
     args = isTimeDownload_args()
     args.read(iprot)
@@ -3115,6 +3306,17 @@ class Processor(Iface, TProcessor):
     oprot.writeMessageEnd()
     oprot.trans.flush()
 
+  def process_waitEvents(self, seqid, iprot, oprot):
+    args = waitEvents_args()
+    args.read(iprot)
+    iprot.readMessageEnd()
+    result = waitEvents_result()
+    result.success = self._handler.waitEvents(args.uuid, args.seq, args.timeout)
+    oprot.writeMessageBegin("waitEvents", TMessageType.REPLY, seqid)
+    result.write(oprot)
+    oprot.writeMessageEnd()
+    oprot.trans.flush()
+
   def process_getAccounts(self, seqid, iprot, oprot):
     args = getAccounts_args()
     args.read(iprot)
@@ -3582,6 +3784,33 @@ class getServerVersion_result(TBase):
     self.success = success
 
 
+class getServerStats_args(TBase):
+
+  __slots__ = [ 
+   ]
+
+  thrift_spec = (
+  )
+
+
+class getServerStats_result(TBase):
+  """
+  Attributes:
+   - success
+  """
+
+  __slots__ = [ 
+    'success',
+   ]
+
+  thrift_spec = (
+    (0, TType.MAP, 'success', (TType.STRING,None,TType.MAP,(TType.STRING,None,TType.DOUBLE,None)), None, ), # 0
+  )
+
+  def __init__(self, success=None,):
+    self.success = success
+
+
 class kill_args(TBase):
 
   __slots__ = [ 
@@ -3655,6 +3884,93 @@ class getLog_result(TBase):
     self.success = success
 
 
+class getLogCount_args(TBase):
+
+  __slots__ = [ 
+   ]
+
+  thrift_spec = (
+  )
+
+
+class getLogCount_result(TBase):
+  """
+  Attributes:
+   - success
+  """
+
+  __slots__ = [ 
+    'success',
+   ]
+
+  thrift_spec = (
+    (0, TType.I32, 'success', None, None, ), # 0
+  )
+
+  def __init__(self, success=None,):
+    self.success = success
+
+
+class queryLog_args(TBase):
+  """
+  Attributes:
+   - offset
+   - limit
+   - level
+   - start
+   - end
+   - plugin
+   - fid
+  """
+
+  __slots__ = [ 
+    'offset',
+    'limit',
+    'level',
+    'start',
+    'end',
+    'plugin',
+    'fid',
+   ]
+
+  thrift_spec = (
+    None, # 0
+    (1, TType.I32, 'offset', None, None, ), # 1
+    (2, TType.I32, 'limit', None, None, ), # 2
+    (3, TType.STRING, 'level', None, None, ), # 3
+    (4, TType.STRING, 'start', None, None, ), # 4
+    (5, TType.STRING, 'end', None, None, ), # 5
+    (6, TType.STRING, 'plugin', None, None, ), # 6
+    (7, TType.I32, 'fid', None, None, ), # 7
+  )
+
+  def __init__(self, offset=None, limit=None, level=None, start=None, end=None, plugin=None, fid=None,):
+    self.offset = offset
+    self.limit = limit
+    self.level = level
+    self.start = start
+    self.end = end
+    self.plugin = plugin
+    self.fid = fid
+
+class queryLog_result(TBase):
+  """
+  Attributes:
+   - success
+  """
+
+  __slots__ = [ 
+    'success',
+   ]
+
+  thrift_spec = (
+    (0, TType.LIST, 'success', (TType.STRUCT,(LogEntry, LogEntry.thrift_spec)), None, ), # 0
+  )
+
+  def __init__(self, success=None,):
+    self.success = success
+
+
 class isTimeDownload_args(TBase):
 
   __slots__ = [ 
@@ -4978,6 +5294,50 @@ class getEvents_result(TBase):
     self.success = success
 
 
+class waitEvents_args(TBase):
+  """
+  Attributes:
+   - uuid
+   - seq
+   - timeout
+  """
+
+  __slots__ = [ 
+    'uuid',
+    'seq',
+    'timeout',
+   ]
+
+  thrift_spec = (
+    None, # 0
+    (1, TType.STRING, 'uuid', None, None, ), # 1
+    (2, TType.I32, 'seq', None, None, ), # 2
+    (3, TType.I32, 'timeout', None, None, ), # 3
+  )
+
+  def __init__(self, uuid=None, seq=None, timeout=None,):
+    self.uuid = uuid
+    self.seq = seq
+    self.timeout = timeout
+
+class waitEvents_result(TBase):
+  """
+  Attributes:
+   - success
+  """
+
+  __slots__ = [ 
+    'success',
+   ]
+
+  thrift_spec = (
+    (0, TType.STRUCT, 'success', (EventBatch, EventBatch.thrift_spec), None, ), # 0
+  )
+
+  def __init__(self, success=None,):
+    self.success = success
+
+
 class getAccounts_args(TBase):
   """
   Attributes:
@@ -571,6 +571,60 @@ class EventInfo(TBase):
     self.destination = destination
 
 
+class EventBatch(TBase):
+  """
+  Attributes:
+   - seq
+   - events
+  """
+
+  __slots__ = [ 
+    'seq',
+    'events',
+   ]
+
+  thrift_spec = (
+    None, # 0
+    (1, TType.I32, 'seq', None, None, ), # 1
+    (2, TType.LIST, 'events', (TType.STRUCT,(EventInfo, EventInfo.thrift_spec)), None, ), # 2
+  )
+
+  def __init__(self, seq=None, events=None,):
+    self.seq = seq
+    self.events = events
+
+
+class LogEntry(TBase):
+  """
+  Attributes:
+   - line
+   - date
+   - level
+   - message
+  """
+
+  __slots__ = [ 
+    'line',
+    'date',
+    'level',
+    'message',
+   ]
+
+  thrift_spec = (
+    None, # 0
+    (1, TType.I32, 'line', None, None, ), # 1
+    (2, TType.STRING, 'date', None, None, ), # 2
+    (3, TType.STRING, 'level', None, None, ), # 3
+    (4, TType.STRING, 'message', None, None, ), # 4
+  )
+
+  def __init__(self, line=None, date=None, level=None, message=None,):
+    self.line = line
+    self.date = date
+    self.level = level
+    self.message = message
+
+
 class UserData(TBase):
   """
   Attributes:
@@ -113,6 +113,93 @@ def freeSpace(folder):
         return s.f_bsize * s.f_bavail
 
 
+_kernelCopy = None
+
+
+def _getKernelCopy():
+    """ libc functions that copy between files inside the kernel, list of (name, function, errno getter) """
+    global _kernelCopy
+    if _kernelCopy is None:
+        _kernelCopy = []
+        if sys.platform.startswith("linux"):
+            try:
+                import ctypes
+                import ctypes.util
+
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+
+                if hasattr(libc, "copy_file_range"): #glibc >= 2.27, linux >= 4.5
+                    f = libc.copy_file_range
+                    f.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t,
+                                  ctypes.c_uint]
+                    f.restype = ctypes.c_ssize_t
+                    _kernelCopy.append(("copy_file_range", lambda fin, fout, count: f(fin, None, fout, None, count, 0)))
+
+                if hasattr(libc, "sendfile64"): #files as target since linux 2.6.33
+                    g = libc.sendfile64
+                    g.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t]
+                    g.restype = ctypes.c_ssize_t
+                    _kernelCopy.append(("sendfile", lambda fin, fout, count: g(fout, fin, None, count)))
+
+                _kernelCopy = [(name, func, ctypes.get_errno) for name, func in _kernelCopy]
+            except Exception:
+                _kernelCopy = []
+
+    return _kernelCopy
+
+
+def appendFile(fo, source, progressNotify=None, remove=False):
+    """ copies the file source to the current position of the open file fo, the kernel copies the data when possible
+
+    :param progressNotify: called with the number of bytes copied so far
+    :param remove: delete source afterwards
+    :return: number of bytes copied
+    """
+    STEP = 64 << 20 # bytes between progress notifications
+
+    fo.flush()
+    fout = fo.fileno()
+    fin = os.open(source, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fin).st_size
+        done = 0
+        os.lseek(fout, fo.tell(), 0)
+
+        for name, func, errno in _getKernelCopy():
+            n = 0
+            while done < size:
+                n = func(fin, fout, min(STEP, size - done))
+                if n <= 0: break
+                done += n
+                if progressNotify: progressNotify(done)
+
+            if done >= size or n == 0: break
+            #not supported for these files, e.g. across file systems or in append mode, try the next one
+            if errno() not in (9, 18, 22, 38, 95): raise OSError(errno(), os.strerror(errno()))
+
+        #no kernel support or data that was appended while copying
+        last = done
+        while True:
+            data = os.read(fin, 1 << 20)
+            if not data: break
+            done += len(data)
+            while data:
+                data = data[os.write(fout, data):]
+            if progressNotify and done - last >= STEP:
+                progressNotify(done)
+                last = done
+        if progressNotify and done > last: progressNotify(done)
+
+        fo.seek(os.lseek(fout, 0, 1))
+    finally:
+        os.close(fin)
+
+    if remove:
+        os.remove(source)
+
+    return done
+
+
 def uniqify(seq, idfun=None):
 # order preserving
     if idfun is None:
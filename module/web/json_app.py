@@ -4,10 +4,13 @@
 from os.path import join
 from traceback import print_exc
 from shutil import copyfileobj
+from threading import BoundedSemaphore
+from time import time
 
-from bottle import route, request, HTTPError
+from bottle import route, request, response, HTTPError, json_dumps
 
 from webinterface import PYLOAD
+from module.web import ServerThread
 
 from utils import login_required, render_to_response, toDict
 
@@ -26,6 +29,29 @@ def get_sort_key(item):
     return item["order"]
 
 
+WAITING_THREADS = 2 # threads of the webserver that can be blocked by waiting event requests
+MAX_WAIT = 25 # seconds a long poll waits at most
+STREAM_TIME = 300 # seconds until an event stream is closed, browsers will reconnect
+
+waiting = BoundedSemaphore(WAITING_THREADS)
+
+
+def can_wait():
+    """ single threaded servers can not wait for events """
+    webserver = getattr(ServerThread.core, "webserver", None)
+    return webserver is not None and webserver.server in ("threaded", "fastcgi")
+
+
+def event_client():
+    """ client ids are bound to the session, a page can add its own id to get a separate buffer """
+    s = request.environ.get('beaker.session')
+    uuid = "web_%s" % s.id
+    if request.params.get("uuid"):
+        uuid += "_" + request.params.get("uuid")
+    seq = request.params.get("seq") or request.get_header("Last-Event-ID")
+    return uuid, int(seq) if seq else None
+
+
 @route("/json/status")
 @route("/json/status", method="POST")
 @login_required('LIST')
@@ -38,6 +64,58 @@ def status():
         return HTTPError()
 
 
+@route("/json/events")
+@route("/json/events", method="POST")
+@login_required('LIST')
+def events():
+    """ long poll, returns new events or waits until there are some """
+    try:
+        uuid, seq = event_client()
+        timeout = min(float(request.params.get("timeout", 0)), MAX_WAIT)
+
+        if timeout > 0 and can_wait() and waiting.acquire(False):
+            try:
+                batch = PYLOAD.waitEvents(uuid, seq, timeout)
+            finally:
+                waiting.release()
+        else:
+            batch = PYLOAD.waitEvents(uuid, seq)
+
+        response.headers['Cache-Control'] = "no-cache"
+        return {"seq": batch.seq, "events": [toDict(x) for x in batch.events]}
+    except:
+        print_exc()
+        return HTTPError()
+
+
+@route("/json/events/stream")
+@login_required('LIST')
+def event_stream():
+    """ server-sent events, the seq of every message is its id """
+    if not can_wait() or not waiting.acquire(False):
+        return HTTPError(503, "Use /json/events")
+
+    uuid, seq = event_client()
+
+    def stream(seq):
+        try:
+            yield "retry: 1000\n\n"
+            end = time() + STREAM_TIME
+            while time() < end:
+                batch = PYLOAD.waitEvents(uuid, seq, MAX_WAIT)
+                seq = batch.seq
+                if batch.events:
+                    yield "id: %d\ndata: %s\n\n" % (seq, json_dumps([toDict(x) for x in batch.events]))
+                else:
+                    yield ":\n\n" # keeps the connection alive
+        finally:
+            waiting.release()
+
+    response.content_type = "text/event-stream"
+    response.headers['Cache-Control'] = "no-cache"
+    return stream(seq)
+
+
 @route("/json/links")
 @route("/json/links", method="POST")
 @login_required('LIST')
@@ -56,6 +56,54 @@ var PackageUI = new Class({
         $("del_finished").addEvent("click", this.deleteFinished.bind(this));
         $("restart_failed").addEvent("click", this.restartFailed.bind(this));
 
+        this.seq = null;
+        this.listen();
+    },
+
+    listen: function() {
+        // long poll, returns at once when the server can not wait
+        var start = Date.now();
+        new Request.JSON({
+            method: 'get',
+            url: '/json/events',
+            data: this.seq == null ? {timeout: 25} : {seq: this.seq, timeout: 25},
+            secure: false,
+            onSuccess: function(data) {
+                // the first answer only tells the current seq
+                if (this.seq != null) this.handleEvents(data.events);
+                this.seq = data.seq;
+                this.listen.delay(data.events.length || Date.now() - start > 1000 ? 0 : 2500, this);
+            }.bind(this),
+            onFailure: function() {
+                this.listen.delay(10000, this);
+            }.bind(this)
+        }).send();
+    },
+
+    handleEvents: function(events) {
+        // destination and type are 1 for queue and file, 0 for collector and package
+        events.each(function(event) {
+            if (event.destination != this.type) {
+            } else if (event.eventname == "reload") {
+                window.location.reload();
+            } else if (event.type == 0) {
+                if (event.eventname == "insert") {
+                    window.location.reload();
+                } else if (event.eventname == "remove") {
+                    this.packages.each(function(pack) {
+                        if (pack.id == event.id) pack.ele.nix();
+                    });
+                }
+            } else if (event.eventname == "update" || event.eventname == "remove") {
+                // links of a package that was opened before
+                var ele = $('file_' + event.id);
+                if (!ele) return;
+                var pid = ele.getParent("ul").get("id").match(/[0-9]+/);
+                this.packages.each(function(pack) {
+                    if (pack.id == pid[0]) pack.refreshLinks();
+                });
+            }
+        }, this);
     },
 
     parsePackages: function() {
@@ -229,7 +277,15 @@ var Package = new Class({
         this.registerLinkEvents();
         this.linksLoaded = true;
         indicateFinish();
-        this.toggle();
+        this.ele.getElement('.children').reveal();
+    },
+
+    refreshLinks: function() {
+        if (this.ele.getElement('.children').getStyle('display') == "block") {
+            this.loadLinks();
+        } else {
+            this.linksLoaded = false;
+        }
     },
 
     registerLinkEvents: function() {
@@ -44,7 +44,8 @@ class GZipMiddleWare(object):
         self.compress_level = int(compress_level)
 
     def __call__(self, environ, start_response):
-        if 'gzip' not in environ.get('HTTP_ACCEPT_ENCODING', ''):
+        if 'gzip' not in environ.get('HTTP_ACCEPT_ENCODING', '') or \
+           'text/event-stream' in environ.get('HTTP_ACCEPT', ''):
             # nothing for us to do, so this middleware will
             # be a no-op:
             return self.application(environ, start_response)
@@ -417,41 +417,18 @@ def logs(item=-1):
     except:
         pass
 
-    log = PYLOAD.getLog()
-    if not perpage:
-        item = 0
-
-    if item < 1 or type(item) is not int:
-        item = 1 if len(log) - perpage + 1 < 1 else len(log) - perpage + 1
+    count = PYLOAD.getLogCount()
 
     if type(fro) is datetime: # we will search for datetime
-        item = -1
-
-    data = []
-    counter = 0
-    perpagecheck = 0
-    for l in log:
-        counter += 1
+        data = PYLOAD.queryLog(start=fro, limit=perpage or None)
+        item = data[0].line if data else count
+    else:
+        if item < 1 or type(item) is not int:
+            item = max(1, count - perpage + 1) if perpage else 1
+        data = PYLOAD.queryLog(offset=item - 1, limit=perpage or None)
 
-        if counter >= item:
-            try:
-                date, time, level, message = l.decode("utf8", "ignore").split(" ", 3)
-                dtime = datetime.strptime(date + ' ' + time, '%d.%m.%Y %H:%M:%S')
-            except:
-                dtime = None
-                date = '?'
-                time = ' '
-                level = '?'
-                message = l
-            if item == -1 and dtime is not None and fro <= dtime:
-                item = counter #found our datetime
-            if item >= 0:
-                data.append({'line': counter, 'date': date + " " + time, 'level': level, 'message': message})
-                perpagecheck += 1
-                if fro is None and dtime is not None: #if fro not set set it to first showed line
-                    fro = dtime
-            if perpagecheck >= perpage > 0:
-                break
+    if fro is None and data: #if fro not set set it to first showed line
+        fro = datetime.strptime(data[0].date, '%d.%m.%Y %H:%M:%S')
 
     if fro is None: #still not set, empty log?
         fro = datetime.now()
@@ -460,7 +437,7 @@ def logs(item=-1):
     return render_to_response('logs.html', {'warning': warning, 'log': data, 'from': fro.strftime('%d.%m.%Y %H:%M:%S'),
                                             'reversed': reversed, 'perpage': perpage, 'perpage_p': sorted(perpage_p),
                                             'iprev': 1 if item - perpage < 1 else item - perpage,
-                                            'inext': (item + perpage) if item + perpage < len(log) else item},
+                                            'inext': (item + perpage) if item + perpage < count else item},
         [pre_processor])
 
 
@@ -140,7 +140,8 @@ def run_threaded(host="0.0.0.0", port="8000", theads=3, cert="", key=""):
         CherryPyWSGIServer.ssl_certificate = cert
         CherryPyWSGIServer.ssl_private_key = key
 
-    CherryPyWSGIServer.numthreads = theads
+    # additional threads for requests waiting for events
+    CherryPyWSGIServer.numthreads = theads + json_app.WAITING_THREADS
 
     from utils import CherryPyWSGI
 
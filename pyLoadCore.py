@@ -48,6 +48,7 @@ from module.PullEvents import PullManager
 from module.network.RequestFactory import RequestFactory
 from module.web.ServerThread import WebServer
 from module.Scheduler import Scheduler
+from module.LogReader import LogReader
 from module.common.JsEngine import JsEngine
 from module import remote
 from module.remote.RemoteManager import RemoteManager
@@ -76,13 +77,14 @@ class Core(object):
         self.arg_links = []
         self.pidfile = "pyload.pid"
         self.deleteLinks = False # will delete links on startup
+        self.checkDB = False # will check and repair package statistics on startup
 
         if len(argv) > 1:
             try:
                 options, args = getopt(argv[1:], 'vchdusqp:',
                     ["version", "clear", "clean", "help", "debug", "user",
                      "setup", "configdir=", "changedir", "daemon",
-                     "quit", "status", "no-remote","pidfile="])
+                     "quit", "status", "no-remote","pidfile=", "check-db"])
 
                 for option, argument in options:
                     if option in ("-v", "--version"):
@@ -94,6 +96,8 @@ class Core(object):
                         self.daemon = True
                     elif option in ("-c", "--clear"):
                         self.deleteLinks = True
+                    elif option == "--check-db":
+                        self.checkDB = True
                     elif option in ("-h", "--help"):
                         self.print_help()
                         exit()
@@ -154,6 +158,7 @@ class Core(object):
         print "<Options>"
         print "  -v, --version", " " * 10, "Print version to terminal"
         print "  -c, --clear", " " * 12, "Delete all saved packages/links"
+        print "  --check-db", " " * 13, "Check and rebuild package statistics"
         #print "  -a, --add=<link/list>", " " * 2, "Add the specified links"
         print "  -u, --user", " " * 13, "Manages users"
         print "  -d, --debug", " " * 12, "Enable debug mode"
@@ -172,6 +177,7 @@ class Core(object):
     def toggle_pause(self):
         if self.threadManager.pause:
             self.threadManager.pause = False
+            self.scheduler.wakeup()
             return False
         elif not self.threadManager.pause:
             self.threadManager.pause = True
@@ -288,6 +294,9 @@ class Core(object):
         try: signal.signal(signal.SIGQUIT, self.quit)
         except: pass
 
+        self.startupTimes = []
+        self.lastTime = time()
+
         self.config = ConfigParser()
 
         gettext.setpaths([join(os.sep, "usr", "share", "pyload", "locale"), None])
@@ -339,6 +348,7 @@ class Core(object):
 
         self.log.info(_("Starting") + " pyLoad %s" % CURRENT_VERSION)
         self.log.info(_("Using home directory: %s") % getcwd())
+        self.logTime("config")
 
         self.writePidFile()
 
@@ -361,6 +371,7 @@ class Core(object):
             self.check_install("OpenSSL", _("OpenSSL for secure connection"))
 
         self.setupDB()
+        self.logTime("database")
         if self.config.oldRemoteData:
             self.log.info(_("Moving old user config to DB"))
             self.db.addUser(self.config.oldRemoteData["username"], self.config.oldRemoteData["password"])
@@ -371,6 +382,15 @@ class Core(object):
             self.log.info(_("All links removed"))
             self.db.purgeLinks()
 
+        if self.checkDB:
+            wrong = self.db.checkPackageStats()
+            if wrong:
+                self.log.warning(_("Statistics of %d packages were wrong, rebuilding them") % len(wrong))
+                self.db.rebuildPackageStats()
+                self.db.syncSave()
+            else:
+                self.log.info(_("Package statistics are consistent"))
+
         self.requestFactory = RequestFactory(self)
         __builtin__.pyreq = self.requestFactory
 
@@ -387,14 +407,17 @@ class Core(object):
         self.api = Api.Api(self)
 
         self.scheduler = Scheduler(self)
+        self.logTime("imports")
 
         #hell yeah, so many important managers :D
         self.pluginManager = PluginManager(self)
+        self.logTime("plugins")
         self.pullManager = PullManager(self)
         self.accountManager = AccountManager(self)
         self.threadManager = ThreadManager(self)
         self.captchaManager = CaptchaManager(self)
         self.hookManager = HookManager(self)
+        self.logTime("hooks")
         self.remoteManager = RemoteManager(self)
 
         self.js = JsEngine()
@@ -406,6 +429,7 @@ class Core(object):
 
         if web:
             self.init_webserver()
+        self.logTime("servers")
 
         spaceLeft = freeSpace(self.config["general"]["download_folder"])
 
@@ -430,15 +454,19 @@ class Core(object):
 
         #self.scheduler.addJob(0, self.accountManager.getAccountInfos)
         self.log.info(_("Activating Accounts..."))
-        self.accountManager.getAccountInfos()
+        self.accountManager.getAccountInfos(False, True)
+        self.logTime("accounts")
 
         self.threadManager.pause = False
         self.running = True
 
         self.log.info(_("Activating Plugins..."))
         self.hookManager.coreReady()
+        self.logTime("activation")
 
         self.log.info(_("pyLoad is up and running"))
+        self.log.debug("Startup took %.2fs: %s" % (sum([t for name, t in self.startupTimes]),
+                                                   ", ".join(["%s %.2fs" % x for x in self.startupTimes])))
 
         #test api
 #        from module.common.APIExerciser import startApiExerciser
@@ -455,7 +483,7 @@ class Core(object):
         locals().clear()
 
         while True:
-            sleep(2)
+            self.scheduler.wait()
             if self.do_restart:
                 self.log.info(_("restarting pyLoad"))
                 self.restart()
@@ -480,6 +508,12 @@ class Core(object):
             self.webserver = WebServer(self)
             self.webserver.start()
 
+    def logTime(self, name):
+        """ time needed by a phase of the startup """
+        now = time()
+        self.startupTimes.append((name, now - self.lastTime))
+        self.lastTime = now
+
     def init_logger(self, level):
         console = logging.StreamHandler(sys.stdout)
         frm = logging.Formatter("%(asctime)s %(levelname)-8s  %(message)s", "%d.%m.%Y %H:%M:%S")
@@ -501,6 +535,8 @@ class Core(object):
         self.log.addHandler(console) #if console logging
         self.log.setLevel(level)
 
+        self.logReader = LogReader(join(self.config['log']['log_folder'], 'log.txt'))
+
     def removeLogger(self):
         for h in list(self.log.handlers):
             self.log.removeHandler(h)
@@ -597,6 +633,7 @@ class Core(object):
             self.log.info(_("error while shutting down"))
 
         finally:
+            self.requestFactory.saveCookies(False)
             self.files.syncSave()
             self.shuttedDown = True
 
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import __builtin__
+import hashlib
+import zlib
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from os import remove, urandom
+from os.path import exists, join
+from re import match
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Thread
+from time import time
+
+from module.network.Browser import Browser
+from module.network.Bucket import Bucket
+from module.network.HTTPChunk import HTTPChunk
+from module.network.HTTPDownload import HTTPDownload
+from module.network.Reactor import Reactor
+from module.network.StreamHash import StreamHash
+
+DATA = urandom(600 * 1024)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """ serves DATA with range support """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        start, end = 0, len(DATA) - 1
+        requested = match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if requested:
+            start = int(requested.group(1))
+            if requested.group(2): end = min(end, int(requested.group(2)))
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes %d-%d/%d" % (start, end, len(DATA)))
+        else:
+            self.send_response(200)
+
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end + 1 - start))
+        self.end_headers()
+        for i in range(start, end + 1, 16 * 1024):
+            try:
+                self.wfile.write(DATA[i:min(i + 16 * 1024, end + 1)])
+            except Exception:
+                return
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass # chunks close their connection when their range is loaded
+
+
+class TestDownload:
+
+    @classmethod
+    def setUpClass(cls):
+        __builtin__._ = lambda x: x
+        cls.server = Server(("127.0.0.1", 0), Handler)
+        cls.url = "http://127.0.0.1:%d/file.bin" % cls.server.server_address[1]
+        t = Thread(target=cls.server.serve_forever)
+        t.setDaemon(True)
+        t.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.dir = mkdtemp()
+        self.reactor = None
+
+    def tearDown(self):
+        if self.reactor: self.reactor.stop()
+        rmtree(self.dir)
+
+    def download(self, chunks, inplace, rate=0, reactor=False):
+        if reactor:
+            self.reactor = Reactor()
+            self.reactor.start()
+
+        bucket = None
+        if rate:
+            bucket = Bucket(Bucket())
+            bucket.setRate(rate)
+
+        name = join(self.dir, "file.bin")
+        if exists(name): remove(name)
+        d = HTTPDownload(self.url, name, bucket=bucket, reactor=self.reactor, checksums=("md5", "crc32"),
+                         options={"interface": None, "proxies": {}, "ipv6": False, "preallocate": inplace})
+        d.download(chunks)
+
+        assert open(name, "rb").read() == DATA
+        assert d.checksums.get("md5") == hashlib.md5(DATA).hexdigest()
+        assert d.checksums.get("crc32") == "%x" % (zlib.crc32(DATA) & 0xffffffff)
+
+    def test_single(self):
+        self.download(1, False)
+
+    def test_chunks(self):
+        self.download(3, False)
+
+    def test_chunks_limited(self):
+        self.download(3, False, 1024 * 1024)
+
+    def test_inplace_limited(self):
+        self.download(3, True, 1024 * 1024)
+
+    def test_reactor_limited(self):
+        self.download(3, False, 1024 * 1024, True)
+
+    def test_download_limit(self):
+        """ a single download is limited below its unlimited plugin and global bucket """
+        req = Browser(Bucket(Bucket(Bucket())), {"interface": None, "proxies": {}, "ipv6": False})
+        req.setSpeedLimit(300)
+
+        t = time()
+        req.httpDownload(self.url, join(self.dir, "file.bin"), chunks=2)
+        req.close()
+        assert time() - t > 1.5
+
+    def test_overshoot(self):
+        """ data behind the range is neither written nor hashed, even when curl delivers it again """
+        name = join(self.dir, "file.bin")
+        d = HTTPDownload(self.url, name, options={"interface": None, "proxies": {}, "ipv6": False})
+        d.hash = StreamHash(("md5", "crc32"))
+        chunk = HTTPChunk(0, d, (0, 99))
+        chunk.fp = open(name, "wb")
+
+        chunk.writeBody(DATA[:80])
+        assert chunk.writeBody(DATA[80:160]) == 0
+        chunk.writeBody(DATA[80:160])
+        chunk.fp.close()
+        chunk.close()
+
+        checksums = d.hash.finish(name, 100)
+        assert open(name, "rb").read() == DATA[:100]
+        assert checksums.get("md5") == hashlib.md5(DATA[:100]).hexdigest()
+        assert checksums.get("crc32") == "%x" % (zlib.crc32(DATA[:100]) & 0xffffffff)
+
+    def test_short_chunk(self):
+        """ an in place chunk missing only its last byte is detected """
+        name = join(self.dir, "file.bin")
+        d = HTTPDownload(self.url, name, options={"interface": None, "proxies": {}, "ipv6": False})
+        d.info.setSize(200)
+        d.info.inplace = True
+        d.info.createChunks(2)
+        open(d.info.getChunkName(0), "wb").close()
+
+        d.info.setChunkArrived(0, 101)
+        d.info.setChunkArrived(1, 100)
+        d._verifyChunks()
+
+        d.info.setChunkArrived(1, 98)
+        try:
+            d._verifyChunks()
+        except Exception, e:
+            assert "smaller than expected" in str(e)
+        else:
+            assert False, "short chunk was not detected"
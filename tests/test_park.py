@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import __builtin__
+from threading import Lock
+from time import time
+from types import InstanceType
+
+from module.PyFile import PyFile, statusMap
+from module.Scheduler import Scheduler
+from module.ThreadManager import ThreadManager
+
+
+class Log:
+    def debug(self, msg): pass
+    error = warning = info = debug
+
+
+class Core:
+    log = Log()
+
+
+class Plugin:
+    parked = False
+    req = None
+
+    def clean(self):
+        self.cleaned = True
+
+
+class FileHandler:
+    """ remembers what was written to the database """
+
+    def __init__(self, core):
+        self.core = core
+        self.cache = {}
+        self.saved = {}
+
+    def updateLink(self, pyfile):
+        self.saved[pyfile.id] = pyfile.status
+
+    def releaseLink(self, id):
+        del self.cache[id]
+
+
+class TestPark:
+
+    def setUp(self):
+        __builtin__._ = lambda x: x
+        self.core = Core()
+        self.core.scheduler = Scheduler(self.core)
+
+        # thread manager without download threads
+        self.manager = InstanceType(ThreadManager)
+        self.manager.core = self.core
+        self.manager.lock = Lock()
+        self.manager.parked = {}
+        self.manager.threads = []
+        self.manager.localThreads = []
+        self.core.threadManager = self.manager
+
+        self.files = FileHandler(self.core)
+        self.pyfile = PyFile(self.files, 1, "http://example.com/file", "file", 0, statusMap["queued"], "",
+                             "BasePlugin", 1, 0)
+        self.pyfile.plugin = self.plugin = Plugin()
+
+    def park(self):
+        self.pyfile.waitUntil = time() + 600
+        self.pyfile.setStatus("waiting")
+        self.manager.park(self.pyfile)
+
+    def test_unpark(self):
+        self.park()
+        assert self.pyfile.id in self.manager.processingIds()
+
+        self.pyfile.waitUntil = 0
+        self.manager.unpark(self.pyfile)
+        assert self.pyfile.status == statusMap["queued"]
+        assert not self.manager.parked
+        assert not self.core.scheduler.jobs
+
+    def test_abort(self):
+        self.park()
+        self.pyfile.abortDownload()
+
+        assert self.files.saved[self.pyfile.id] == statusMap["aborted"]
+        assert self.plugin.cleaned
+        assert self.pyfile.id not in self.files.cache
+        assert not self.manager.parked
+        assert not self.core.scheduler.jobs
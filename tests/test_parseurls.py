@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import __builtin__
+import re
+from os import chdir, getcwd
+from os.path import abspath, dirname, join
+from itertools import chain
+from random import Random
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import time
+
+from module.plugins.PluginManager import PluginManager
+
+PYPATH = abspath(join(dirname(__file__), ".."))
+
+
+class Log:
+    def debug(self, msg): pass
+    error = warning = info = debug
+
+
+class Config:
+    def addPluginConfig(self, *args): pass
+    def deleteConfig(self, *args): pass
+
+
+class Core:
+    log = Log()
+    config = Config()
+
+
+def linearParse(manager, urls):
+    """ old parseUrls, tries every pattern """
+    last = None
+    res = []
+    for url in urls:
+        if last and last[1]["re"].match(url):
+            res.append((url, last[0]))
+            continue
+        for name, value in chain(manager.crypterPlugins.iteritems(), manager.hosterPlugins.iteritems(),
+            manager.containerPlugins.iteritems()):
+            if "re" in value and value["re"].match(url):
+                res.append((url, name))
+                last = (name, value)
+                break
+        else:
+            res.append((url, "BasePlugin"))
+    return res
+
+
+def testLinks(count, seed=0):
+    """ testlinks.txt mixed with variants of them """
+    rand = Random(seed)
+    f = open(join(PYPATH, "testlinks.txt"), "rb")
+    links = [l.strip() for l in f if "://" in l]
+    f.close()
+
+    variants = [lambda u: u, lambda u: u.upper(), lambda u: u.replace("http://", "https://"),
+                lambda u: u.replace("http://", "http://sub."), lambda u: u.replace("://www.", "://"),
+                lambda u: u.replace(".com/", ".com:8080/"), lambda u: u.replace("/", "//", 3),
+                lambda u: u.split("://", 1)[-1], lambda u: u + "\n", lambda u: u.replace(".", "x", 1),
+                lambda u: "http://example.org/?u=" + u, lambda u: u[:u.find("/", 8)]]
+
+    return [rand.choice(variants)(rand.choice(links)) for i in range(count)]
+
+
+class TestParseUrls:
+
+    def setUp(self):
+        self.cwd = getcwd()
+        self.tmp = mkdtemp()
+        chdir(self.tmp) # plugin manager creates userplugins folder
+        __builtin__.pypath = PYPATH
+        __builtin__._ = lambda x: x
+        self.manager = PluginManager(Core())
+
+    def tearDown(self):
+        import sys
+        sys.meta_path.remove(self.manager)
+        chdir(self.cwd)
+        rmtree(self.tmp)
+
+    def test_parity(self):
+        urls = testLinks(5000)
+        assert self.manager.parseUrls(urls) == linearParse(self.manager, urls)
+
+    def test_patterns(self):
+        # examples of the patterns
+        urls = []
+        for name, value in self.manager.urlPlugins:
+            urls.append(value["pattern"].replace("\\", "").replace("?", "").replace("(", "").replace(")", ""))
+        assert self.manager.parseUrls(urls) == linearParse(self.manager, urls)
+
+    def test_changed_pattern(self):
+        # hooks like XFileSharingPro set new patterns
+        value = self.manager.hosterPlugins["XFileSharingPro"]
+        value["pattern"] = r"http://(?:[^/]*\.)?(example\.com|example\.org)/\w{12}"
+        value["re"] = re.compile(value["pattern"])
+
+        urls = ["http://www.example.org/abcdefghijkl", "http://example.com/abcdefghijkl"]
+        assert self.manager.parseUrls(urls) == [(url, "XFileSharingPro") for url in urls]
+
+
+if __name__ == "__main__":
+    test = TestParseUrls()
+    test.setUp()
+
+    urls = testLinks(20000)
+    print "%d patterns, %d without host" % (len(test.manager.urlPlugins), len(test.manager.urlFallback))
+
+    a = time()
+    linearParse(test.manager, urls)
+    b = time()
+    test.manager.parseUrls(urls)
+    c = time()
+
+    print "linear: %.3fs, indexed: %.3fs" % (b - a, c - b)
+    test.tearDown()